@@ -1,13 +1,28 @@
-from flask import Flask, g
+import atexit
+import time
+from flask import Flask, Response, g, request, has_request_context
 from flask_cors import CORS
 
+from .lib.bundle_cache import BundleCache
+from .lib.conditional import ENDPOINT_TABLES, TableVersions, not_modified, set_validators, validators
 from .lib.db import Db
+from .lib.jobs import Jobs
+from .lib.live_stats import LiveStats
+from .lib.metrics import Metrics, SlowQueryLog
+from .lib.pubsub import PubSub
+from .lib.responses import COMPRESS_MIN_SIZE, compress_response
+from .lib.review_queue import ReviewQueue
+from .lib.snapshot import DEFAULT_ENDPOINTS as SNAPSHOT_ENDPOINTS
 
 from .routes import words
 from .routes import groups
 from .routes import study_sessions
 from .routes import dashboard
 from .routes import study_activities
+from .routes import exports
+from .routes import metrics
+from .routes import sync
+from .routes import jobs
 
 def get_allowed_origins(app):
     try:
@@ -39,8 +54,82 @@ def create_app(test_config=None):
         app.config.update(test_config)
     
     # Initialize database first since we need it for CORS configuration
-    app.db = Db(database=app.config['DATABASE'])
+    app.db = Db(
+        database=app.config['DATABASE'],
+        pragmas=app.config.get('DATABASE_PRAGMAS'),
+        pool_size=app.config.get('DATABASE_POOL_SIZE', 8),
+        instrument=app.config.get('METRICS_ENABLED', True)
+    )
+
+    # Request and SQL statement metrics, served on /metrics
+    app.metrics = Metrics()
+    if app.config.get('SLOW_QUERY_MS') is not None:
+        app.slow_queries = SlowQueryLog(
+            app.config['SLOW_QUERY_MS'],
+            max_entries=app.config.get('SLOW_QUERY_LOG_SIZE', 100),
+            log=lambda entry: app.logger.warning("Slow query (%.1fms, %d rows): %s\n  %s",
+                entry['ms'], entry['rows'], entry['sql'], '\n  '.join(entry['plan']))
+        )
+    else:
+        app.slow_queries = None
+
+    def observe_statement(connection, sql, parameters, seconds, rows):
+        app.metrics.observe_statement(sql, seconds, rows)
+        if has_request_context():
+            g.sql_statements = g.get('sql_statements', 0) + 1
+        if app.slow_queries is not None:
+            app.slow_queries.capture(connection, sql, parameters, seconds, rows)
+
+    app.db.observe_statements(observe_statement)
+
+    # Analytics routes read a copy of the database refreshed in the background,
+    # so their aggregations never hold up review writes
+    if app.config.get('READ_SNAPSHOT_INTERVAL') is not None:
+        app.db.enable_read_snapshot(
+            path=app.config.get('READ_SNAPSHOT_PATH'),
+            interval=app.config['READ_SNAPSHOT_INTERVAL'],
+            log=app.logger.warning
+        )
+        atexit.register(app.db.snapshot.stop)
+    snapshot_endpoints = set(app.config.get('READ_SNAPSHOT_ENDPOINTS', SNAPSHOT_ENDPOINTS))
     
+    # Dashboards listening on /dashboard/stream get what changed after each write
+    app.pubsub = PubSub(max_queued=app.config.get('PUBSUB_MAX_QUEUED', 100))
+    app.live_stats = LiveStats(app.db, app.pubsub)
+    atexit.register(app.pubsub.close)
+
+    # Review events are written behind the request in group commits
+    if app.config.get('REVIEW_QUEUE_ENABLED', True):
+        app.review_queue = ReviewQueue(
+            app.db,
+            max_batch=app.config.get('REVIEW_QUEUE_MAX_BATCH', 500),
+            max_latency=app.config.get('REVIEW_QUEUE_MAX_LATENCY_MS', 20) / 1000,
+            max_depth=app.config.get('REVIEW_QUEUE_MAX_DEPTH', 20000),
+            submit_timeout=app.config.get('REVIEW_QUEUE_SUBMIT_TIMEOUT', 2.0),
+            on_flush=app.live_stats.refresh,
+            observe_flush=app.metrics.observe_flush
+        )
+        # Flush whatever is still queued when the process exits
+        atexit.register(app.review_queue.close)
+    else:
+        app.review_queue = None
+
+    # Per-table change counters behind the conditional GET validators and the query cache
+    app.table_versions = TableVersions(app.config['DATABASE'])
+    atexit.register(app.table_versions.close)
+    conditional_enabled = app.config.get('CONDITIONAL_ENABLED', True)
+    conditional_endpoints = app.config.get('CONDITIONAL_ENDPOINTS', ENDPOINT_TABLES)
+
+    # Results of the list routes marked @app.db.cached(...), until their tables change
+    if app.config.get('QUERY_CACHE_SIZE', 256):
+        app.db.enable_query_cache(app.table_versions, max_entries=app.config.get('QUERY_CACHE_SIZE', 256))
+
+    # Background jobs (history reset), polled on /api/jobs/:id
+    app.jobs = Jobs(max_finished=app.config.get('JOBS_MAX_FINISHED', 50), log=app.logger.error)
+
+    # Prebuilt, precompressed /groups/:id/words/raw bodies, one per group
+    app.group_bundles = BundleCache(app.config.get('GROUP_BUNDLE_CACHE_SIZE', 64))
+
     # Get allowed origins from study_activities table
     allowed_origins = get_allowed_origins(app)
     
@@ -57,7 +146,74 @@ def create_app(test_config=None):
         }
     })
 
-    # Close database connection
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_statements = 0
+
+    @app.before_request
+    def route_reads_to_snapshot():
+        if app.db.snapshot is not None and request.endpoint in snapshot_endpoints:
+            app.db.read_from_snapshot()
+
+    # How stale the data behind a snapshot response is, in seconds
+    @app.after_request
+    def add_snapshot_age(response):
+        age = app.db.snapshot_age()
+        if age is not None:
+            response.headers['X-Snapshot-Age'] = f'{age:.3f}'
+        return response
+
+    # gzip (or brotli) bodies of COMPRESS_MIN_SIZE bytes and up for clients that accept it
+    compress_min_size = app.config.get('COMPRESS_MIN_SIZE', COMPRESS_MIN_SIZE)
+
+    @app.after_request
+    def compress(response):
+        return compress_response(response, request.accept_encodings, min_size=compress_min_size,
+            level=app.config.get('COMPRESS_LEVEL', 6))
+
+    # Read endpoints get an ETag and Last-Modified from the change counters of
+    # the tables they read, and requests that still hold the current version
+    # get a 304 before the route runs a single query
+    @app.before_request
+    def answer_conditional_requests():
+        if (not conditional_enabled or request.method != 'GET'
+                or request.endpoint not in conditional_endpoints
+                # A snapshot can be older than the counters
+                or g.get('read_snapshot')):
+            return None
+        versions = app.table_versions.current()
+        if versions is None:
+            return None
+        etag, last_modified = validators(versions, request.endpoint, conditional_endpoints[request.endpoint])
+        if etag is None:
+            return None
+        if not_modified(request, etag, last_modified):
+            response = Response(status=304)
+            set_validators(response, etag, last_modified)
+            return response
+        g.validators = (etag, last_modified)
+
+    # Registered after compress, so it runs first and compress sees the ETag
+    @app.after_request
+    def add_validators(response):
+        found = g.pop('validators', None)
+        if found is not None and response.status_code == 200:
+            set_validators(response, *found)
+        return response
+
+    # Streamed responses are timed until the response starts, not until the
+    # last chunk is sent
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            app.metrics.observe_request(endpoint, request.method, response.status_code, time.perf_counter() - started)
+            app.metrics.observe_request_statements(endpoint, g.get('sql_statements', 0))
+        return response
+
+    # Hand the request's database connection back to the pool
     @app.teardown_appcontext
     def close_db(exception):
         app.db.close()
@@ -68,6 +224,10 @@ def create_app(test_config=None):
     study_sessions.load(app)
     dashboard.load(app)
     study_activities.load(app)
+    exports.load(app)
+    metrics.load(app)
+    sync.load(app)
+    jobs.load(app)
     
     return app
 
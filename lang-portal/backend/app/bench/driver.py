@@ -0,0 +1,68 @@
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+
+from ..lib.query_plan import probe_urls
+
+# Every GET route (with the same query variations the plan check uses) plus
+# a batch of reviews posted to an existing session. Reset and the legacy
+# POST /study_sessions are left out: one wipes the data, the other targets
+# tables the real schema does not have.
+def bench_requests(app, review_batch=10, seed=0):
+  requests = [(f'GET {url}', 'GET', url, None) for _, url in probe_urls(app)]
+
+  rng = random.Random(seed)
+  with app.db.checkout() as connection:
+    session = connection.execute('SELECT id, group_id FROM study_sessions ORDER BY id LIMIT 1').fetchone()
+    if session:
+      word_ids = [row[0] for row in connection.execute(
+        'SELECT word_id FROM word_groups WHERE group_id = ? LIMIT 1000', (session['group_id'],))]
+      if word_ids:
+        reviews = [{"word_id": rng.choice(word_ids), "correct": rng.random() < 0.7} for _ in range(review_batch)]
+        url = f"/study_sessions/{session['id']}/review"
+        requests.append((f'POST {url}', 'POST', url, reviews))
+  return requests
+
+def test_client_sender(app):
+  client = app.test_client()
+  def send(method, url, payload):
+    response = client.open(url, method=method, json=payload)
+    response.get_data()  # run streamed responses to the end
+    return response.status_code
+  return send
+
+def http_sender(base_url):
+  def send(method, url, payload):
+    data = json.dumps(payload).encode('utf-8') if payload is not None else None
+    request = urllib.request.Request(base_url.rstrip('/') + url, data=data, method=method,
+      headers={'Content-Type': 'application/json'} if data else {})
+    try:
+      with urllib.request.urlopen(request) as response:
+        response.read()
+        return response.status
+    except urllib.error.HTTPError as e:
+      return e.code
+  return send
+
+# Send each request warmup + iterations times and record the latencies (ms)
+# of the timed runs. Requests go through the Flask test client, or to a
+# running server when base_url is given.
+def run(app, requests, iterations=50, warmup=5, base_url=None, log=print):
+  send = http_sender(base_url) if base_url else test_client_sender(app)
+  results = {}
+  started = time.perf_counter()
+  for label, method, url, payload in requests:
+    for _ in range(warmup):
+      send(method, url, payload)
+    latencies = []
+    for _ in range(iterations):
+      request_started = time.perf_counter()
+      status = send(method, url, payload)
+      latencies.append((time.perf_counter() - request_started) * 1000)
+      if status >= 500:
+        raise RuntimeError(f"{label} failed with {status}")
+    results[label] = latencies
+    log(f"  {label}: {len(latencies)} requests")
+  return results, time.perf_counter() - started
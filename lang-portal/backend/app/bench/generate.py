@@ -0,0 +1,126 @@
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from ..lib.importer import batched
+from ..lib.reviews import TIMESTAMP_FORMAT
+
+# Kana syllables with their romaji; words are spelled from their index in
+# base len(SYLLABLES), so every (kanji, romaji) pair is unique
+SYLLABLES = [
+  ('あ', 'a'), ('い', 'i'), ('う', 'u'), ('え', 'e'), ('お', 'o'),
+  ('か', 'ka'), ('き', 'ki'), ('く', 'ku'), ('け', 'ke'), ('こ', 'ko'),
+  ('さ', 'sa'), ('し', 'shi'), ('す', 'su'), ('せ', 'se'), ('そ', 'so'),
+  ('た', 'ta'), ('ち', 'chi'), ('つ', 'tsu'), ('て', 'te'), ('と', 'to'),
+  ('な', 'na'), ('に', 'ni'), ('ぬ', 'nu'), ('ね', 'ne'), ('の', 'no'),
+  ('は', 'ha'), ('ひ', 'hi'), ('ふ', 'fu'), ('へ', 'he'), ('ほ', 'ho'),
+  ('ま', 'ma'), ('み', 'mi'), ('む', 'mu'), ('め', 'me'), ('も', 'mo'),
+  ('や', 'ya'), ('ゆ', 'yu'), ('よ', 'yo'), ('ら', 'ra'), ('り', 'ri'),
+  ('る', 'ru'), ('れ', 're'), ('ろ', 'ro'), ('わ', 'wa'), ('を', 'wo'),
+]
+
+ENGLISH = ['to eat', 'to go', 'to see', 'red', 'blue', 'cat', 'dog', 'book', 'water', 'mountain',
+           'river', 'quick', 'slow', 'to write', 'to read', 'house', 'train', 'rain', 'teacher', 'friend']
+
+DEFAULT_SCALE = {
+  'words': 10000,
+  'groups': 20,
+  'sessions': 2000,
+  'review_items': 100000,
+}
+
+def spell(index):
+  parts = []
+  index += 1
+  while index:
+    index, digit = divmod(index - 1, len(SYLLABLES))
+    parts.append(SYLLABLES[digit])
+  parts.reverse()
+  return [{"kanji": kana, "romaji": [romaji]} for kana, romaji in parts]
+
+def word_rows(count, rng):
+  for index in range(count):
+    parts = spell(index)
+    yield (
+      ''.join(part['kanji'] for part in parts),
+      ''.join(part['romaji'][0] for part in parts),
+      f'{rng.choice(ENGLISH)} {index}',
+      json.dumps(parts, ensure_ascii=False)
+    )
+
+# Word ids are 1..words and word i belongs to group ((i - 1) % groups) + 1
+def group_word(group_id, groups, words, rng):
+  per_group = (words - group_id) // groups + 1
+  return group_id + groups * rng.randrange(per_group)
+
+def session_rows(count, groups, activities, start, rng):
+  span = int((datetime.now() - start).total_seconds())
+  for _ in range(count):
+    created_at = start + timedelta(seconds=rng.randrange(span))
+    yield (rng.randint(1, groups), rng.randint(1, activities), created_at.strftime(TIMESTAMP_FORMAT))
+
+def review_rows(count, sessions, groups, words, rng):
+  for _ in range(count):
+    session_id, group_id, created_at = sessions[rng.randrange(len(sessions))]
+    reviewed_at = datetime.strptime(created_at, TIMESTAMP_FORMAT) + timedelta(seconds=rng.randrange(1800))
+    yield (group_word(group_id, groups, words, rng), session_id, rng.random() < 0.7, reviewed_at.strftime(TIMESTAMP_FORMAT))
+
+# Fill an app's database (real schema plus migrations) with synthetic data.
+# The rollup and search triggers stay active, so loading also measures them.
+def generate(app, words=None, groups=None, sessions=None, review_items=None, seed=0, batch_size=50000, log=print):
+  scale = dict(DEFAULT_SCALE)
+  scale.update({key: value for key, value in
+    (('words', words), ('groups', groups), ('sessions', sessions), ('review_items', review_items))
+    if value is not None})
+  rng = random.Random(seed)
+  started = time.perf_counter()
+
+  with app.app_context():
+    app.db.setup_tables(app.db.cursor())
+    app.db.migrate()
+
+  def insert(connection, label, sql, rows, total):
+    loaded = 0
+    for batch in batched(rows, batch_size):
+      connection.execute('BEGIN')
+      connection.executemany(sql, batch)
+      connection.commit()
+      loaded += len(batch)
+      log(f"  {label}: {loaded:,}/{total:,}")
+
+  with app.db.checkout() as connection:
+    connection.execute('BEGIN')
+    connection.execute("INSERT INTO study_activities (name, url, preview_url) VALUES ('Typing Tutor', 'http://localhost:8080', '/assets/study_activities/typing_tutor.png')")
+    connection.executemany('INSERT INTO groups (name) VALUES (?)', [(f'Group {i}',) for i in range(1, scale['groups'] + 1)])
+    connection.commit()
+
+    insert(connection, 'words', 'INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)',
+      word_rows(scale['words'], rng), scale['words'])
+    insert(connection, 'word_groups', 'INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)',
+      ((word_id, (word_id - 1) % scale['groups'] + 1) for word_id in range(1, scale['words'] + 1)), scale['words'])
+
+    # Sessions only go to groups that have words
+    start = datetime.now() - timedelta(days=365)
+    insert(connection, 'study_sessions', 'INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, ?, ?)',
+      session_rows(scale['sessions'], min(scale['groups'], scale['words']), 1, start, rng), scale['sessions'])
+
+    if scale['sessions'] and scale['words']:
+      session_list = connection.execute('SELECT id, group_id, created_at FROM study_sessions').fetchall()
+      insert(connection, 'word_review_items',
+        'INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)',
+        review_rows(scale['review_items'], session_list, scale['groups'], scale['words'], rng), scale['review_items'])
+
+    # Per-word counters and schedules, as the review path would have left them
+    connection.execute('BEGIN')
+    connection.execute('''
+      INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed, interval_days, repetitions, due_at)
+      SELECT word_id, SUM(correct = 1), SUM(correct = 0), MAX(created_at), 1, 0, datetime(MAX(created_at), '+1 day')
+      FROM word_review_items
+      GROUP BY word_id
+    ''')
+    connection.commit()
+
+  seconds = time.perf_counter() - started
+  log(f"Generated {scale} in {seconds:.1f}s")
+  return dict(scale, seconds=seconds)
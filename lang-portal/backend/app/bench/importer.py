@@ -0,0 +1,37 @@
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+
+from ..lib.importer import import_words
+from .generate import word_rows
+
+def words(count, seed=0):
+  for kanji, romaji, english, parts in word_rows(count, random.Random(seed)):
+    yield {"kanji": kanji, "romaji": romaji, "english": english, "parts": json.loads(parts)}
+
+# Rows/sec loading rows words into a fresh database (real schema plus
+# migrations) through the per-row import path and through bulk=True. The
+# words are generated up front so only the import is timed.
+def run(rows=100000, batch_size=5000, log=print):
+  from .. import create_app
+
+  loaded = list(words(rows))
+  results = []
+  with tempfile.TemporaryDirectory() as directory:
+    for label, bulk in (('per-row upserts + triggers', False), ('bulk (triggers suspended)', True)):
+      app = create_app({'DATABASE': os.path.join(directory, f'import-{int(bulk)}.db'), 'REVIEW_QUEUE_ENABLED': False})
+      with app.app_context(), contextlib.redirect_stdout(io.StringIO()):
+        app.db.setup_tables(app.db.cursor())
+        app.db.migrate()
+      with app.db.checkout() as connection:
+        result = import_words(connection, loaded, 'Bench', batch_size=batch_size, bulk=bulk)
+      results.append((label, result['rows_per_sec'], result['seconds']))
+
+  baseline = results[0][1]
+  log(f"Importing {rows:,} words into an empty database")
+  for label, rate, seconds in results:
+    log(f"  {label:<28} {rate:>10,.0f} rows/sec  {seconds:6.2f}s  {rate / baseline:5.1f}x")
+  return results
@@ -0,0 +1,66 @@
+import json
+import math
+import os
+import platform
+from datetime import datetime, timezone
+
+# Nearest-rank percentile of an already sorted list
+def percentile(values, p):
+  if not values:
+    return 0.0
+  return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+def summarize(results):
+  summary = {}
+  for label, latencies in results.items():
+    values = sorted(latencies)
+    total_ms = sum(values)
+    summary[label] = {
+      'count': len(values),
+      'p50': round(percentile(values, 50), 3),
+      'p95': round(percentile(values, 95), 3),
+      'p99': round(percentile(values, 99), 3),
+      'mean': round(total_ms / len(values), 3) if values else 0.0,
+      'rps': round(len(values) / (total_ms / 1000), 1) if total_ms else 0.0,
+    }
+  return summary
+
+# Endpoints whose p95 got slower than the baseline by more than tolerance.
+# Differences under min_ms are timer noise and never count.
+def regressions(summary, baseline, tolerance=0.2, min_ms=1.0):
+  found = []
+  for label, stats in summary.items():
+    before = baseline.get('endpoints', {}).get(label)
+    if not before:
+      continue
+    if stats['p95'] - before['p95'] > max(before['p95'] * tolerance, min_ms):
+      found.append({'endpoint': label, 'before': before['p95'], 'after': stats['p95']})
+  return found
+
+def format_report(summary, baseline=None):
+  endpoints = (baseline or {}).get('endpoints', {})
+  width = max([len(label) for label in summary] + [8])
+  lines = [f"{'endpoint':<{width}}  {'p50':>8}  {'p95':>8}  {'p99':>8}  {'req/s':>9}  {'p95 vs baseline':>15}"]
+  for label, stats in summary.items():
+    before = endpoints.get(label)
+    change = f"{(stats['p95'] / before['p95'] - 1) * 100:+.0f}%" if before and before['p95'] else ''
+    lines.append(f"{label:<{width}}  {stats['p50']:>8.2f}  {stats['p95']:>8.2f}  {stats['p99']:>8.2f}  {stats['rps']:>9.1f}  {change:>15}")
+  return '\n'.join(lines)
+
+def save_baseline(path, summary, meta=None):
+  directory = os.path.dirname(path)
+  if directory:
+    os.makedirs(directory, exist_ok=True)
+  with open(path, 'w') as file:
+    json.dump({
+      'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+      'python': platform.python_version(),
+      'meta': meta or {},
+      'endpoints': summary
+    }, file, indent=2)
+
+def load_baseline(path):
+  if not os.path.exists(path):
+    return None
+  with open(path) as file:
+    return json.load(file)
@@ -0,0 +1,93 @@
+import json
+import random
+import sqlite3
+import statistics
+import time
+from flask import Flask, jsonify
+
+from ..lib import responses
+from ..lib.compression import compress
+from .generate import spell
+
+WORDS_PAGE = '''
+  SELECT w.id, w.kanji, w.romaji, w.english,
+      COALESCE(r.correct_count, 0) AS correct_count,
+      COALESCE(r.wrong_count, 0) AS wrong_count
+  FROM words w
+  LEFT JOIN word_reviews r ON w.id = r.word_id
+  ORDER BY w.kanji
+  LIMIT ?
+'''
+
+# The /words page as it was serialized before lib/responses.py
+def format_word(word):
+  return {
+    "id": word["id"],
+    "kanji": word["kanji"],
+    "romaji": word["romaji"],
+    "english": word["english"],
+    "correct_count": word["correct_count"],
+    "wrong_count": word["wrong_count"]
+  }
+
+# An in-memory words table with review counters, fetched as a rows-long /words page
+def words_page(rows=1000, seed=0):
+  rng = random.Random(seed)
+  connection = sqlite3.connect(':memory:')
+  connection.row_factory = sqlite3.Row
+  connection.execute('CREATE TABLE words (id INTEGER PRIMARY KEY, kanji TEXT, romaji TEXT, english TEXT)')
+  connection.execute('CREATE TABLE word_reviews (word_id INTEGER PRIMARY KEY, correct_count INTEGER, wrong_count INTEGER)')
+  for id in range(1, rows + 1):
+    parts = spell(rng.randrange(100000))
+    kanji = ''.join(part['kanji'] for part in parts)
+    romaji = ''.join(part['romaji'][0] for part in parts)
+    connection.execute('INSERT INTO words VALUES (?, ?, ?, ?)', (id, kanji, romaji, f'meaning {id}'))
+    if rng.random() < 0.6:
+      connection.execute('INSERT INTO word_reviews VALUES (?, ?, ?)', (id, rng.randint(0, 50), rng.randint(0, 20)))
+  cursor = connection.cursor()
+  cursor.execute(WORDS_PAGE, (rows,))
+  return cursor, cursor.fetchall()
+
+def timed(function, iterations):
+  function()  # warm up
+  samples = []
+  for _ in range(iterations):
+    started = time.perf_counter()
+    function()
+    samples.append((time.perf_counter() - started) * 1000)
+  return statistics.median(samples)
+
+# Median milliseconds to turn an already fetched page of rows into response
+# bytes: the old format_word + jsonify path against row_dicts + dumps, with
+# the json module and (when installed) orjson, plus the cost of gzip on top
+def run(rows=1000, iterations=200, log=print):
+  cursor, page = words_page(rows)
+  app = Flask(__name__)
+
+  def before():
+    with app.app_context():
+      return jsonify({"words": [format_word(word) for word in page]}).get_data()
+
+  def with_json():
+    return json.dumps({"words": responses.row_dicts(cursor, page)}, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+  def after():
+    return responses.dumps({"words": responses.row_dicts(cursor, page)})
+
+  results = [
+    ('format_word + jsonify (before)', timed(before, iterations), len(before())),
+    ('row_dicts + json', timed(with_json, iterations), len(with_json())),
+  ]
+  if responses.orjson is not None:
+    results.append(('row_dicts + orjson', timed(after, iterations), len(after())))
+
+  body = after()
+  results.append(('gzip level 6', timed(lambda: compress(body, 'gzip'), iterations), len(compress(body, 'gzip'))))
+
+  baseline = results[0][1]
+  log(f"Serializing a {rows:,}-row /words page (median of {iterations} runs)")
+  for label, ms, size in results:
+    # Speedup against the old path; gzip is an extra cost, not a serializer
+    speedup = '' if label.startswith('gzip') else f'{baseline / ms:5.1f}x'
+    log(f"  {label:<32} {ms:8.3f} ms  {speedup:>6}  {size:>9,} bytes")
+  return results
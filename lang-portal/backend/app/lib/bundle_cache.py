@@ -0,0 +1,37 @@
+import threading
+from collections import OrderedDict
+
+# Small LRU of prebuilt response bundles. Each entry is stored with the
+# version it was built from; a lookup at any other version is a miss.
+class BundleCache:
+  def __init__(self, max_entries=64):
+    self.max_entries = max_entries
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+    self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+  def get(self, key, version):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None or entry[0] != version:
+        self._stats['misses'] += 1
+        return None
+      self._entries.move_to_end(key)
+      self._stats['hits'] += 1
+      return entry[1]
+
+  def put(self, key, version, bundle):
+    with self._lock:
+      self._entries[key] = (version, bundle)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+        self._stats['evictions'] += 1
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+  def stats(self):
+    with self._lock:
+      return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
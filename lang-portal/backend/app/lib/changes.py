@@ -0,0 +1,115 @@
+import json
+
+from .responses import row_dicts
+
+# The tables GET /sync replicates, with the query for the current state of
+# the rows whose keys are in the JSON array bound to ?
+SYNC_TABLES = {
+  'words': '''
+    SELECT w.id, w.kanji, w.romaji, w.english, w.parts
+    FROM json_each(?) k
+    JOIN words w ON w.id = k.value ->> 'id'
+  ''',
+  'groups': '''
+    SELECT g.id, g.name, g.words_count AS word_count
+    FROM json_each(?) k
+    JOIN groups g ON g.id = k.value ->> 'id'
+  ''',
+  'word_groups': '''
+    SELECT wg.word_id, wg.group_id
+    FROM json_each(?) k
+    JOIN word_groups wg ON wg.word_id = k.value ->> 'word_id' AND wg.group_id = k.value ->> 'group_id'
+  ''',
+  'study_sessions': '''
+    SELECT ss.id, ss.group_id, ss.study_activity_id AS activity_id, ss.created_at AS start_time
+    FROM json_each(?) k
+    JOIN study_sessions ss ON ss.id = k.value ->> 'id'
+  ''',
+  'word_reviews': '''
+    SELECT r.word_id, r.correct_count, r.wrong_count, r.last_reviewed, r.due_at
+    FROM json_each(?) k
+    JOIN word_reviews r ON r.word_id = k.value ->> 'word_id'
+  ''',
+}
+
+# words.parts as JSON; a value that is not JSON is sent as the raw string,
+# as the exports do, and an empty one as []
+def load_parts(parts):
+  if not parts:
+    return []
+  try:
+    return json.loads(parts)
+  except ValueError:
+    return parts
+
+# The last change of each row changed after version since, oldest first,
+# at most limit rows. NOT INDEXED keeps SQLite on the version range instead
+# of walking all of idx_change_log_row for the GROUP BY.
+COMPACTED_CHANGES = '''
+  SELECT c.version, c.table_name, c.row_key, c.op
+  FROM (
+    SELECT max(version) AS version
+    FROM change_log NOT INDEXED
+    WHERE version > ?
+    GROUP BY table_name, row_key
+    ORDER BY version
+    LIMIT ?
+  ) latest
+  JOIN change_log c ON c.version = latest.version
+  ORDER BY c.version
+'''
+
+# Everything a client holding the rows as of version since needs to catch
+# up: per table, the current state of each changed row and the keys of the
+# deleted ones. version is the since to pass next time; has_more means
+# another call is needed to get there. A client that saw another database
+# id has to start over from since=0.
+def changes_since(cursor, since, limit=1000):
+  cursor.execute("SELECT version FROM table_versions WHERE name = '_database'")
+  database = cursor.fetchone()[0]
+
+  cursor.execute(COMPACTED_CHANGES, (since, limit + 1))
+  entries = cursor.fetchall()
+  has_more = len(entries) > limit
+  entries = entries[:limit]
+
+  upserted = {table: [] for table in SYNC_TABLES}
+  deleted = {table: [] for table in SYNC_TABLES}
+  for version, table, row_key, op in entries:
+    if table in SYNC_TABLES:
+      (upserted if op == 'upsert' else deleted)[table].append(row_key)
+
+  changes = {}
+  for table, query in SYNC_TABLES.items():
+    rows = []
+    if upserted[table]:
+      cursor.execute(query, ('[' + ','.join(upserted[table]) + ']',))
+      rows = row_dicts(cursor)
+      if table == 'words':
+        for row in rows:
+          row['parts'] = load_parts(row['parts'])
+    changes[table] = {
+      'upserted': rows,
+      'deleted': [json.loads(row_key) for row_key in deleted[table]]
+    }
+
+  if entries:
+    version = entries[-1][0]
+  else:
+    # Nothing new: stay at since, or at the end of the log for a client past it
+    cursor.execute('SELECT COALESCE(max(version), 0) FROM change_log')
+    version = min(since, cursor.fetchone()[0])
+  return {'database': database, 'version': version, 'has_more': has_more, 'changes': changes}
+
+# Drop the entries a later entry for the same row supersedes. Clients at
+# any version still get the same rows from changes_since().
+def compact_change_log(connection):
+  cursor = connection.execute('''
+    DELETE FROM change_log
+    WHERE version < (
+      SELECT max(c.version) FROM change_log c
+      WHERE c.table_name = change_log.table_name AND c.row_key = change_log.row_key
+    )
+  ''')
+  connection.commit()
+  return cursor.rowcount
@@ -0,0 +1,213 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+# pyarrow is optional; only the columnar exports need it
+try:
+  import pyarrow
+  import pyarrow.ipc
+except ImportError:
+  pyarrow = None
+
+# Arrow IPC files are uncompressed, so analysis tools can memory-map them
+FORMATS = {'arrow': '.arrow', 'parquet': '.parquet'}
+
+# Written next to the partitions; remembers the last exported id
+STATE_FILE = '_export_state.json'
+
+# Review items joined with their session and word. Timestamps come out as
+# unix seconds, and month (the partition) is always the last column.
+REVIEW_HISTORY = '''
+  SELECT
+    wri.id,
+    unixepoch(wri.created_at) AS created_at,
+    wri.word_id,
+    wri.study_session_id,
+    wri.correct,
+    ss.group_id,
+    ss.study_activity_id,
+    unixepoch(ss.created_at) AS session_created_at,
+    w.kanji,
+    w.romaji,
+    w.english,
+    COALESCE(strftime('%Y-%m', wri.created_at), 'unknown') AS month
+  FROM word_review_items wri
+  LEFT JOIN study_sessions ss ON ss.id = wri.study_session_id
+  LEFT JOIN words w ON w.id = wri.word_id
+  WHERE wri.id > ? AND wri.id <= ?
+  ORDER BY wri.id
+'''
+
+COLUMNS = ('id', 'created_at', 'word_id', 'study_session_id', 'correct', 'group_id',
+  'study_activity_id', 'session_created_at', 'kanji', 'romaji', 'english')
+
+class ExportError(Exception):
+  pass
+
+def review_history_schema():
+  return pyarrow.schema([
+    ('id', pyarrow.int64()),
+    ('created_at', pyarrow.timestamp('s', tz='UTC')),
+    ('word_id', pyarrow.int64()),
+    ('study_session_id', pyarrow.int64()),
+    ('correct', pyarrow.bool_()),
+    ('group_id', pyarrow.int64()),
+    ('study_activity_id', pyarrow.int64()),
+    ('session_created_at', pyarrow.timestamp('s', tz='UTC')),
+    ('kanji', pyarrow.string()),
+    ('romaji', pyarrow.string()),
+    ('english', pyarrow.string()),
+  ])
+
+# Review history rows with ids in (after_id, until_id], fetched batch_size
+# rows at a time. Yields {month: [values of each column in COLUMNS]} per batch.
+def iter_review_batches(connection, after_id, until_id, batch_size=50000):
+  cursor = connection.cursor()
+  cursor.execute(REVIEW_HISTORY, (after_id, until_id))
+  while True:
+    rows = cursor.fetchmany(batch_size)
+    if not rows:
+      break
+    months = {}
+    for row in rows:
+      columns = months.get(row[-1])
+      if columns is None:
+        columns = months[row[-1]] = [[] for _ in COLUMNS]
+      for values, value in zip(columns, row):
+        values.append(value)
+    yield months
+
+def load_export_state(output_dir):
+  path = os.path.join(output_dir, STATE_FILE)
+  if not os.path.exists(path):
+    return {}
+  with open(path) as f:
+    return json.load(f)
+
+def save_export_state(output_dir, state):
+  path = os.path.join(output_dir, STATE_FILE)
+  with open(f'{path}.tmp', 'w') as f:
+    json.dump(state, f, indent=2)
+  os.replace(f'{path}.tmp', path)
+
+def record_batch(schema, columns):
+  arrays = []
+  for field, values in zip(schema, columns):
+    if pyarrow.types.is_boolean(field.type):
+      values = [None if value is None else bool(value) for value in values]
+    arrays.append(pyarrow.array(values, field.type))
+  return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+class PartitionWriter:
+  def __init__(self, path, schema, format):
+    self.path = path
+    self.temporary = f'{path}.tmp'
+    self.format = format
+    self.rows = 0
+    if format == 'parquet':
+      import pyarrow.parquet as parquet
+      self._sink = None
+      self._writer = parquet.ParquetWriter(self.temporary, schema, compression='zstd')
+    else:
+      self._sink = pyarrow.OSFile(self.temporary, 'wb')
+      self._writer = pyarrow.ipc.new_file(self._sink, schema)
+
+  def write(self, batch):
+    if self.format == 'parquet':
+      self._writer.write_table(pyarrow.Table.from_batches([batch]))
+    else:
+      self._writer.write_batch(batch)
+    self.rows += batch.num_rows
+
+  def close(self):
+    self._writer.close()
+    if self._sink is not None:
+      self._sink.close()
+
+  # Only finished files get their real name, so readers never see a partial one
+  def publish(self):
+    os.replace(self.temporary, self.path)
+
+  def discard(self):
+    if os.path.exists(self.temporary):
+      os.remove(self.temporary)
+
+# Files left by a run that stopped before saving its state: temporaries and
+# parts starting after the last recorded id. The next run exports them again.
+def remove_unrecorded_parts(output_dir, after_id):
+  removed = []
+  for directory in os.listdir(output_dir):
+    path = os.path.join(output_dir, directory)
+    if not directory.startswith('month=') or not os.path.isdir(path):
+      continue
+    for filename in os.listdir(path):
+      first_id = filename.split('-')[1] if filename.startswith('part-') else ''
+      if filename.endswith('.tmp') or (first_id.isdigit() and int(first_id) > after_id):
+        os.remove(os.path.join(path, filename))
+        removed.append(os.path.join(directory, filename))
+  return removed
+
+# Append word_review_items rows added since the last export to
+# output_dir/month=YYYY-MM/part-<first id>-<last id>.<format>, one file per
+# month touched by this run. Files are never rewritten; the last exported id
+# is saved in output_dir/_export_state.json once every file is in place.
+def export_review_history(connection, output_dir, format='arrow', batch_size=50000, log=print):
+  if pyarrow is None:
+    raise ExportError("Columnar exports need pyarrow (pip install pyarrow)")
+  if format not in FORMATS:
+    raise ExportError(f"Unknown format {format!r}, expected one of: {', '.join(FORMATS)}")
+
+  os.makedirs(output_dir, exist_ok=True)
+  state = load_export_state(output_dir)
+  if state.get('format', format) != format:
+    raise ExportError(f"{output_dir} holds {state['format']} files; export {format} to another directory")
+
+  after_id = state.get('last_id', 0)
+  # Rows committed after this point are left for the next run
+  until_id = connection.execute('SELECT MAX(id) FROM word_review_items').fetchone()[0] or 0
+  result = {'rows': 0, 'first_id': after_id + 1, 'last_id': until_id, 'files': []}
+  if until_id <= after_id:
+    log(f"Nothing to export after id {after_id}")
+    result['last_id'] = after_id
+    return result
+
+  for path in remove_unrecorded_parts(output_dir, after_id):
+    log(f"Removed {path} from an unfinished export")
+
+  schema = review_history_schema()
+  part = f'part-{after_id + 1:012d}-{until_id:012d}{FORMATS[format]}'
+  writers = {}
+  started = time.perf_counter()
+  try:
+    for months in iter_review_batches(connection, after_id, until_id, batch_size=batch_size):
+      for month, columns in months.items():
+        writer = writers.get(month)
+        if writer is None:
+          directory = os.path.join(output_dir, f'month={month}')
+          os.makedirs(directory, exist_ok=True)
+          writer = writers[month] = PartitionWriter(os.path.join(directory, part), schema, format)
+        writer.write(record_batch(schema, columns))
+        result['rows'] += len(columns[0])
+      log(f"  {result['rows']:,} rows ({time.perf_counter() - started:.1f}s)")
+    for writer in writers.values():
+      writer.close()
+  except Exception:
+    for writer in writers.values():
+      try:
+        writer.close()
+      except Exception:
+        pass
+      writer.discard()
+    raise
+
+  for month, writer in sorted(writers.items()):
+    writer.publish()
+    result['files'].append(os.path.relpath(writer.path, output_dir))
+  save_export_state(output_dir, {
+    'format': format,
+    'last_id': until_id,
+    'rows': state.get('rows', 0) + result['rows'],
+    'exported_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+  })
+  return result
@@ -0,0 +1,34 @@
+import gzip
+
+# brotli is optional; without it responses are offered as gzip only
+try:
+  import brotli
+except ImportError:
+  brotli = None
+
+# Content codings in order of preference
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+# Compress a body once for every supported coding. gzip's mtime is pinned so
+# the same body always compresses to the same bytes.
+def compress_variants(body):
+  variants = {'identity': body, 'gzip': gzip.compress(body, compresslevel=9, mtime=0)}
+  if brotli:
+    variants['br'] = brotli.compress(body, quality=11)
+  return variants
+
+# Pick the preferred coding the client accepts (werkzeug's accept_encodings)
+def negotiate_encoding(accept_encodings):
+  for encoding in ENCODINGS:
+    if accept_encodings[encoding] > 0:
+      return encoding
+  return 'identity'
+
+# Compress a dynamic response body. Lower levels than the prebuilt bundles,
+# since this runs on every response.
+def compress(body, encoding, level=6):
+  if encoding == 'gzip':
+    return gzip.compress(body, compresslevel=level, mtime=0)
+  if encoding == 'br':
+    return brotli.compress(body, quality=min(level, 11))
+  return body
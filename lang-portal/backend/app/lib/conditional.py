@@ -0,0 +1,108 @@
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+# GET endpoints answered conditionally, with the tables their responses are
+# built from. 'today' marks responses that also depend on the current date.
+# Endpoints that are not listed (time-dependent ones like /groups/:id/due,
+# streamed exports, /groups/:id/words/raw with its own ETags) are untouched.
+ENDPOINT_TABLES = {
+  'get_words': ('words', 'word_reviews'),
+  'search_words': ('words', 'word_reviews', 'word_groups'),
+  'get_word': ('words', 'word_reviews', 'word_groups', 'groups'),
+  'get_groups': ('groups',),
+  'get_group': ('groups',),
+  'get_group_words': ('groups', 'words', 'word_groups', 'word_reviews'),
+  'get_group_study_sessions': ('groups', 'study_sessions', 'study_activities', 'word_review_items'),
+  'get_study_activities': ('study_activities',),
+  'get_study_activity': ('study_activities',),
+  'get_study_activity_sessions': ('study_activities', 'study_sessions', 'groups', 'word_review_items'),
+  'get_study_activity_launch_data': ('study_activities', 'groups'),
+  'get_study_sessions': ('study_sessions', 'groups', 'study_activities', 'word_review_items'),
+  'get_study_session': ('study_sessions', 'groups', 'study_activities', 'word_review_items', 'words'),
+  'get_recent_session': ('study_sessions', 'study_activities', 'word_review_items'),
+  'get_study_stats': ('words', 'word_review_items', 'study_sessions', 'today'),
+}
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# The per-table change counters in table_versions (bumped by triggers, see
+# sql/migrations/0013_table_versions.sql), cached until PRAGMA data_version
+# says another connection committed. The connection used for that is never
+# written to, so every commit through the pool shows up in its data_version.
+class TableVersions:
+  def __init__(self, database):
+    self.database = database
+    self._connection = None
+    self._data_version = None
+    self._versions = None
+    self._lock = threading.Lock()
+    self._stats = {'checks': 0, 'reloads': 0}
+
+  # {table: (version, changed_at)}, or None before the table exists
+  def current(self):
+    with self._lock:
+      if self._connection is None:
+        self._connection = sqlite3.connect(self.database, check_same_thread=False)
+      self._stats['checks'] += 1
+      data_version = self._connection.execute('PRAGMA data_version').fetchone()[0]
+      if data_version != self._data_version or self._versions is None:
+        try:
+          rows = self._connection.execute('SELECT name, version, changed_at FROM table_versions').fetchall()
+        except sqlite3.OperationalError:
+          return None  # not migrated yet
+        self._versions = {name: (version, changed_at) for name, version, changed_at in rows}
+        self._data_version = data_version
+        self._stats['reloads'] += 1
+      return self._versions
+
+  def close(self):
+    with self._lock:
+      if self._connection is not None:
+        self._connection.close()
+        self._connection = None
+
+  def stats(self):
+    with self._lock:
+      return dict(self._stats)
+
+# The validators of a response built from tables: a strong ETag from the
+# database id and the tables' counters, and the latest change as
+# Last-Modified. (None, None) when a table has no counter.
+def validators(versions, endpoint, tables):
+  if '_database' not in versions or any(table not in versions for table in tables if table != 'today'):
+    return None, None
+  parts = [endpoint, str(versions['_database'][0])]
+  changed = []
+  for table in tables:
+    if table == 'today':
+      parts.append(datetime.now(timezone.utc).strftime('%Y-%m-%d'))
+      continue
+    version, changed_at = versions[table]
+    parts.append(f'{table}={version}')
+    changed.append(changed_at)
+  etag = hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+
+  last_modified = None
+  if changed:
+    last_modified = datetime.strptime(max(changed), TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+    # More changes can follow within the same second; leave those to the ETag
+    if last_modified >= datetime.now(timezone.utc).replace(microsecond=0):
+      last_modified = None
+  return etag, last_modified
+
+# Whether the client's cached copy is current: a (weakly) matching
+# If-None-Match or, without one, an If-Modified-Since at or after the last change
+def not_modified(request, etag, last_modified):
+  if request.if_none_match:
+    return request.if_none_match.contains_weak(etag)
+  since = request.if_modified_since
+  return since is not None and last_modified is not None and last_modified <= since
+
+def set_validators(response, etag, last_modified):
+  response.set_etag(etag)
+  if last_modified is not None:
+    response.last_modified = last_modified
+  # Caches may keep the response but have to revalidate it every time
+  response.headers['Cache-Control'] = 'no-cache'
@@ -0,0 +1,42 @@
+# Trigger-maintained counter caches: (table, column, query returning
+# (id, stored value, actual value) for every row that is off)
+COUNTER_CACHES = [
+  ('groups', 'words_count', '''
+    SELECT g.id, g.words_count, COUNT(wg.word_id) AS actual
+    FROM groups g
+    LEFT JOIN word_groups wg ON wg.group_id = g.id
+    GROUP BY g.id
+    HAVING g.words_count IS NOT actual
+  '''),
+  ('words', 'review_count', '''
+    SELECT w.id, w.review_count, COUNT(wri.id) AS actual
+    FROM words w
+    LEFT JOIN word_review_items wri ON wri.word_id = w.id
+    GROUP BY w.id
+    HAVING w.review_count IS NOT actual
+  '''),
+]
+
+# Compare every counter cache with its base table
+def check_counter_caches(connection):
+  mismatches = []
+  for table, column, query in COUNTER_CACHES:
+    for id, stored, actual in connection.execute(query).fetchall():
+      mismatches.append({'table': table, 'column': column, 'id': id, 'stored': stored, 'actual': actual})
+  return mismatches
+
+# Fix the rows that are off, in one transaction, and return them
+def repair_counter_caches(connection):
+  try:
+    connection.execute('BEGIN IMMEDIATE')
+    mismatches = check_counter_caches(connection)
+    for mismatch in mismatches:
+      connection.execute(
+        f"UPDATE {mismatch['table']} SET {mismatch['column']} = ? WHERE id = ?",
+        (mismatch['actual'], mismatch['id'])
+      )
+    connection.commit()
+  except Exception:
+    connection.rollback()
+    raise
+  return mismatches
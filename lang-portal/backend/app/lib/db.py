@@ -1,34 +1,153 @@
+import os
 import sqlite3
 import json
-from flask import g
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, make_response, request, Response
+
+from .pool import ConnectionPool
+from .query_cache import QueryCache
+from .metrics import InstrumentedConnection
+from .migrations import apply_migrations
+from .importer import import_words, iter_words
+from .rollups import rebuild_rollups
+from .snapshot import ReadSnapshot
+
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
 
 class Db:
-  def __init__(self, database='words.db'):
+  def __init__(self, database='words.db', pragmas=None, pool_size=8, instrument=False):
     self.database = database
     self.connection = None
+    # Connections outlive the request; the pool hands them back out instead
+    # of paying the connect + pragma cost every time
+    self.pool = ConnectionPool(
+      database,
+      pragmas=pragmas,
+      max_idle=pool_size,
+      factory=InstrumentedConnection if instrument else sqlite3.Connection
+    )
+    self.snapshot = None
+    self.query_cache = None
 
   def get(self):
     if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+      connection = None
+      # Requests marked by read_from_snapshot() read the copy once it exists
+      if g.get('read_snapshot') and self.snapshot is not None:
+        connection = self.snapshot.acquire()
+      if connection is None:
+        g.read_snapshot = False
+        connection = self.pool.acquire()
+      g.db = connection
     return g.db
 
+  # Keep a read-only copy of the database, refreshed every interval seconds,
+  # for requests that opt in with read_from_snapshot()
+  def enable_read_snapshot(self, path=None, interval=30.0, log=None):
+    self.snapshot = ReadSnapshot(
+      self.database,
+      path=path,
+      interval=interval,
+      pragmas=self.pool.pragmas,
+      pool_size=self.pool.max_idle,
+      factory=self.pool.factory,
+      log=log
+    )
+    self.snapshot.observe_statements(self.pool.statement_observer)
+    self.snapshot.start()
+    return self.snapshot
+
+  # Send the current request's queries to the read snapshot (read-only routes only)
+  def read_from_snapshot(self):
+    g.read_snapshot = True
+
+  # Age in seconds of the snapshot the current request read, None if it used the database
+  def snapshot_age(self):
+    if g.get('read_snapshot') and 'db' in g:
+      return self.snapshot.age(g.db)
+    return None
+
+  # Cache the results of routes decorated with cached(), checked against the
+  # change counters in versions (a TableVersions)
+  def enable_query_cache(self, versions, max_entries=256):
+    self.query_cache = QueryCache(versions, max_entries=max_entries)
+    return self.query_cache
+
+  # Route decorator: serve repeated requests (same endpoint, arguments and
+  # query string) from the query cache until a write touches one of tables.
+  # Only 200 responses are kept; snapshot reads bypass the cache.
+  def cached(self, *tables):
+    def decorate(view):
+      @wraps(view)
+      def wrapper(*args, **kwargs):
+        if self.query_cache is None or g.get('read_snapshot'):
+          return view(*args, **kwargs)
+        key = (request.endpoint, tuple(sorted(kwargs.items())), tuple(sorted(request.args.items(multi=True))))
+        found, stamp = self.query_cache.get(key, tables)
+        if found is not None:
+          body, mimetype = found
+          return Response(body, mimetype=mimetype)
+        response = make_response(view(*args, **kwargs))
+        if stamp is not None and response.status_code == 200 and not response.is_streamed:
+          self.query_cache.put(key, tables, stamp, (response.get_data(), response.mimetype))
+        return response
+      return wrapper
+    return decorate
+
+  # Borrow a connection outside of a request (background jobs, tasks)
+  @contextmanager
+  def checkout(self):
+    connection = self.pool.acquire()
+    try:
+      yield connection
+    finally:
+      self.pool.release(connection)
+
+  # Record every SQL statement run through the pool while the block is active
+  @contextmanager
+  def trace_statements(self):
+    statements = []
+    self.pool.trace_callback = statements.append
+    try:
+      yield statements
+    finally:
+      self.pool.trace_callback = None
+
+  # Report every statement run on an instrumented pool to
+  # observer(connection, sql, parameters, seconds, rows)
+  def observe_statements(self, observer):
+    self.pool.statement_observer = observer
+    if self.snapshot is not None:
+      self.snapshot.observe_statements(observer)
+
   def commit(self):
     self.get().commit()
 
+  def rollback(self):
+    self.get().rollback()
+
   def cursor(self):
     # Ensure the connection is valid before getting a cursor
     connection = self.get()
     return connection.cursor()
 
+  # Return the request's connection to the pool
   def close(self):
     db = g.pop('db', None)
+    from_snapshot = g.pop('read_snapshot', False)
     if db is not None:
-      db.close()
+      if from_snapshot:
+        self.snapshot.release(db)
+      else:
+        self.pool.release(db)
+
+  def pool_stats(self):
+    return self.pool.stats()
 
   # Function to load SQL from a file
   def sql(self, filepath):
-    with open('sql/' + filepath, 'r') as file:
+    with open(os.path.join(SQL_DIR, filepath), 'r') as file:
       return file.read()
 
   # Function to load the words from a JSON file
@@ -59,6 +178,14 @@ class Db:
     cursor.execute(self.sql('setup/create_table_study_sessions.sql'))
     self.get().commit()
 
+  # Apply pending migrations from sql/migrations (indexes, schema changes)
+  def migrate(self):
+    return apply_migrations(self.get())
+
+  # Recompute the rollup tables (dashboard stats, ...) from scratch
+  def rebuild_rollups(self):
+    return rebuild_rollups(self.get())
+
   def import_study_activities_json(self,cursor,data_json_path):
     study_actvities = self.load_json(data_json_path)
     for activity in study_actvities:
@@ -68,52 +195,18 @@ class Db:
     self.get().commit()
 
   def import_word_json(self,cursor,group_name,data_json_path):
-      # Insert a new group
-      cursor.execute('''
-        INSERT INTO groups (name) VALUES (?)
-      ''', (group_name,))
-      self.get().commit()
-
-      # Get the ID of the group
-      cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-      core_verbs_group_id = cursor.fetchone()[0]
-
-      # Insert some sample words (verbs) from JSON file and associate with the group
-      words = self.load_json(data_json_path)
-
-      for word in words:
-        # Insert the word into the words table
-        cursor.execute('''
-          INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
-        ''', (word['kanji'], word['romaji'], word['english'], json.dumps(word['parts'])))
-        
-        # Get the last inserted word's ID
-        word_id = cursor.lastrowid
-
-        # Insert the word-group relationship into word_groups table
-        cursor.execute('''
-          INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
-        ''', (word_id, core_verbs_group_id))
-      self.get().commit()
-
-      # Update the words_count in the groups table by counting all words in the group
-      cursor.execute('''
-        UPDATE groups
-        SET words_count = (
-          SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-        )
-        WHERE id = ?
-      ''', (core_verbs_group_id, core_verbs_group_id))
+      # Stream the words in with batched upserts inside a single transaction
+      result = import_words(self.get(), iter_words(data_json_path), group_name)
 
-      self.get().commit()
-
-      print(f"Successfully added {len(words)} verbs to the '{group_name}' group.")
+      print(f"Successfully added {result['linked']} words to the '{group_name}' group.")
+      return result
 
   # Initialize the database with sample data
   def init(self, app):
     with app.app_context():
       cursor = self.cursor()
       self.setup_tables(cursor)
+      self.migrate()
       self.import_word_json(
         cursor=cursor,
         group_name='Core Verbs',
@@ -130,5 +223,7 @@ class Db:
         data_json_path='seed/study_activities.json'
       )
 
+      self.rebuild_rollups()
+
 # Create an instance of the Db class
 db = Db()
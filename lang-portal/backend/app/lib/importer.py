@@ -0,0 +1,385 @@
+import csv
+import json
+import os
+import time
+from collections import namedtuple
+from itertools import islice
+
+# Words are de-duplicated on (kanji, romaji) through a unique index;
+# re-importing a word only writes when its english or parts changed.
+UPSERT_WORD = '''
+  INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)
+  ON CONFLICT (kanji, romaji) DO UPDATE SET
+    english = excluded.english,
+    parts = excluded.parts
+  WHERE words.english IS NOT excluded.english OR words.parts IS NOT excluded.parts
+'''
+
+LINK_WORD = '''
+  INSERT OR IGNORE INTO word_groups (word_id, group_id)
+  SELECT id, ? FROM words WHERE kanji = ? AND romaji = ?
+'''
+
+# The bulk path stages the file in a temp table (the last row for a word
+# wins, as with row-by-row upserts) and writes words and links from it in
+# one statement each
+STAGE_TABLE = '''
+  CREATE TEMP TABLE import_words (
+    kanji TEXT NOT NULL,
+    romaji TEXT NOT NULL,
+    english TEXT,
+    parts TEXT,
+    PRIMARY KEY (kanji, romaji)
+  )
+'''
+
+STAGE_WORD = 'INSERT OR REPLACE INTO import_words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)'
+
+# Existing words the import changes, with the values they had (the search
+# index needs them to drop the old entries)
+CHANGED_WORDS = '''
+  CREATE TEMP TABLE import_changed AS
+  SELECT w.id, w.kanji, w.romaji, w.english FROM import_words i
+  JOIN words w ON w.kanji = i.kanji AND w.romaji = i.romaji
+  WHERE w.english IS NOT i.english OR w.parts IS NOT i.parts
+'''
+
+UPSERT_STAGED_WORDS = '''
+  INSERT INTO words (kanji, romaji, english, parts)
+  SELECT kanji, romaji, english, parts FROM import_words WHERE true
+  ON CONFLICT (kanji, romaji) DO UPDATE SET
+    english = excluded.english,
+    parts = excluded.parts
+  WHERE words.english IS NOT excluded.english OR words.parts IS NOT excluded.parts
+'''
+
+LINK_STAGED_WORDS = '''
+  INSERT OR IGNORE INTO word_groups (word_id, group_id)
+  SELECT w.id, ? FROM import_words i
+  JOIN words w ON w.kanji = i.kanji AND w.romaji = i.romaji
+'''
+
+# Readers -----------
+
+# Stream the objects of a top-level JSON array without loading the whole file
+def iter_json_array(file, chunk_size=65536):
+  decoder = json.JSONDecoder()
+  buffer = ''
+  started = False
+  while True:
+    chunk = file.read(chunk_size)
+    buffer += chunk
+    pos = 0
+    while True:
+      while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+        pos += 1
+      if pos >= len(buffer):
+        break
+      if not started:
+        if buffer[pos] != '[':
+          raise ValueError("Expected a JSON array of words")
+        started = True
+        pos += 1
+        continue
+      if buffer[pos] == ']':
+        return
+      try:
+        item, pos_after = decoder.raw_decode(buffer, pos)
+      except json.JSONDecodeError:
+        if not chunk:
+          raise
+        break  # The object continues in the next chunk
+      if not isinstance(item, dict):
+        raise ValueError("Expected a JSON array of word objects")
+      yield item
+      pos = pos_after
+    buffer = buffer[pos:]
+    if not chunk:
+      raise ValueError("Unexpected end of JSON array")
+
+def iter_ndjson(file):
+  for line in file:
+    line = line.strip()
+    if line:
+      yield json.loads(line)
+
+# CSV columns: kanji, romaji, english and optionally parts as a JSON string
+def iter_csv(file):
+  for row in csv.DictReader(file):
+    row['parts'] = json.loads(row['parts']) if row.get('parts') else []
+    yield row
+
+READERS = {
+  '.json': iter_json_array,
+  '.ndjson': iter_ndjson,
+  '.jsonl': iter_ndjson,
+  '.csv': iter_csv,
+}
+
+# Pick a reader from the file extension and stream the words out of the file
+def iter_words(path):
+  extension = os.path.splitext(path)[1].lower()
+  if extension not in READERS:
+    raise ValueError(f"Unsupported word file type '{extension}' (expected one of {', '.join(READERS)})")
+  with open(path, 'r', encoding='utf-8', newline='') as file:
+    yield from READERS[extension](file)
+
+def batched(iterable, size):
+  iterator = iter(iterable)
+  while True:
+    batch = list(islice(iterator, size))
+    if not batch:
+      return
+    yield batch
+
+# Import -----------
+
+def find_or_create_group(cursor, group_name):
+  cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
+  group = cursor.fetchone()
+  if group:
+    return group[0]
+  cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+  return cursor.lastrowid
+
+def word_row(word):
+  return (word['kanji'], word['romaji'], word['english'], json.dumps(word.get('parts', [])))
+
+# What a bulk import wrote: the words after last_word_id, the links after
+# last_link and the existing words in import_changed
+Imported = namedtuple('Imported', ['group_id', 'last_word_id', 'last_link', 'added', 'changed', 'linked'])
+
+class BulkImportError(Exception):
+  pass
+
+# Redo, for the imported rows only, what the per-row triggers would have done
+
+def add_vocabulary(cursor, imported):
+  cursor.execute('UPDATE study_stats SET total_vocabulary = total_vocabulary + ? WHERE id = 1', (imported.added,))
+
+def index_added_words(cursor, imported):
+  cursor.execute('''
+    INSERT INTO words_fts (rowid, kanji, romaji, english)
+    SELECT id, kanji, romaji, english FROM words WHERE id > ?
+  ''', (imported.last_word_id,))
+
+def reindex_changed_words(cursor, imported):
+  cursor.execute('''
+    INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english)
+    SELECT 'delete', id, kanji, romaji, english FROM import_changed
+  ''')
+  cursor.execute('''
+    INSERT INTO words_fts (rowid, kanji, romaji, english)
+    SELECT w.id, w.kanji, w.romaji, w.english FROM import_changed c JOIN words w ON w.id = c.id
+  ''')
+
+def copy_due_dates(cursor, imported):
+  cursor.execute('''
+    UPDATE word_groups SET due_at = (
+      SELECT wr.due_at FROM word_reviews wr WHERE wr.word_id = word_groups.word_id
+    ) WHERE rowid > ?
+  ''', (imported.last_link,))
+
+def bump_group_version(cursor, imported):
+  if imported.linked:
+    cursor.execute('''
+      INSERT INTO group_versions (group_id, version) VALUES (?, 1)
+      ON CONFLICT (group_id) DO UPDATE SET version = version + 1
+    ''', (imported.group_id,))
+
+def bump_changed_word_groups(cursor, imported):
+  cursor.execute('''
+    INSERT INTO group_versions (group_id, version)
+    SELECT DISTINCT group_id, 1 FROM word_groups WHERE word_id IN (SELECT id FROM import_changed)
+    ON CONFLICT (group_id) DO UPDATE SET version = version + 1
+  ''')
+
+def count_links(cursor, imported):
+  cursor.execute('UPDATE groups SET words_count = words_count + ? WHERE id = ?', (imported.linked, imported.group_id))
+
+WORD_PARTS = '''
+  INSERT INTO word_parts (word_id, position, kanji, romaji)
+  SELECT
+    w.id,
+    p.key,
+    COALESCE(p.value ->> '$.kanji', ''),
+    CASE json_type(p.value, '$.romaji')
+      WHEN 'array' THEN p.value -> '$.romaji'
+      WHEN 'text' THEN json_array(p.value ->> '$.romaji')
+      ELSE '[]'
+    END
+  FROM words w, json_each(CASE WHEN json_valid(w.parts) AND json_type(w.parts) = 'array' THEN w.parts ELSE '[]' END) p
+'''
+
+def add_word_parts(cursor, imported):
+  cursor.execute(WORD_PARTS + 'WHERE w.id > ?', (imported.last_word_id,))
+
+def replace_word_parts(cursor, imported):
+  cursor.execute('DELETE FROM word_parts WHERE word_id IN (SELECT id FROM import_changed)')
+  cursor.execute(WORD_PARTS + 'WHERE w.id IN (SELECT id FROM import_changed)')
+
+def bump_table_version(table, count):
+  def bump(cursor, imported):
+    if getattr(imported, count):
+      cursor.execute('''
+        UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = ?
+      ''', (table,))
+  return bump
+
+def log_added_words(cursor, imported):
+  cursor.execute('''
+    INSERT INTO change_log (table_name, row_key, op)
+    SELECT 'words', json_object('id', id), 'upsert' FROM words WHERE id > ? ORDER BY id
+  ''', (imported.last_word_id,))
+
+def log_changed_words(cursor, imported):
+  cursor.execute('''
+    INSERT INTO change_log (table_name, row_key, op)
+    SELECT 'words', json_object('id', id), 'upsert' FROM import_changed ORDER BY id
+  ''')
+
+def log_added_links(cursor, imported):
+  cursor.execute('''
+    INSERT INTO change_log (table_name, row_key, op)
+    SELECT 'word_groups', json_object('word_id', word_id, 'group_id', group_id), 'upsert'
+    FROM word_groups WHERE rowid > ? ORDER BY rowid
+  ''', (imported.last_link,))
+
+# The bulk import's only update to word_groups is copy_due_dates, and the
+# link insert already moved the table's version
+def nothing_to_redo(cursor, imported):
+  pass
+
+# Every trigger on words and word_groups, with what redoes its work after a
+# bulk import. Those with None stay in place: an import never deletes, and
+# only writes word_groups.due_at after inserting links. A trigger missing
+# here (added by a later migration) stops the bulk import instead of being
+# suspended with nothing to redo it.
+BULK_REBUILDERS = {
+  'study_stats_words_insert': add_vocabulary,
+  'study_stats_words_delete': None,
+  'words_fts_insert': index_added_words,
+  'words_fts_update': reindex_changed_words,
+  'words_fts_delete': None,
+  'word_groups_due_on_link': copy_due_dates,
+  'group_versions_link_insert': bump_group_version,
+  'group_versions_link_delete': None,
+  'group_versions_words_update': bump_changed_word_groups,
+  'group_versions_words_delete': None,
+  'groups_words_count_insert': count_links,
+  'groups_words_count_delete': None,
+  'word_parts_insert': add_word_parts,
+  'word_parts_update': replace_word_parts,
+  'word_parts_delete': None,
+  'table_versions_words_insert': bump_table_version('words', 'added'),
+  'table_versions_words_update': bump_table_version('words', 'changed'),
+  'table_versions_words_delete': None,
+  'table_versions_word_groups_insert': bump_table_version('word_groups', 'linked'),
+  'table_versions_word_groups_update': nothing_to_redo,
+  'table_versions_word_groups_delete': None,
+  'change_log_words_insert': log_added_words,
+  'change_log_words_update': log_changed_words,
+  'change_log_words_delete': None,
+  'change_log_word_groups_insert': log_added_links,
+  'change_log_word_groups_update': None,
+  'change_log_word_groups_delete': None,
+}
+
+BULK_TABLES = ('words', 'word_groups')
+
+# Drop the triggers BULK_REBUILDERS redoes, returning (name, sql) to
+# recreate them with. DDL is transactional in SQLite: other connections
+# never see them missing.
+def suspend_triggers(cursor):
+  cursor.execute(f'''
+    SELECT name, sql FROM sqlite_master
+    WHERE type = 'trigger' AND tbl_name IN ({', '.join('?' * len(BULK_TABLES))})
+    ORDER BY name
+  ''', BULK_TABLES)
+  triggers = cursor.fetchall()
+  unknown = [name for name, _ in triggers if name not in BULK_REBUILDERS]
+  if unknown:
+    raise BulkImportError(f"No bulk rebuilder for triggers {', '.join(unknown)}; add them to BULK_REBUILDERS or import with bulk=False")
+  suspended = [(name, sql) for name, sql in triggers if BULK_REBUILDERS[name] is not None]
+  for name, _ in suspended:
+    cursor.execute(f'DROP TRIGGER "{name}"')
+  return suspended
+
+def restore_triggers(cursor, triggers):
+  for _, sql in triggers:
+    cursor.execute(sql)
+
+def rebuild_derived(cursor, suspended, imported):
+  for name, _ in suspended:
+    BULK_REBUILDERS[name](cursor, imported)
+
+def upsert_rows(cursor, group_id, words, batch_size, progress, started):
+  rows = 0
+  linked = 0
+  for batch in batched(words, batch_size):
+    cursor.executemany(UPSERT_WORD, [word_row(word) for word in batch])
+    cursor.executemany(LINK_WORD, [(group_id, word['kanji'], word['romaji']) for word in batch])
+    linked += cursor.rowcount
+    rows += len(batch)
+    if progress:
+      progress(rows, time.perf_counter() - started)
+  return rows, linked
+
+def upsert_bulk(cursor, group_id, words, batch_size, progress, started):
+  rows = 0
+  cursor.execute(STAGE_TABLE)
+  for batch in batched(words, batch_size):
+    cursor.executemany(STAGE_WORD, [word_row(word) for word in batch])
+    rows += len(batch)
+    if progress:
+      progress(rows, time.perf_counter() - started)
+
+  suspended = suspend_triggers(cursor)
+  cursor.execute(CHANGED_WORDS)
+  cursor.execute('SELECT COALESCE(max(id), 0) FROM words')
+  last_word_id = cursor.fetchone()[0]
+  cursor.execute('SELECT COALESCE(max(rowid), 0) FROM word_groups')
+  last_link = cursor.fetchone()[0]
+
+  cursor.execute(UPSERT_STAGED_WORDS)
+  cursor.execute('SELECT COUNT(*) FROM words WHERE id > ?', (last_word_id,))
+  added = cursor.fetchone()[0]
+  cursor.execute('SELECT COUNT(*) FROM import_changed')
+  changed = cursor.fetchone()[0]
+  cursor.execute(LINK_STAGED_WORDS, (group_id,))
+  linked = cursor.rowcount
+
+  imported = Imported(group_id, last_word_id, last_link, added, changed, linked)
+  rebuild_derived(cursor, suspended, imported)
+  restore_triggers(cursor, suspended)
+  cursor.execute('DROP TABLE import_changed')
+  cursor.execute('DROP TABLE import_words')
+  return rows, linked
+
+# Load words into a group inside a single transaction: with executemany
+# batches of per-row upserts (the triggers keep the derived tables current
+# as they go), or with bulk=True through a staging table with the triggers
+# suspended and the derived tables rebuilt once at the end, which is what
+# large files want. progress(rows, seconds) is called after every batch.
+def import_words(connection, words, group_name, batch_size=5000, progress=None, bulk=False):
+  started = time.perf_counter()
+  cursor = connection.cursor()
+  try:
+    if not connection.in_transaction:
+      cursor.execute('BEGIN')
+    group_id = find_or_create_group(cursor, group_name)
+    upsert = upsert_bulk if bulk else upsert_rows
+    rows, linked = upsert(cursor, group_id, words, batch_size, progress, started)
+    connection.commit()
+  except Exception:
+    connection.rollback()
+    raise
+
+  seconds = time.perf_counter() - started
+  return {
+    'group_id': group_id,
+    'rows': rows,
+    'linked': linked,
+    'seconds': seconds,
+    'rows_per_sec': rows / seconds if seconds else rows,
+  }
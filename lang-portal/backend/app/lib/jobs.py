@@ -0,0 +1,144 @@
+import itertools
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from .rollups import rebuild_rollups
+
+# Rollups computed from study_sessions and word_review_items
+HISTORY_ROLLUPS = ('0001_study_stats.sql', '0002_study_session_stats.sql', '0003_counter_caches.sql')
+
+# A unit of background work and what it reported so far
+class Job:
+  def __init__(self, id, kind):
+    self.id = id
+    self.kind = kind
+    self.status = 'queued'  # queued, running, done or failed
+    self.progress = {}
+    self.result = None
+    self.error = None
+    self.created_at = datetime.now(timezone.utc)
+    self.finished_at = None
+    self._lock = threading.Lock()
+
+  def update(self, **progress):
+    with self._lock:
+      self.progress.update(progress)
+
+  # Set by the worker thread; read by status requests through to_dict()
+  def set_status(self, status, result=None, error=None):
+    with self._lock:
+      self.status = status
+      self.result = result
+      self.error = error
+      if status in ('done', 'failed'):
+        self.finished_at = datetime.now(timezone.utc)
+
+  @property
+  def finished(self):
+    with self._lock:
+      return self.status in ('done', 'failed')
+
+  def to_dict(self):
+    with self._lock:
+      return {
+        'id': self.id,
+        'kind': self.kind,
+        'status': self.status,
+        'progress': dict(self.progress),
+        'result': self.result,
+        'error': self.error,
+        'created_at': self.created_at.isoformat(),
+        'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+      }
+
+# Runs jobs on their own threads and keeps the last max_finished of them
+# for status lookups. At most one job of a kind runs at a time; submitting
+# another while it runs returns the running one.
+class Jobs:
+  def __init__(self, max_finished=50, log=None):
+    self.max_finished = max_finished
+    self.log = log
+    self._jobs = OrderedDict()
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+
+  # Run target(job, *args) in the background; its return value is the result
+  def submit(self, kind, target, *args):
+    with self._lock:
+      for job in self._jobs.values():
+        if job.kind == kind and not job.finished:
+          return job
+      job = Job(next(self._ids), kind)
+      self._jobs[job.id] = job
+      self._trim()
+    threading.Thread(target=self._run, args=(job, target, args), name=f'job-{kind}-{job.id}', daemon=True).start()
+    return job
+
+  def get(self, id):
+    with self._lock:
+      return self._jobs.get(id)
+
+  def _run(self, job, target, args):
+    job.set_status('running')
+    try:
+      job.set_status('done', result=target(job, *args))
+    except Exception as e:
+      job.set_status('failed', error=str(e))
+      if self.log is not None:
+        self.log("Job %s %d failed:\n%s", job.kind, job.id, traceback.format_exc())
+
+  # Forget the oldest finished jobs beyond max_finished
+  def _trim(self):
+    finished = [id for id, job in self._jobs.items() if job.finished]
+    for id in finished[:max(0, len(finished) - self.max_finished)]:
+      del self._jobs[id]
+
+# Delete the review items and study sessions that exist when the job
+# starts, batch_size ids per short transaction, so review writes can take
+# the write lock between batches. Rows written while it runs are kept,
+# except review items added to the sessions being deleted. The triggers keep
+# the rollups current on every delete; they are rebuilt at the end anyway.
+def reset_study_history(job, db, batch_size=5000, pause=0.01, on_batch=None):
+  deleted = {'word_review_items': 0, 'study_sessions': 0}
+  with db.checkout() as connection:
+    ranges = {}
+    for table in deleted:
+      low, high, count = connection.execute(f'SELECT min(id), max(id), COUNT(*) FROM {table}').fetchone()
+      ranges[table] = (low, high)
+      job.update(**{f'{table}_total': count, f'{table}_deleted': 0})
+
+    for table, (low, high) in ranges.items():
+      if low is None:
+        continue
+      for start in range(low, high + 1, batch_size):
+        cursor = connection.execute(f'DELETE FROM {table} WHERE id >= ? AND id < ?', (start, min(start + batch_size, high + 1)))
+        connection.commit()
+        deleted[table] += cursor.rowcount
+        job.update(**{f'{table}_deleted': deleted[table]})
+        if on_batch is not None:
+          on_batch(connection)
+        time.sleep(pause)
+
+    # Reviews recorded after the first pass for sessions that are gone now,
+    # batch_size at a time like the passes above
+    sessions_high = ranges['study_sessions'][1]
+    while sessions_high is not None:
+      cursor = connection.execute('''
+        DELETE FROM word_review_items WHERE id IN (
+          SELECT id FROM word_review_items WHERE study_session_id <= ? LIMIT ?
+        )
+      ''', (sessions_high, batch_size))
+      connection.commit()
+      if not cursor.rowcount:
+        break
+      deleted['word_review_items'] += cursor.rowcount
+      job.update(word_review_items_deleted=deleted['word_review_items'])
+      time.sleep(pause)
+
+    job.update(rollups='rebuilding')
+    rebuild_rollups(connection, only=HISTORY_ROLLUPS, log=lambda message: None)
+    job.update(rollups='rebuilt')
+  return {f'{table}_deleted': count for table, count in deleted.items()}
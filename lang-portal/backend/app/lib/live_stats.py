@@ -0,0 +1,118 @@
+import threading
+
+from .responses import row_dict
+
+CHANNEL = 'dashboard'
+
+# The most recent study session with activity name and results
+RECENT_SESSION = '''
+  SELECT
+    ss.id,
+    ss.group_id,
+    sa.name as activity_name,
+    ss.created_at,
+    COALESCE(st.correct_count, 0) as correct_count,
+    COALESCE(st.wrong_count, 0) as wrong_count
+  FROM study_sessions ss
+  JOIN study_activities sa ON ss.study_activity_id = sa.id
+  LEFT JOIN study_session_stats st ON st.study_session_id = ss.id
+  ORDER BY ss.created_at DESC
+  LIMIT 1
+'''
+
+# null when there are no sessions yet
+def recent_session(cursor):
+  cursor.execute(RECENT_SESSION)
+  return row_dict(cursor, cursor.fetchone())
+
+# The /dashboard/stats body. Totals are kept current by triggers (see
+# sql/migrations/0004_stats_rollups.sql), so this is two small reads.
+def study_stats(cursor):
+  cursor.execute('''
+    SELECT
+      total_vocabulary,
+      words_studied,
+      mastered_words,
+      total_reviews,
+      correct_reviews,
+      total_sessions,
+      study_days,
+      linked_days
+    FROM study_stats
+    WHERE id = 1
+  ''')
+  stats = row_dict(cursor, cursor.fetchone())
+
+  # Groups with activity in the last 30 days (at most 30 days of rows)
+  cursor.execute('''
+    SELECT COUNT(DISTINCT group_id) as active_groups
+    FROM group_study_days
+    WHERE study_date >= date('now', '-30 days')
+  ''')
+  active_groups = cursor.fetchone()[0]
+
+  return {
+    "total_vocabulary": stats["total_vocabulary"],
+    "total_words_studied": stats["words_studied"],
+    "mastered_words": stats["mastered_words"],
+    "success_rate": stats["correct_reviews"] * 1.0 / stats["total_reviews"] if stats["total_reviews"] else 0,
+    "total_sessions": stats["total_sessions"],
+    "active_groups": active_groups,
+    # Current streak: study days preceded by another study day, plus the first day
+    "current_streak": stats["linked_days"] + (1 if stats["study_days"] else 0)
+  }
+
+# Keeps the last dashboard state sent to listeners and, after each write
+# that can change it, publishes what changed: a 'stats' event with the
+# fields that moved and a 'recent-session' event with the new card. The
+# state is read once per write, not once per listener, and not at all
+# while nobody listens.
+class LiveStats:
+  def __init__(self, db, pubsub, channel=CHANNEL):
+    self.db = db
+    self.pubsub = pubsub
+    self.channel = channel
+    self._state = None  # (stats, recent session) last published
+    self._lock = threading.Lock()
+    self._stats = {'refreshes': 0, 'skipped': 0}
+
+  # Called after a commit that touched reviews or sessions, with the
+  # connection that made it (or None to borrow one)
+  def refresh(self, connection=None):
+    with self._lock:
+      if not self.pubsub.subscribers(self.channel):
+        self._state = None  # read fresh for the next listener
+        self._stats['skipped'] += 1
+        return
+      self._stats['refreshes'] += 1
+      previous = self._state
+      self._state = self._read(connection)
+    stats, session = self._state
+    if previous is None:
+      self.pubsub.publish(self.channel, 'stats', stats)
+      self.pubsub.publish(self.channel, 'recent-session', session)
+      return
+    changed = {key: value for key, value in stats.items() if previous[0].get(key) != value}
+    if changed:
+      self.pubsub.publish(self.channel, 'stats', changed)
+    if session != previous[1]:
+      self.pubsub.publish(self.channel, 'recent-session', session)
+
+  # (stats, recent session) for a new listener: the last published state
+  def current(self):
+    with self._lock:
+      if self._state is None:
+        self._state = self._read(None)
+      return self._state
+
+  def stats(self):
+    with self._lock:
+      return dict(self._stats)
+
+  def _read(self, connection):
+    if connection is not None:
+      cursor = connection.cursor()
+      return study_stats(cursor), recent_session(cursor)
+    with self.db.checkout() as connection:
+      cursor = connection.cursor()
+      return study_stats(cursor), recent_session(cursor)
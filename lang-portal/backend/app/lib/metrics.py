@@ -0,0 +1,239 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+
+# Histogram bucket upper bounds, in seconds (except the count buckets)
+REQUEST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+STATEMENT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+STATEMENT_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 500)
+FLUSH_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+FLUSH_EVENT_BUCKETS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+def statement_kind(sql):
+  words = sql.split(None, 1)
+  kind = words[0].lower() if words else ''
+  return kind if kind in ('select', 'insert', 'update', 'delete', 'with', 'pragma') else 'other'
+
+class Histogram:
+  def __init__(self, buckets):
+    self.buckets = buckets
+    self.counts = [0] * (len(buckets) + 1)  # the last one is +Inf
+    self.sum = 0.0
+    self.count = 0
+
+  def observe(self, value):
+    index = 0
+    while index < len(self.buckets) and value > self.buckets[index]:
+      index += 1
+    self.counts[index] += 1
+    self.sum += value
+    self.count += 1
+
+def format_labels(labels):
+  if not labels:
+    return ''
+  pairs = ','.join(f'{name}="{str(value)}"' for name, value in labels)
+  return '{' + pairs + '}'
+
+# In-process metrics, rendered in the Prometheus text format. Every metric is
+# keyed by a tuple of (label, value) pairs.
+class Metrics:
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._histograms = {}  # name -> (help, buckets, {labels: Histogram})
+    self._counters = {}  # name -> (help, {labels: value})
+
+  def observe(self, name, help, buckets, value, **labels):
+    key = tuple(sorted(labels.items()))
+    with self._lock:
+      series = self._histograms.setdefault(name, (help, buckets, {}))[2]
+      histogram = series.get(key)
+      if histogram is None:
+        histogram = series[key] = Histogram(buckets)
+      histogram.observe(value)
+
+  def increment(self, name, help, amount=1, **labels):
+    key = tuple(sorted(labels.items()))
+    with self._lock:
+      series = self._counters.setdefault(name, (help, {}))[1]
+      series[key] = series.get(key, 0) + amount
+
+  def observe_request(self, endpoint, method, status, seconds):
+    self.observe('http_request_duration_seconds', "Request latency by endpoint", REQUEST_BUCKETS,
+      seconds, endpoint=endpoint, method=method)
+    self.increment('http_requests_total', "Requests by endpoint and status code",
+      endpoint=endpoint, method=method, status=status)
+
+  def observe_statement(self, sql, seconds, rows):
+    kind = statement_kind(sql)
+    self.observe('sql_statement_duration_seconds', "SQL statement time, execute through last fetch",
+      STATEMENT_BUCKETS, seconds, statement=kind)
+    self.increment('sql_rows_returned_total', "Rows fetched from SQL statements", rows, statement=kind)
+
+  def observe_request_statements(self, endpoint, count):
+    self.observe('sql_statements_per_request', "SQL statements run by one request", STATEMENT_COUNT_BUCKETS,
+      count, endpoint=endpoint)
+
+  def observe_flush(self, seconds, events):
+    self.observe('review_queue_flush_duration_seconds', "Group commit time, checkout through commit",
+      FLUSH_BUCKETS, seconds)
+    self.observe('review_queue_flush_events', "Review events written by one group commit",
+      FLUSH_EVENT_BUCKETS, events)
+
+  # extra: [(name, type, help, [(labels dict, value), ...]), ...] for values
+  # read from other components at scrape time (pool, queues, caches)
+  def render(self, extra=()):
+    lines = []
+    with self._lock:
+      for name, (help, series) in sorted(self._counters.items()):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} counter')
+        for labels, value in sorted(series.items()):
+          lines.append(f'{name}{format_labels(labels)} {value}')
+
+      for name, (help, buckets, series) in sorted(self._histograms.items()):
+        lines.append(f'# HELP {name} {help}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, histogram in sorted(series.items()):
+          cumulative = 0
+          for bound, count in zip(list(buckets) + ['+Inf'], histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{format_labels(labels + (("le", bound),))} {cumulative}')
+          lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum}')
+          lines.append(f'{name}_count{format_labels(labels)} {histogram.count}')
+
+    for name, type, help, samples in extra:
+      lines.append(f'# HELP {name} {help}')
+      lines.append(f'# TYPE {name} {type}')
+      for labels, value in samples:
+        lines.append(f'{name}{format_labels(tuple(sorted(labels.items())))} {value}')
+    return '\n'.join(lines) + '\n'
+
+# Keeps the most recent statements slower than threshold_ms together with
+# their EXPLAIN QUERY PLAN, and passes each one to log
+class SlowQueryLog:
+  def __init__(self, threshold_ms, max_entries=100, log=None):
+    self.threshold_ms = threshold_ms
+    self.log = log
+    self._entries = deque(maxlen=max_entries)
+    self._lock = threading.Lock()
+
+  def capture(self, connection, sql, parameters, seconds, rows):
+    if seconds * 1000 < self.threshold_ms:
+      return
+    try:
+      # A plain cursor, so the EXPLAIN itself is not timed and reported again
+      cursor = connection.cursor(sqlite3.Cursor)
+      plan = [row[3] for row in cursor.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)]
+    except (sqlite3.Error, ValueError) as e:
+      plan = [f'unavailable: {e}']
+    entry = {
+      'sql': ' '.join(sql.split()),
+      'ms': round(seconds * 1000, 3),
+      'rows': rows,
+      'plan': plan,
+      'at': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())
+    }
+    with self._lock:
+      self._entries.append(entry)
+    if self.log:
+      self.log(entry)
+
+  def entries(self):
+    with self._lock:
+      return list(self._entries)
+
+# Cursor that times each statement from execute until its last row is
+# fetched (or the cursor moves on) and reports it to connection.observer
+class InstrumentedCursor(sqlite3.Cursor):
+  _statement = None  # [sql, parameters, seconds, rows] while results are pending
+
+  def _timed(self, method, *args):
+    started = time.perf_counter()
+    try:
+      return method(*args)
+    finally:
+      self._statement[2] += time.perf_counter() - started
+
+  def _finish(self):
+    statement, self._statement = self._statement, None
+    observer = getattr(self.connection, 'observer', None)
+    if statement is not None and observer is not None:
+      observer(self.connection, *statement)
+
+  def execute(self, sql, parameters=()):
+    self._finish()
+    self._statement = [sql, parameters, 0.0, 0]
+    return self._timed(super().execute, sql, parameters)
+
+  def executemany(self, sql, seq_of_parameters):
+    self._finish()
+    self._statement = [sql, (), 0.0, 0]
+    try:
+      return self._timed(super().executemany, sql, seq_of_parameters)
+    finally:
+      self._finish()
+
+  def fetchone(self):
+    if self._statement is None:
+      return super().fetchone()
+    row = self._timed(super().fetchone)
+    if row is None:
+      self._finish()
+    else:
+      self._statement[3] += 1
+    return row
+
+  def fetchmany(self, size=None):
+    if self._statement is None:
+      return super().fetchmany(size or self.arraysize)
+    rows = self._timed(super().fetchmany, size or self.arraysize)
+    self._statement[3] += len(rows)
+    if len(rows) < (size or self.arraysize):
+      self._finish()
+    return rows
+
+  def fetchall(self):
+    if self._statement is None:
+      return super().fetchall()
+    rows = self._timed(super().fetchall)
+    self._statement[3] += len(rows)
+    self._finish()
+    return rows
+
+  def __next__(self):
+    if self._statement is None:
+      return super().__next__()
+    try:
+      row = self._timed(super().__next__)
+    except StopIteration:
+      self._finish()
+      raise
+    self._statement[3] += 1
+    return row
+
+  def close(self):
+    self._finish()
+    super().close()
+
+  def __del__(self):
+    try:
+      self._finish()
+    except Exception:
+      pass
+
+# Connection whose cursors (including connection.execute) are instrumented.
+# observer(connection, sql, parameters, seconds, rows) is set by the pool.
+class InstrumentedConnection(sqlite3.Connection):
+  observer = None
+
+  def cursor(self, factory=InstrumentedCursor):
+    return super().cursor(factory)
+
+  # The built-in shortcuts create plain cursors, bypassing cursor()
+  def execute(self, sql, parameters=()):
+    return self.cursor().execute(sql, parameters)
+
+  def executemany(self, sql, seq_of_parameters):
+    return self.cursor().executemany(sql, seq_of_parameters)
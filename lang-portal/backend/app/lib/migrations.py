@@ -0,0 +1,281 @@
+import hashlib
+import importlib.util
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'migrations')
+
+# Migrations are named NNNN_description.sql (schema changes, run in one
+# transaction) or NNNN_description.py (online data migrations, see
+# OnlineMigration). The number is the schema version.
+MIGRATION_NAME = re.compile(r'^(\d+)_.+\.(sql|py)$')
+
+Migration = namedtuple('Migration', ['version', 'filename', 'path', 'kind', 'checksum'])
+
+class MigrationError(Exception):
+  pass
+
+def migration_files(migrations_dir=MIGRATIONS_DIR):
+  migrations = []
+  for filename in os.listdir(migrations_dir):
+    match = MIGRATION_NAME.match(filename)
+    if match:
+      path = os.path.join(migrations_dir, filename)
+      with open(path, 'rb') as f:
+        checksum = hashlib.sha256(f.read()).hexdigest()
+      migrations.append(Migration(int(match.group(1)), filename, path, match.group(2), checksum))
+  migrations.sort()
+
+  for previous, migration in zip(migrations, migrations[1:]):
+    if previous.version == migration.version:
+      raise MigrationError(f"Two migrations share version {migration.version}: {previous.filename}, {migration.filename}")
+  return migrations
+
+# Split a script into single statements. complete_statement knows about
+# strings, comments and trigger bodies, so only real statement ends split.
+def split_statements(script):
+  statements = []
+  current = ''
+  for piece in script.split(';'):
+    current += piece + ';'
+    if sqlite3.complete_statement(current):
+      if current.strip() != ';':
+        statements.append(current.strip())
+      current = ''
+  return statements
+
+def ensure_migrations_table(connection):
+  connection.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version INTEGER PRIMARY KEY,
+      filename TEXT NOT NULL,
+      checksum TEXT NOT NULL,
+      applied_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+      execution_ms INTEGER  -- NULL for migrations recorded by the baseline
+    )
+  ''')
+  # Where an interrupted online migration resumes
+  connection.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migration_progress (
+      version INTEGER PRIMARY KEY,
+      step INTEGER NOT NULL,
+      last_id INTEGER NOT NULL DEFAULT 0
+    )
+  ''')
+  connection.commit()
+
+def applied_migrations(connection):
+  rows = connection.execute('SELECT version, filename, checksum FROM schema_migrations ORDER BY version').fetchall()
+  return {row[0]: (row[1], row[2]) for row in rows}
+
+# Databases migrated before schema_migrations existed only have PRAGMA
+# user_version; record everything from 1 up to it as applied. Version 0
+# repairs data from before the first migration and always runs.
+def baseline(connection, migrations, log=print):
+  if connection.execute('SELECT 1 FROM schema_migrations LIMIT 1').fetchone():
+    return 0
+  current_version = connection.execute('PRAGMA user_version').fetchone()[0]
+  existing = baselined(migrations, current_version)
+  if existing:
+    connection.executemany(
+      'INSERT INTO schema_migrations (version, filename, checksum) VALUES (?, ?, ?)',
+      [(migration.version, migration.filename, migration.checksum) for migration in existing]
+    )
+    connection.commit()
+    log(f"Baselined {len(existing)} migrations from user_version {current_version}")
+  return len(existing)
+
+def baselined(migrations, current_version):
+  return [migration for migration in migrations if 0 < migration.version <= current_version]
+
+# The migrations recorded as applied, or on a database without any, those
+# baseline() would record, without writing anything
+def recorded_migrations(connection, migrations):
+  exists = connection.execute(
+    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'schema_migrations'"
+  ).fetchone()
+  applied = applied_migrations(connection) if exists else {}
+  if not applied:
+    current_version = connection.execute('PRAGMA user_version').fetchone()[0]
+    applied = {migration.version: (migration.filename, migration.checksum)
+      for migration in baselined(migrations, current_version)}
+  return applied
+
+# Every migration file with its state: applied, pending or changed (applied,
+# but the file no longer matches its checksum), plus applied versions whose
+# file is missing
+def migration_status(connection, migrations_dir=MIGRATIONS_DIR):
+  migrations = migration_files(migrations_dir)
+  applied = recorded_migrations(connection, migrations)
+
+  status = []
+  for migration in migrations:
+    if migration.version not in applied:
+      state = 'pending'
+    elif applied[migration.version][1] != migration.checksum:
+      state = 'changed'
+    else:
+      state = 'applied'
+    status.append({'version': migration.version, 'filename': migration.filename, 'state': state})
+  known = {migration.version for migration in migrations}
+  for version, (filename, _) in applied.items():
+    if version not in known:
+      status.append({'version': version, 'filename': filename, 'state': 'missing'})
+  return sorted(status, key=lambda entry: entry['version'])
+
+def record_migration(connection, migration, started):
+  connection.execute(
+    'INSERT INTO schema_migrations (version, filename, checksum, execution_ms) VALUES (?, ?, ?, ?)',
+    (migration.version, migration.filename, migration.checksum, round((time.perf_counter() - started) * 1000))
+  )
+  connection.execute('DELETE FROM schema_migration_progress WHERE version = ?', (migration.version,))
+  # Kept in step for tools that only look at the header (a version 0
+  # migration applied late does not move it back)
+  current_version = connection.execute('PRAGMA user_version').fetchone()[0]
+  connection.execute(f'PRAGMA user_version = {max(migration.version, current_version)}')
+
+def run_sql_migration(connection, migration):
+  started = time.perf_counter()
+  with open(migration.path) as f:
+    statements = split_statements(f.read())
+  try:
+    connection.execute('BEGIN IMMEDIATE')
+    # Another process may have applied it while we waited for the lock
+    if connection.execute('SELECT 1 FROM schema_migrations WHERE version = ?', (migration.version,)).fetchone():
+      connection.rollback()
+      return False
+    for statement in statements:
+      connection.execute(statement)
+    record_migration(connection, migration, started)
+    connection.commit()
+  except Exception as e:
+    connection.rollback()
+    raise MigrationError(f"{migration.filename} failed, nothing was applied: {e}") from e
+  return True
+
+# Context handed to the migrate(migration) function of a .py migration. Each
+# execute() and backfill() call is a step; finished steps (and finished
+# backfill batches) are recorded, so an interrupted migration resumes where
+# it stopped instead of starting over.
+class OnlineMigration:
+  def __init__(self, connection, migration, batch_size=10000, pause=0.0, log=print):
+    self.connection = connection
+    self.migration = migration
+    self.batch_size = batch_size
+    self.pause = pause
+    self.log = log
+    self._step = 0
+    row = connection.execute('SELECT step, last_id FROM schema_migration_progress WHERE version = ?', (migration.version,)).fetchone()
+    self._resume_step, self._resume_id = (row[0], row[1]) if row else (0, 0)
+
+  def _save_progress(self, step, last_id):
+    self.connection.execute('''
+      INSERT INTO schema_migration_progress (version, step, last_id) VALUES (?, ?, ?)
+      ON CONFLICT (version) DO UPDATE SET step = excluded.step, last_id = excluded.last_id
+    ''', (self.migration.version, step, last_id))
+
+  # Run one statement (e.g. ALTER TABLE ... ADD COLUMN) in its own short transaction
+  def execute(self, sql, parameters=()):
+    step, self._step = self._step, self._step + 1
+    if step < self._resume_step:
+      return
+    try:
+      self.connection.execute('BEGIN IMMEDIATE')
+      self.connection.execute(sql, parameters)
+      self._save_progress(step + 1, 0)
+      self.connection.commit()
+    except Exception:
+      self.connection.rollback()
+      raise
+
+  # UPDATE table SET <assignments> in rowid ranges of batch_size rows, one
+  # transaction per batch, so the write lock is only held for one batch at a
+  # time. Rows inserted after the backfill starts are not visited; the code
+  # writing them has to fill the new column itself.
+  def backfill(self, table, assignments, where=None, batch_size=None):
+    step, self._step = self._step, self._step + 1
+    if step < self._resume_step:
+      return
+    batch_size = batch_size or self.batch_size
+    last_id = self._resume_id if step == self._resume_step else 0
+    max_id = self.connection.execute(f'SELECT MAX(rowid) FROM {table}').fetchone()[0] or 0
+    condition = f'AND ({where})' if where else ''
+
+    started = time.perf_counter()
+    while last_id < max_id:
+      upper = min(last_id + batch_size, max_id)
+      try:
+        self.connection.execute('BEGIN IMMEDIATE')
+        self.connection.execute(
+          f'UPDATE {table} SET {assignments} WHERE rowid > ? AND rowid <= ? {condition}',
+          (last_id, upper)
+        )
+        self._save_progress(step, upper)
+        self.connection.commit()
+      except Exception:
+        self.connection.rollback()
+        raise
+      last_id = upper
+      seconds = time.perf_counter() - started
+      self.log(f"  {table}: {last_id:,}/{max_id:,} rows ({seconds:.1f}s)")
+      if self.pause:
+        time.sleep(self.pause)
+
+    self.connection.execute('BEGIN IMMEDIATE')
+    self._save_progress(step + 1, 0)
+    self.connection.commit()
+
+def run_python_migration(connection, migration, batch_size=10000, pause=0.0, log=print):
+  started = time.perf_counter()
+  spec = importlib.util.spec_from_file_location(f'migration_{migration.version}', migration.path)
+  module = importlib.util.module_from_spec(spec)
+  spec.loader.exec_module(module)
+
+  try:
+    module.migrate(OnlineMigration(connection, migration, batch_size=batch_size, pause=pause, log=log))
+  except Exception as e:
+    if connection.in_transaction:
+      connection.rollback()
+    raise MigrationError(f"{migration.filename} stopped, rerun to resume it: {e}") from e
+
+  connection.execute('BEGIN IMMEDIATE')
+  record_migration(connection, migration, started)
+  connection.commit()
+  return True
+
+# Apply every pending migration in version order. Applied migrations whose
+# file changed are an error. With dry_run, only report what would run; the
+# database is not written to.
+def apply_migrations(connection, migrations_dir=MIGRATIONS_DIR, dry_run=False, batch_size=10000, pause=0.0, log=print):
+  migrations = migration_files(migrations_dir)
+  if dry_run:
+    applied = recorded_migrations(connection, migrations)
+  else:
+    ensure_migrations_table(connection)
+    baseline(connection, migrations, log=log)
+    applied = applied_migrations(connection)
+
+  changed = [migration.filename for migration in migrations
+    if migration.version in applied and applied[migration.version][1] != migration.checksum]
+  if changed:
+    raise MigrationError(f"Applied migrations were modified: {', '.join(changed)}")
+
+  pending = [migration for migration in migrations if migration.version not in applied]
+  if dry_run:
+    for migration in pending:
+      log(f"Would run migration: {migration.filename}")
+    return [migration.filename for migration in pending]
+
+  ran = []
+  for migration in pending:
+    log(f"Running migration: {migration.filename}")
+    if migration.kind == 'sql':
+      done = run_sql_migration(connection, migration)
+    else:
+      done = run_python_migration(connection, migration, batch_size=batch_size, pause=pause, log=log)
+    if done:
+      ran.append(migration.filename)
+  return ran
@@ -0,0 +1,33 @@
+import base64
+import json
+
+# Keyset pagination cursors are the (sort value, id) of the last row on the
+# previous page, serialized to an opaque url-safe token.
+def encode_cursor(values):
+  raw = json.dumps(values, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+  return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(token):
+  try:
+    padded = token + '=' * (-len(token) % 4)
+    values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+  except (ValueError, UnicodeError):
+    raise ValueError("Invalid cursor")
+  if not isinstance(values, list) or len(values) != 2 or not isinstance(values[1], int):
+    raise ValueError("Invalid cursor")
+  return values
+
+# Build the row-value comparison that resumes a page after the cursor position
+def keyset_condition(sort_expr, id_expr, order, after):
+  if not after:
+    return '1', []
+  comparison = '>' if order == 'asc' else '<'
+  return f'({sort_expr}, {id_expr}) {comparison} (?, ?)', list(after)
+
+# Pages are fetched with LIMIT per_page + 1; the extra row only tells us
+# whether another page exists.
+def split_page(rows, per_page, sort_key):
+  if len(rows) <= per_page:
+    return rows, None
+  rows = rows[:per_page]
+  return rows, encode_cursor([rows[-1][sort_key], rows[-1]['id']])
@@ -0,0 +1,108 @@
+import sqlite3
+import threading
+
+# Pragmas applied to every new connection. journal_mode=WAL lets readers run
+# alongside the single writer, busy_timeout makes writers wait for the lock
+# instead of failing with "database is locked".
+DEFAULT_PRAGMAS = {
+  'journal_mode': 'WAL',
+  'synchronous': 'NORMAL',
+  'busy_timeout': 5000,
+  'cache_size': -16000,  # negative values are KiB, so ~16MB of page cache
+  'mmap_size': 268435456,  # 256MB
+  'temp_store': 'MEMORY',
+}
+
+class ConnectionPool:
+  def __init__(self, database, pragmas=None, max_idle=8, factory=sqlite3.Connection, uri=False):
+    self.database = database
+    self.uri = uri  # database is a file: URI (e.g. ?mode=ro)
+    self.factory = factory
+    self.pragmas = dict(DEFAULT_PRAGMAS)
+    if pragmas:
+      self.pragmas.update(pragmas)
+    self.max_idle = max_idle
+    # Optional sqlite3 trace callback installed on every handed out connection
+    self.trace_callback = None
+    # Statement observer for instrumented connections (see lib/metrics.py)
+    self.statement_observer = None
+    self._idle = []
+    self._lock = threading.Lock()
+    self._in_use = 0
+    self._stats = {
+      'created': 0,
+      'reused': 0,
+      'released': 0,
+      'discarded': 0,
+      'peak_in_use': 0,
+    }
+
+  def _connect(self):
+    # Connections are handed from thread to thread through the pool, but only
+    # one thread ever holds a connection at a time.
+    connection = sqlite3.connect(self.database, check_same_thread=False, factory=self.factory, uri=self.uri)
+    connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+    for name, value in self.pragmas.items():
+      if value is not None:
+        connection.execute(f'PRAGMA {name} = {value}')
+    return connection
+
+  def acquire(self):
+    with self._lock:
+      connection = self._idle.pop() if self._idle else None
+      self._in_use += 1
+      self._stats['peak_in_use'] = max(self._stats['peak_in_use'], self._in_use)
+      if connection is not None:
+        self._stats['reused'] += 1
+
+    if connection is None:
+      try:
+        connection = self._connect()
+      except Exception:
+        with self._lock:
+          self._in_use -= 1
+        raise
+      with self._lock:
+        self._stats['created'] += 1
+    connection.set_trace_callback(self.trace_callback)
+    if self.factory is not sqlite3.Connection:
+      connection.observer = self.statement_observer
+    return connection
+
+  def release(self, connection):
+    # Never hand out a connection with someone else's half-finished transaction
+    try:
+      if connection.in_transaction:
+        connection.rollback()
+    except sqlite3.Error:
+      with self._lock:
+        self._in_use -= 1
+        self._stats['discarded'] += 1
+      connection.close()
+      return
+
+    with self._lock:
+      self._in_use -= 1
+      self._stats['released'] += 1
+      if len(self._idle) < self.max_idle:
+        self._idle.append(connection)
+        return
+      self._stats['discarded'] += 1
+    connection.close()
+
+  def close_all(self):
+    with self._lock:
+      idle, self._idle = self._idle, []
+    for connection in idle:
+      connection.close()
+
+  def stats(self):
+    with self._lock:
+      return dict(
+        self._stats,
+        idle=len(self._idle),
+        in_use=self._in_use,
+        max_idle=self.max_idle,
+        database=self.database,
+        pragmas=dict(self.pragmas),
+      )
@@ -0,0 +1,102 @@
+import threading
+from collections import deque
+
+# One listener on a channel. Events wait in a bounded buffer; a listener
+# that falls max_queued events behind loses them and is marked lagged, so
+# it can start over from the current state instead of replaying.
+class Subscription:
+  def __init__(self, pubsub, channel, max_queued=100):
+    self.pubsub = pubsub
+    self.channel = channel
+    self.max_queued = max_queued
+    self.lagged = False
+    self._events = deque()
+    self._condition = threading.Condition()
+    self._closed = False
+
+  def put(self, event, data):
+    with self._condition:
+      if len(self._events) >= self.max_queued:
+        self._events.clear()
+        self.lagged = True
+        self.pubsub._dropped(self.max_queued)
+      self._events.append((event, data))
+      self._condition.notify()
+
+  # The (event, data) pairs published since the last call, waiting up to
+  # timeout seconds for one; [] on timeout or once closed
+  def get(self, timeout=None):
+    with self._condition:
+      if not self._events and not self._closed:
+        self._condition.wait(timeout)
+      events = list(self._events)
+      self._events.clear()
+      return events
+
+  # Whether events were dropped since the last call
+  def take_lagged(self):
+    with self._condition:
+      lagged, self.lagged = self.lagged, False
+      return lagged
+
+  def close(self):
+    with self._condition:
+      self._closed = True
+      self._condition.notify_all()
+    self.pubsub.unsubscribe(self)
+
+  @property
+  def closed(self):
+    return self._closed
+
+# In-process publish/subscribe between the threads of one server process
+# (request handlers, the review queue flusher). Publishing never blocks on
+# a slow listener.
+class PubSub:
+  def __init__(self, max_queued=100):
+    self.max_queued = max_queued
+    self._channels = {}
+    self._lock = threading.Lock()
+    self._stats = {'published': 0, 'delivered': 0, 'dropped': 0}
+
+  def subscribe(self, channel):
+    subscription = Subscription(self, channel, max_queued=self.max_queued)
+    with self._lock:
+      self._channels.setdefault(channel, set()).add(subscription)
+    return subscription
+
+  def unsubscribe(self, subscription):
+    with self._lock:
+      listeners = self._channels.get(subscription.channel)
+      if listeners is not None:
+        listeners.discard(subscription)
+        if not listeners:
+          del self._channels[subscription.channel]
+
+  def subscribers(self, channel):
+    with self._lock:
+      return len(self._channels.get(channel, ()))
+
+  def publish(self, channel, event, data):
+    with self._lock:
+      listeners = list(self._channels.get(channel, ()))
+      self._stats['published'] += 1
+      self._stats['delivered'] += len(listeners)
+    for subscription in listeners:
+      subscription.put(event, data)
+    return len(listeners)
+
+  # Close every subscription (shutdown)
+  def close(self):
+    with self._lock:
+      listeners = [subscription for channel in self._channels.values() for subscription in channel]
+    for subscription in listeners:
+      subscription.close()
+
+  def stats(self):
+    with self._lock:
+      return dict(self._stats, subscribers=sum(len(listeners) for listeners in self._channels.values()))
+
+  def _dropped(self, count):
+    with self._lock:
+      self._stats['dropped'] += count
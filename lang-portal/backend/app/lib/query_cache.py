@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+# LRU of route results tagged with the tables they were read from. Each entry
+# keeps the change counters (table_versions) its tables had when it was
+# built; once any of them moves, every entry tagged with that table is
+# dropped, whichever connection the write went through.
+class QueryCache:
+  def __init__(self, versions, max_entries=256):
+    self.versions = versions
+    self.max_entries = max_entries
+    self._entries = OrderedDict()
+    self._tags = {}
+    self._seen = {}
+    self._lock = threading.Lock()
+    self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+  # (value, stamp): value is None on a miss, and stamp, the versions to
+  # store a fresh value with, is None when there are no counters to check
+  def get(self, key, tables):
+    versions = self.versions.current()
+    if versions is None or any(table not in versions for table in tables):
+      return None, None
+    stamp = (versions['_database'][0],) + tuple(versions[table][0] for table in tables)
+    with self._lock:
+      self._invalidate_changed(versions)
+      entry = self._entries.get(key)
+      if entry is None or entry[1] != stamp:
+        self._stats['misses'] += 1
+        return None, stamp
+      self._entries.move_to_end(key)
+      self._stats['hits'] += 1
+      return entry[2], stamp
+
+  def put(self, key, tables, stamp, value):
+    with self._lock:
+      self._remove(key)
+      self._entries[key] = (tables, stamp, value)
+      for table in tables:
+        self._tags.setdefault(table, set()).add(key)
+      while len(self._entries) > self.max_entries:
+        self._remove(next(iter(self._entries)))
+        self._stats['evictions'] += 1
+
+  # Drop every entry read from any of tables
+  def invalidate(self, tables):
+    with self._lock:
+      self._drop_tags(tables)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self._tags.clear()
+
+  def stats(self):
+    with self._lock:
+      return dict(self._stats, entries=len(self._entries), max_entries=self.max_entries)
+
+  # Tables whose counters moved since the last lookup lose their entries
+  def _invalidate_changed(self, versions):
+    if versions is self._seen:
+      return
+    if versions.get('_database') != self._seen.get('_database'):
+      changed = list(self._tags)
+    else:
+      changed = [table for table in self._tags if versions.get(table) != self._seen.get(table)]
+    self._drop_tags(changed)
+    self._seen = versions
+
+  def _drop_tags(self, tables):
+    for table in tables:
+      for key in list(self._tags.get(table, ())):
+        self._remove(key)
+        self._stats['invalidations'] += 1
+
+  def _remove(self, key):
+    entry = self._entries.pop(key, None)
+    if entry is None:
+      return
+    for table in entry[0]:
+      keys = self._tags.get(table)
+      if keys is not None:
+        keys.discard(key)
+        if not keys:
+          del self._tags[table]
@@ -0,0 +1,92 @@
+import re
+
+# Extra query strings to probe per endpoint, on top of the bare url
+PROBE_QUERIES = {
+  'get_words': ['sort_by=romaji&order=desc', 'cursor=', 'page=2'],
+  'search_words': ['q=pay', 'q=ta', 'q=pay&group_id=1', 'q=i&group_id=1'],
+  'get_groups': ['sort_by=words_count&order=desc'],
+  'get_group_words': ['sort_by=english', 'cursor='],
+  'get_group_study_sessions': ['sort_by=endTime'],
+  'get_group_due_words': ['limit=5'],
+  'export_words': ['since=1'],
+  'export_study_sessions': ['since=2025-01-01T00:00:00'],
+  'export_word_review_items': ['since=2025-01-01T00:00:00'],
+  'get_sync': ['since=1', 'limit=1'],
+}
+
+# Full scans that are expected, keyed by (endpoint, table) with the reason.
+# Anything not listed here fails the check.
+KNOWN_SCANS = {
+  ('get_study_activities', 'study_activities'): "lists every activity",
+  ('get_study_activity_launch_data', 'groups'): "lists every group",
+}
+
+# GET routes that are not probed, with the reason
+SKIPPED_ENDPOINTS = {
+  'get_dashboard_stream': "an event stream that never ends; its queries are the dashboard routes'",
+}
+
+SCAN = re.compile(r'^SCAN (\w+)$')
+TABLE_REFERENCE = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+
+# Build request urls for every GET route, filling url arguments with id 1
+def probe_urls(app):
+  urls = []
+  for rule in app.url_map.iter_rules():
+    if 'GET' not in rule.methods or rule.endpoint == 'static' or rule.endpoint in SKIPPED_ENDPOINTS:
+      continue
+    url = rule.rule
+    for argument in rule.arguments:
+      url = re.sub(rf'<(?:\w+:)?{argument}>', '1', url)
+    urls.append((rule.endpoint, url))
+    for query in PROBE_QUERIES.get(rule.endpoint, []):
+      urls.append((rule.endpoint, f'{url}?{query}'))
+  return urls
+
+# Map aliases (and table names) used in a statement to the real table name
+def table_aliases(sql, tables):
+  aliases = {}
+  for table, alias in TABLE_REFERENCE.findall(sql):
+    if table in tables:
+      aliases[table] = table
+      if alias and alias.upper() not in ('ON', 'WHERE', 'JOIN', 'LEFT', 'INNER', 'GROUP', 'ORDER', 'LIMIT'):
+        aliases[alias] = table
+  return aliases
+
+def full_scans(connection, sql):
+  tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+  aliases = table_aliases(sql, tables)
+  scans = []
+  for row in connection.execute('EXPLAIN QUERY PLAN ' + sql):
+    match = SCAN.match(row[3])
+    if match and match.group(1) in aliases:
+      scans.append(aliases[match.group(1)])
+  return scans
+
+# Hit every GET route through the test client, then EXPLAIN QUERY PLAN each
+# SELECT it ran. Returns the statements that fall back to a full table scan.
+def check_query_plans(app):
+  statements = []
+  client = app.test_client()
+  with app.db.trace_statements() as traced:
+    for endpoint, url in probe_urls(app):
+      traced.clear()
+      response = client.get(url)
+      response.get_data()  # run streamed responses to the end
+      if response.status_code >= 500:
+        raise RuntimeError(f"{url} failed with {response.status_code}: {response.get_data(as_text=True)}")
+      for sql in traced:
+        if sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+          statements.append((endpoint, url, sql))
+
+  problems = []
+  seen = set()
+  with app.db.checkout() as connection:
+    for endpoint, url, sql in statements:
+      if (endpoint, sql) in seen:
+        continue
+      seen.add((endpoint, sql))
+      for table in full_scans(connection, sql):
+        if (endpoint, table) not in KNOWN_SCANS:
+          problems.append({'endpoint': endpoint, 'url': url, 'table': table, 'sql': ' '.join(sql.split())})
+  return problems
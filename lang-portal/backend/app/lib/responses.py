@@ -0,0 +1,63 @@
+import json
+from flask import Response
+
+from .compression import compress, negotiate_encoding
+
+# orjson is optional; it encodes several times faster than the json module
+try:
+  import orjson
+except ImportError:
+  orjson = None
+
+# Bodies smaller than this go out uncompressed
+COMPRESS_MIN_SIZE = 1024
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/plain', 'text/html')
+
+def dumps(data):
+  if orjson is not None:
+    return orjson.dumps(data)
+  return json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+# Rows as dicts keyed by the cursor's column names, ready for dumps().
+# Queries alias their columns to the response field names.
+def row_dicts(cursor, rows=None):
+  names = [column[0] for column in cursor.description]
+  if rows is None:
+    rows = cursor.fetchall()
+  return [dict(zip(names, row)) for row in rows]
+
+def row_dict(cursor, row):
+  if row is None:
+    return None
+  return dict(zip([column[0] for column in cursor.description], row))
+
+# Drop-in for flask.jsonify
+def json_response(data, status=200):
+  return Response(dumps(data), status=status, mimetype='application/json')
+
+# Compress a finished response with the best coding the client accepts, once
+# the body is at least min_size bytes. Streamed responses and responses that
+# already chose a coding are left alone.
+def compress_response(response, accept_encodings, min_size=COMPRESS_MIN_SIZE, level=6):
+  if (response.direct_passthrough or response.is_streamed
+      or response.status_code < 200 or response.status_code in (204, 304)
+      or 'Content-Encoding' in response.headers
+      or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+    return response
+
+  body = response.get_data()
+  if len(body) < min_size:
+    return response
+  response.vary.add('Accept-Encoding')
+  encoding = negotiate_encoding(accept_encodings)
+  if encoding == 'identity':
+    return response
+
+  response.set_data(compress(body, encoding, level))
+  response.headers['Content-Encoding'] = encoding
+  # The compressed bytes differ, so a strong validator no longer holds
+  etag, weak = response.get_etag()
+  if etag and not weak:
+    response.set_etag(etag, weak=True)
+  return response
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import deque
+
+from .reviews import record_reviews, word_counters
+
+class QueueFull(Exception):
+  pass
+
+# One submitted batch of reviews; the submitter can wait for it to be committed
+class ReviewTicket:
+  def __init__(self, session_id, reviews):
+    self.session_id = session_id
+    self.reviews = reviews
+    self.enqueued_at = time.monotonic()
+    self.words = None
+    self.error = None
+    self._done = threading.Event()
+
+  def resolve(self, words=None, error=None):
+    self.words = words
+    self.error = error
+    self._done.set()
+
+  # Block until the batch is committed and return the updated word counters
+  def wait(self, timeout=None):
+    if not self._done.wait(timeout):
+      raise TimeoutError("Reviews are queued but not written yet")
+    if self.error is not None:
+      raise self.error
+    return self.words
+
+# Write-behind queue for review events. A background thread drains it and
+# writes everything pending in one transaction (group commit) once max_batch
+# events are waiting or the oldest event is max_latency seconds old.
+# on_flush(connection) runs after each commit (live dashboard updates) and
+# observe_flush(seconds, events) records its latency and size (metrics).
+class ReviewQueue:
+  def __init__(self, db, max_batch=500, max_latency=0.02, max_depth=20000, submit_timeout=2.0, on_flush=None, observe_flush=None):
+    self.db = db
+    self.on_flush = on_flush
+    self.observe_flush = observe_flush
+    self.max_batch = max_batch
+    self.max_latency = max_latency
+    self.max_depth = max_depth
+    self.submit_timeout = submit_timeout
+    self._pending = deque()
+    self._depth = 0  # review events waiting, not tickets
+    self._condition = threading.Condition()
+    self._thread = None
+    self._closed = False
+    self._stats = {
+      'submitted': 0,
+      'rejected': 0,
+      'flushes': 0,
+      'flushed_events': 0,
+      'failed_events': 0,
+      'last_flush_ms': 0.0,
+      'max_flush_ms': 0.0,
+      'total_flush_ms': 0.0,
+      'last_batch_size': 0,
+    }
+
+  def submit(self, session_id, reviews):
+    ticket = ReviewTicket(session_id, reviews)
+    deadline = time.monotonic() + self.submit_timeout
+    with self._condition:
+      if self._closed:
+        raise RuntimeError("Review queue is shut down")
+      # Backpressure: wait for the flusher to make room, then give up
+      while self._depth and self._depth + len(reviews) > self.max_depth:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+          self._stats['rejected'] += 1
+          raise QueueFull("Review queue is full")
+        self._condition.wait(remaining)
+      self._pending.append(ticket)
+      self._depth += len(reviews)
+      self._stats['submitted'] += len(reviews)
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._run, name='review-queue', daemon=True)
+        self._thread.start()
+      self._condition.notify_all()
+    return ticket
+
+  def _take_batch(self):
+    batch = []
+    events = 0
+    while self._pending and (not batch or events + len(self._pending[0].reviews) <= self.max_batch):
+      ticket = self._pending.popleft()
+      batch.append(ticket)
+      events += len(ticket.reviews)
+    self._depth -= events
+    self._condition.notify_all()  # wake submitters blocked on a full queue
+    return batch
+
+  def _run(self):
+    while True:
+      with self._condition:
+        while not self._pending and not self._closed:
+          self._condition.wait()
+        if not self._pending:
+          return
+        # Give concurrent submitters a moment to join this commit
+        while self._depth < self.max_batch and not self._closed:
+          remaining = self._pending[0].enqueued_at + self.max_latency - time.monotonic()
+          if remaining <= 0:
+            break
+          self._condition.wait(remaining)
+        batch = self._take_batch()
+      try:
+        self._flush(batch)
+      except Exception as e:
+        for ticket in batch:
+          ticket.resolve(error=e)
+
+  def _flush(self, tickets):
+    started = time.perf_counter()
+    with self.db.checkout() as connection:
+      cursor = connection.cursor()
+      try:
+        word_ids = [record_reviews(cursor, ticket.session_id, ticket.reviews) for ticket in tickets]
+        connection.commit()
+      except Exception:
+        connection.rollback()
+        # Retry one ticket per transaction so a bad batch only fails itself
+        word_ids = []
+        for ticket in tickets:
+          try:
+            word_ids.append(record_reviews(cursor, ticket.session_id, ticket.reviews))
+            connection.commit()
+          except Exception as e:
+            connection.rollback()
+            word_ids.append(e)
+
+      elapsed_ms = (time.perf_counter() - started) * 1000
+      outcomes = []
+      for result in word_ids:
+        if isinstance(result, Exception):
+          outcomes.append((None, result))
+          continue
+        try:
+          outcomes.append((word_counters(cursor, result), None))
+        except Exception as e:
+          outcomes.append((None, e))
+
+      if self.on_flush is not None and any(error is None for _, error in outcomes):
+        try:
+          self.on_flush(connection)
+        except Exception:
+          pass  # listeners catch up on the next flush
+
+    events = sum(len(ticket.reviews) for ticket in tickets)
+    failed = sum(len(ticket.reviews) for ticket, (_, error) in zip(tickets, outcomes) if error is not None)
+    with self._condition:
+      self._stats['flushes'] += 1
+      self._stats['flushed_events'] += events - failed
+      self._stats['failed_events'] += failed
+      self._stats['last_flush_ms'] = elapsed_ms
+      self._stats['max_flush_ms'] = max(self._stats['max_flush_ms'], elapsed_ms)
+      self._stats['total_flush_ms'] += elapsed_ms
+      self._stats['last_batch_size'] = events
+    if self.observe_flush is not None:
+      try:
+        self.observe_flush(elapsed_ms / 1000, events)
+      except Exception:
+        pass  # metrics never fail a commit
+
+    for ticket, (words, error) in zip(tickets, outcomes):
+      ticket.resolve(words=words, error=error)
+
+  # Flush-on-shutdown: stop accepting events and drain what is pending
+  def close(self, timeout=10):
+    with self._condition:
+      self._closed = True
+      thread = self._thread
+      self._condition.notify_all()
+    if thread is not None:
+      thread.join(timeout)
+
+  def stats(self):
+    with self._condition:
+      stats = dict(self._stats, depth=self._depth, max_depth=self.max_depth)
+    stats['avg_flush_ms'] = stats['total_flush_ms'] / stats['flushes'] if stats['flushes'] else 0.0
+    return stats
@@ -0,0 +1,169 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from .scheduler import NEW_STATE, schedule
+
+# SQLite's CURRENT_TIMESTAMP format (UTC)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Review timestamps are accepted from the unix epoch up to this far past the
+# server's clock
+EARLIEST_REVIEW = datetime(1970, 1, 1)
+MAX_CLOCK_SKEW = timedelta(minutes=10)
+
+# Keep IN (...) lists well below SQLite's variable limit
+CHUNK_SIZE = 500
+
+INSERT_REVIEW_ITEM = '''
+  INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)
+'''
+
+UPSERT_WORD_REVIEW = '''
+  INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed, ease, interval_days, repetitions, due_at)
+  VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+  ON CONFLICT (word_id) DO UPDATE SET
+    correct_count = correct_count + excluded.correct_count,
+    wrong_count = wrong_count + excluded.wrong_count,
+    last_reviewed = MAX(COALESCE(last_reviewed, ''), excluded.last_reviewed),
+    ease = excluded.ease,
+    interval_days = excluded.interval_days,
+    repetitions = excluded.repetitions,
+    due_at = excluded.due_at
+'''
+
+class TimestampOutOfRange(ValueError):
+  pass
+
+# TIMESTAMP_FORMAT, with the year zero-padded (strftime drops the padding
+# for years before 1000, which strptime then rejects)
+def format_timestamp(value):
+  return value.replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
+
+def normalize_timestamp(value):
+  if value is None:
+    return format_timestamp(datetime.now(timezone.utc))
+  if isinstance(value, bool):
+    raise ValueError("timestamp must be an ISO 8601 string or a unix timestamp")
+  if isinstance(value, (int, float)):
+    try:
+      return format_timestamp(datetime.fromtimestamp(value, timezone.utc))
+    except (OverflowError, OSError) as e:
+      raise TimestampOutOfRange(str(e))
+  if not isinstance(value, str):
+    raise ValueError("timestamp must be an ISO 8601 string or a unix timestamp")
+  parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+  if parsed.tzinfo is not None:
+    try:
+      parsed = parsed.astimezone(timezone.utc)
+    except OverflowError as e:
+      raise TimestampOutOfRange(str(e))
+  return format_timestamp(parsed)
+
+# A review timestamp between EARLIEST_REVIEW and now plus MAX_CLOCK_SKEW
+def review_timestamp(value):
+  created_at = normalize_timestamp(value)
+  latest = datetime.now(timezone.utc).replace(tzinfo=None) + MAX_CLOCK_SKEW
+  if not format_timestamp(EARLIEST_REVIEW) <= created_at <= format_timestamp(latest):
+    raise TimestampOutOfRange(created_at)
+  return created_at
+
+# Validate a review payload, either a list of {word_id, correct, timestamp}
+# or {"reviews": [...]}. Returns (word_id, correct, created_at) tuples.
+def parse_reviews(payload):
+  if isinstance(payload, dict):
+    payload = payload.get('reviews')
+  if not isinstance(payload, list) or not payload:
+    raise ValueError("reviews must be a non-empty array")
+
+  reviews = []
+  for index, item in enumerate(payload):
+    if not isinstance(item, dict):
+      raise ValueError(f"reviews[{index}] must be an object")
+    word_id = item.get('word_id')
+    correct = item.get('correct')
+    if not isinstance(word_id, int) or isinstance(word_id, bool):
+      raise ValueError(f"reviews[{index}].word_id must be an integer")
+    if not isinstance(correct, bool):
+      raise ValueError(f"reviews[{index}].correct must be a boolean")
+    try:
+      created_at = review_timestamp(item.get('timestamp'))
+    except TimestampOutOfRange:
+      raise ValueError(f"reviews[{index}].timestamp must be between 1970-01-01 and now")
+    except ValueError:
+      raise ValueError(f"reviews[{index}].timestamp must be an ISO 8601 string or a unix timestamp")
+    reviews.append((word_id, correct, created_at))
+  return reviews
+
+def chunks(values, size=CHUNK_SIZE):
+  values = list(values)
+  for start in range(0, len(values), size):
+    yield values[start:start + size]
+
+def missing_word_ids(cursor, word_ids):
+  missing = set(word_ids)
+  for chunk in chunks(missing):
+    cursor.execute(f'SELECT id FROM words WHERE id IN ({",".join("?" * len(chunk))})', chunk)
+    missing.difference_update(row[0] for row in cursor.fetchall())
+  return sorted(missing)
+
+def word_counters(cursor, word_ids):
+  counters = []
+  for chunk in chunks(sorted(set(word_ids))):
+    cursor.execute(f'''
+      SELECT word_id, correct_count, wrong_count, last_reviewed, due_at
+      FROM word_reviews
+      WHERE word_id IN ({",".join("?" * len(chunk))})
+      ORDER BY word_id
+    ''', chunk)
+    counters.extend({
+      "word_id": row["word_id"],
+      "correct_count": row["correct_count"],
+      "wrong_count": row["wrong_count"],
+      "last_reviewed": row["last_reviewed"],
+      "due_at": row["due_at"]
+    } for row in cursor.fetchall())
+  return counters
+
+# Current (ease, interval_days, repetitions) per word, NEW_STATE for words
+# that were never reviewed
+def schedule_states(cursor, word_ids):
+  states = {word_id: NEW_STATE for word_id in word_ids}
+  for chunk in chunks(states):
+    cursor.execute(f'''
+      SELECT word_id, ease, interval_days, repetitions
+      FROM word_reviews
+      WHERE word_id IN ({",".join("?" * len(chunk))})
+    ''', chunk)
+    for row in cursor.fetchall():
+      states[row["word_id"]] = (row["ease"], row["interval_days"], row["repetitions"])
+  return states
+
+def due_timestamp(reviewed_at, interval_days):
+  reviewed_at = datetime.strptime(reviewed_at, TIMESTAMP_FORMAT)
+  return (reviewed_at + timedelta(days=interval_days)).strftime(TIMESTAMP_FORMAT)
+
+# Insert review items and upsert the per-word counters and schedules with one
+# executemany each. The review items go in first, so the schedules are read
+# under the transaction's write lock. The caller owns the transaction.
+def record_reviews(cursor, session_id, reviews):
+  cursor.executemany(INSERT_REVIEW_ITEM, [
+    (word_id, session_id, correct, created_at)
+    for word_id, correct, created_at in reviews
+  ])
+
+  totals = defaultdict(lambda: [0, 0, ''])
+  for word_id, correct, created_at in reviews:
+    total = totals[word_id]
+    total[0 if correct else 1] += 1
+    total[2] = max(total[2], created_at)
+
+  # Replay the batch through the scheduler in review order
+  states = schedule_states(cursor, totals)
+  for word_id, correct, created_at in sorted(reviews, key=lambda review: review[2]):
+    states[word_id] = schedule(states[word_id], correct)
+
+  cursor.executemany(UPSERT_WORD_REVIEW, [
+    (word_id, correct_count, wrong_count, last_reviewed, *states[word_id], due_timestamp(last_reviewed, states[word_id][1]))
+    for word_id, (correct_count, wrong_count, last_reviewed) in totals.items()
+  ])
+  return list(totals)
@@ -0,0 +1,23 @@
+import os
+
+ROLLUPS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'rollups')
+
+# Recompute the trigger-maintained rollup tables from the base tables, one
+# transaction per sql/rollups file. Used for backfills and repairs; only
+# limits it to some of the files.
+def rebuild_rollups(connection, rollups_dir=ROLLUPS_DIR, log=print, only=None):
+  rebuilt = []
+  for filename in sorted(os.listdir(rollups_dir)):
+    if not filename.endswith('.sql') or (only is not None and filename not in only):
+      continue
+    log(f"Rebuilding rollup: {filename}")
+    with open(os.path.join(rollups_dir, filename)) as f:
+      script = f.read()
+    try:
+      connection.executescript(f'BEGIN;\n{script}\nCOMMIT;')
+    except Exception:
+      if connection.in_transaction:
+        connection.rollback()
+      raise
+    rebuilt.append(filename)
+  return rebuilt
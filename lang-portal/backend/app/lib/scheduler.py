@@ -0,0 +1,35 @@
+# SM-2 spaced repetition. Reviews are pass/fail, so they map onto two of
+# SM-2's 0-5 answer qualities: a pass keeps the ease, a fail lowers it and
+# restarts the word at a one day interval.
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 2
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+# Intervals grow geometrically; cap them (about 100 years, as Anki does) so
+# due dates stay representable
+MAX_INTERVAL_DAYS = 36500.0
+
+# (ease, interval_days, repetitions) of a word that has never been reviewed
+NEW_STATE = (DEFAULT_EASE, 0.0, 0)
+
+# Apply one review to a word's (ease, interval_days, repetitions). The word
+# is due again interval_days after the review.
+def schedule(state, correct):
+  ease, interval_days, repetitions = state
+  quality = CORRECT_QUALITY if correct else WRONG_QUALITY
+
+  if quality >= 3:
+    repetitions += 1
+    if repetitions == 1:
+      interval_days = 1.0
+    elif repetitions == 2:
+      interval_days = 6.0
+    else:
+      interval_days = min(round(interval_days * ease, 2), MAX_INTERVAL_DAYS)
+  else:
+    repetitions = 0
+    interval_days = 1.0
+
+  ease = max(MIN_EASE, round(ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02), 2))
+  return ease, interval_days, repetitions
@@ -0,0 +1,156 @@
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+
+from .pool import ConnectionPool
+
+# Read-only routes served from the snapshot unless READ_SNAPSHOT_ENDPOINTS says otherwise
+DEFAULT_ENDPOINTS = (
+  'get_study_stats',
+  'get_recent_session',
+  'get_study_sessions',
+  'get_study_session',
+  'get_group_study_sessions',
+  'get_study_activity_sessions',
+)
+
+# The copy is never written to, so skip the pragmas that would write or wait for locks
+SNAPSHOT_PRAGMAS = {'journal_mode': None, 'synchronous': None, 'busy_timeout': None}
+
+# A read-only copy of the database, refreshed every interval seconds with the
+# sqlite3 backup API on a background thread. Each refresh is written to a
+# temporary file, renamed into place and gets its own connection pool.
+# Requests still reading the previous copy finish on it; its pool is closed
+# when the last of them hands its connection back.
+class ReadSnapshot:
+  def __init__(self, database, path=None, interval=30.0, pragmas=None, pool_size=8, factory=sqlite3.Connection, log=None):
+    self.database = database
+    self.path = path or f'{database}.snapshot'
+    self.interval = interval
+    self.pragmas = dict(pragmas or {}, **SNAPSHOT_PRAGMAS)
+    self.pool_size = pool_size
+    self.factory = factory
+    self.log = log
+    self.statement_observer = None
+    self._pool = None
+    self._taken_at = None
+    self._leases = {}  # id(connection) -> (pool, taken_at)
+    self._lock = threading.Lock()
+    self._refresh_lock = threading.Lock()
+    self._stop = threading.Event()
+    self._thread = None
+    self._stats = {
+      'refreshes': 0,
+      'failures': 0,
+      'last_refresh_ms': 0.0,
+      'max_refresh_ms': 0.0,
+    }
+
+  def refresh(self):
+    with self._refresh_lock:
+      started = time.perf_counter()
+      taken_at = time.time()
+      temporary = f'{self.path}.tmp'
+      if os.path.exists(temporary):
+        os.remove(temporary)
+
+      source = sqlite3.connect(self.database)
+      target = sqlite3.connect(temporary)
+      try:
+        # All pages in one step: a single read transaction, so the copy is
+        # consistent and, under WAL, writers carry on while it runs
+        source.backup(target)
+        # Readers open the copy as immutable, which needs a rollback journal header
+        target.execute('PRAGMA journal_mode = DELETE')
+      finally:
+        target.close()
+        source.close()
+      os.replace(temporary, self.path)
+
+      pool = ConnectionPool(
+        pathlib.Path(self.path).absolute().as_uri() + '?immutable=1',
+        pragmas=self.pragmas,
+        max_idle=self.pool_size,
+        factory=self.factory,
+        uri=True
+      )
+      pool.statement_observer = self.statement_observer
+      with self._lock:
+        previous, self._pool, self._taken_at = self._pool, pool, taken_at
+        if previous is not None and not self._leased(previous):
+          previous.close_all()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._stats['refreshes'] += 1
+        self._stats['last_refresh_ms'] = elapsed_ms
+        self._stats['max_refresh_ms'] = max(self._stats['max_refresh_ms'], elapsed_ms)
+
+  def _leased(self, pool):
+    return any(lease[0] is pool for lease in self._leases.values())
+
+  def _run(self):
+    while not self._stop.is_set():
+      try:
+        self.refresh()
+      except Exception as e:
+        with self._lock:
+          self._stats['failures'] += 1
+        if self.log:
+          self.log(f"Read snapshot refresh failed: {e}")
+      self._stop.wait(self.interval)
+
+  def start(self):
+    if self._thread is None:
+      self._thread = threading.Thread(target=self._run, name='read-snapshot', daemon=True)
+      self._thread.start()
+
+  def stop(self):
+    self._stop.set()
+    if self._thread is not None:
+      self._thread.join()
+    with self._lock:
+      if self._pool is not None:
+        self._pool.close_all()
+
+  def observe_statements(self, observer):
+    with self._lock:
+      self.statement_observer = observer
+      if self._pool is not None:
+        self._pool.statement_observer = observer
+
+  # A connection to the latest copy, or None before the first refresh
+  def acquire(self):
+    with self._lock:
+      if self._pool is None:
+        return None
+      connection = self._pool.acquire()
+      self._leases[id(connection)] = (self._pool, self._taken_at)
+      return connection
+
+  def release(self, connection):
+    with self._lock:
+      pool, _ = self._leases.pop(id(connection))
+      pool.release(connection)
+      if pool is not self._pool and not self._leased(pool):
+        pool.close_all()
+
+  # Seconds since the copy a connection reads (or the latest copy) was taken
+  def age(self, connection=None):
+    with self._lock:
+      if connection is not None:
+        taken_at = self._leases[id(connection)][1]
+      else:
+        taken_at = self._taken_at
+    return None if taken_at is None else max(time.time() - taken_at, 0.0)
+
+  def stats(self):
+    age = self.age()
+    with self._lock:
+      return dict(
+        self._stats,
+        age_seconds=age,
+        in_use=len(self._leases),
+        interval=self.interval,
+        path=self.path,
+      )
@@ -1,31 +1,45 @@
-import sqlite3
-import os
+import argparse
+import sys
 
-def run_migrations():
-    # Connect to the database
-    db_path = os.path.join(os.path.dirname(__file__), 'word_bank.db')
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
-    try:
-        # Get list of migration files
-        migrations_dir = os.path.join(os.path.dirname(__file__), 'sql', 'migrations')
-        migration_files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.sql')])
-        
-        # Run each migration
-        for migration_file in migration_files:
-            print(f"Running migration: {migration_file}")
-            with open(os.path.join(migrations_dir, migration_file)) as f:
-                migration_sql = f.read()
-                conn.executescript(migration_sql)
-                conn.commit()
-        
-        print("Migrations completed successfully")
-    except Exception as e:
-        print(f"Error running migrations: {str(e)}")
-        conn.rollback()
-    finally:
-        conn.close()
+from lib.db import Db
+from lib.migrations import MIGRATIONS_DIR, MigrationError, apply_migrations, migration_status
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending migrations from sql/migrations")
+    parser.add_argument('--database', default='words.db', help="SQLite database file (default: words.db)")
+    parser.add_argument('--migrations-dir', default=MIGRATIONS_DIR, help="Directory with NNNN_name.sql/.py migrations")
+    parser.add_argument('--dry-run', action='store_true', help="List pending migrations without running them")
+    parser.add_argument('--status', action='store_true', help="Show every migration and whether it is applied")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Rows per transaction in online data migrations")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between data migration batches")
+    return parser.parse_args(argv)
+
+def run_migrations(argv=None):
+    args = parse_args(argv)
+
+    with Db(database=args.database).checkout() as connection:
+        try:
+            if args.status:
+                for entry in migration_status(connection, args.migrations_dir):
+                    print(f"{entry['state']:>8}  {entry['filename']}")
+                return 0
+
+            ran = apply_migrations(
+                connection,
+                migrations_dir=args.migrations_dir,
+                dry_run=args.dry_run,
+                batch_size=args.batch_size,
+                pause=args.pause
+            )
+        except MigrationError as e:
+            print(f"Error running migrations: {e}")
+            return 1
+
+    if args.dry_run:
+        print(f"{len(ran)} pending migrations")
+    else:
+        print(f"Migrations completed successfully ({len(ran)} applied)")
+    return 0
 
 if __name__ == '__main__':
-    run_migrations()
+    sys.exit(run_migrations())
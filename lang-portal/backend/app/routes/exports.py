@@ -0,0 +1,136 @@
+from contextlib import ExitStack
+
+from flask import request, Response
+from flask_cors import cross_origin
+
+from ..lib.responses import json_response
+from ..lib.reviews import normalize_timestamp
+
+# Rows fetched and sent per response chunk
+EXPORT_CHUNK_ROWS = 500
+
+# Rows are rendered to JSON by SQLite (one json_object per row), so the
+# generators below only have to join lines. Each export walks an index in
+# (since column, id) order and starts after a (since, after_id) cursor, so a
+# client resumes from the last line it got by passing its created_at and id.
+EXPORT_WORDS = '''
+  SELECT json_object(
+    'id', w.id,
+    'kanji', w.kanji,
+    'romaji', w.romaji,
+    'english', w.english,
+    'parts', CASE WHEN json_valid(w.parts) THEN json(w.parts) ELSE w.parts END,
+    'groups', json((
+      SELECT json_group_array(json_object('id', g.id, 'name', g.name))
+      FROM word_groups wg
+      JOIN groups g ON g.id = wg.group_id
+      WHERE wg.word_id = w.id
+    ))
+  )
+  FROM words w
+  WHERE w.id > ?
+  ORDER BY w.id
+'''
+
+EXPORT_STUDY_SESSIONS = '''
+  SELECT json_object(
+    'id', ss.id,
+    'group_id', ss.group_id,
+    'group_name', g.name,
+    'study_activity_id', ss.study_activity_id,
+    'activity_name', sa.name,
+    'created_at', ss.created_at,
+    'last_activity_at', st.last_activity_at,
+    'review_count', COALESCE(st.review_count, 0),
+    'correct_count', COALESCE(st.correct_count, 0),
+    'wrong_count', COALESCE(st.wrong_count, 0)
+  )
+  FROM study_sessions ss
+  LEFT JOIN groups g ON g.id = ss.group_id
+  LEFT JOIN study_activities sa ON sa.id = ss.study_activity_id
+  LEFT JOIN study_session_stats st ON st.study_session_id = ss.id
+  WHERE (ss.created_at, ss.id) > (?, ?)
+  ORDER BY ss.created_at, ss.id
+'''
+
+EXPORT_REVIEW_ITEMS = '''
+  SELECT json_object(
+    'id', wri.id,
+    'study_session_id', wri.study_session_id,
+    'word_id', wri.word_id,
+    'correct', json(CASE WHEN wri.correct THEN 'true' ELSE 'false' END),
+    'created_at', wri.created_at
+  )
+  FROM word_review_items wri
+  WHERE (wri.created_at, wri.id) > (?, ?)
+  ORDER BY wri.created_at, wri.id
+'''
+
+def load(app):
+  # Stream one JSON document per line straight off the cursor. The query and
+  # its first chunk run before the response starts, so a failing query is
+  # still a 500; the rest is read by the generator on its own pooled
+  # connection, so the read stays one snapshot and the connection goes back
+  # to the pool when the client finishes or disconnects.
+  def stream_ndjson(sql, params):
+    stack = ExitStack()
+    connection = stack.enter_context(app.db.checkout())
+    try:
+      cursor = connection.execute(sql, params)
+      rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+    except Exception:
+      stack.close()
+      raise
+
+    def generate(rows):
+      with stack:
+        while rows:
+          yield ''.join(line + '\n' for (line,) in rows)
+          rows = cursor.fetchmany(EXPORT_CHUNK_ROWS)
+
+    response = Response(generate(rows), mimetype='application/x-ndjson')
+    # A response that is never iterated still returns the connection
+    response.call_on_close(stack.close)
+    return response
+
+  # (since, after_id) for the timestamp exports: since alone is inclusive
+  def history_cursor():
+    since = normalize_timestamp(request.args['since']) if request.args.get('since') else ''
+    return since, request.args.get('after_id', 0, type=int)
+
+  # Endpoint: GET /export/words.ndjson?since=<word id>
+  # Words have no timestamp, so since is the last word id already exported
+  @app.route('/export/words.ndjson', methods=['GET'])
+  @cross_origin()
+  def export_words():
+    try:
+      since = request.args.get('since', 0, type=int)
+      return stream_ndjson(EXPORT_WORDS, (since,))
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
+
+  # Endpoint: GET /export/study_sessions.ndjson?since=<timestamp>&after_id=<id>
+  @app.route('/export/study_sessions.ndjson', methods=['GET'])
+  @cross_origin()
+  def export_study_sessions():
+    try:
+      try:
+        params = history_cursor()
+      except ValueError:
+        return json_response({"error": "since must be an ISO 8601 timestamp"}), 400
+      return stream_ndjson(EXPORT_STUDY_SESSIONS, params)
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
+
+  # Endpoint: GET /export/word_review_items.ndjson?since=<timestamp>&after_id=<id>
+  @app.route('/export/word_review_items.ndjson', methods=['GET'])
+  @cross_origin()
+  def export_word_review_items():
+    try:
+      try:
+        params = history_cursor()
+      except ValueError:
+        return json_response({"error": "since must be an ISO 8601 timestamp"}), 400
+      return stream_ndjson(EXPORT_REVIEW_ITEMS, params)
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
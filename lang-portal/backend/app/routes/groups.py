@@ -1,10 +1,27 @@
-from flask import request, jsonify, g
+from flask import request, g, Response
 from flask_cors import cross_origin
-import json
+import hashlib
+from datetime import datetime, timezone
+
+from ..lib.compression import compress_variants, negotiate_encoding
+from ..lib.pagination import decode_cursor, keyset_condition, split_page
+from ..lib.responses import json_response, row_dict, row_dicts
+from ..lib.reviews import TIMESTAMP_FORMAT
+from ..lib.scheduler import DEFAULT_EASE
+
+# Sort keys mapped to the expression used for ORDER BY and keyset comparisons
+WORD_SORT_EXPRESSIONS = {
+  'kanji': 'w.kanji',
+  'romaji': 'w.romaji',
+  'english': 'w.english',
+  'correct_count': 'COALESCE(wr.correct_count, 0)',
+  'wrong_count': 'COALESCE(wr.wrong_count, 0)'
+}
 
 def load(app):
   @app.route('/groups', methods=['GET'])
   @cross_origin()
+  @app.db.cached('groups')
   def get_groups():
     try:
       cursor = app.db.cursor()
@@ -27,36 +44,27 @@ def load(app):
 
       # Query to fetch groups with sorting and the cached word count
       cursor.execute(f'''
-        SELECT id, name, words_count
+        SELECT id, name AS group_name, words_count AS word_count
         FROM groups
         ORDER BY {sort_by} {order}
         LIMIT ? OFFSET ?
       ''', (groups_per_page, offset))
 
-      groups = cursor.fetchall()
+      groups = row_dicts(cursor)
 
       # Query the total number of groups
       cursor.execute('SELECT COUNT(*) FROM groups')
       total_groups = cursor.fetchone()[0]
       total_pages = (total_groups + groups_per_page - 1) // groups_per_page
 
-      # Format the response
-      groups_data = []
-      for group in groups:
-        groups_data.append({
-          "id": group["id"],
-          "group_name": group["name"],
-          "word_count": group["words_count"]
-        })
-
       # Return groups and pagination metadata
-      return jsonify({
-        'groups': groups_data,
+      return json_response({
+        'groups': groups,
         'total_pages': total_pages,
         'current_page': page
       })
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
+      return json_response({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>', methods=['GET'])
   @cross_origin()
@@ -66,25 +74,22 @@ def load(app):
 
       # Get group details
       cursor.execute('''
-        SELECT id, name, words_count
+        SELECT id, name AS group_name, words_count AS word_count
         FROM groups
         WHERE id = ?
       ''', (id,))
       
-      group = cursor.fetchone()
+      group = row_dict(cursor, cursor.fetchone())
       if not group:
-        return jsonify({"error": "Group not found"}), 404
+        return json_response({"error": "Group not found"}), 404
 
-      return jsonify({
-        "id": group["id"],
-        "group_name": group["name"],
-        "word_count": group["words_count"]
-      })
+      return json_response(group)
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
+      return json_response({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/words', methods=['GET'])
   @cross_origin()
+  @app.db.cached('groups', 'words', 'word_groups', 'word_reviews')
   def get_group_words(id):
     try:
       cursor = app.db.cursor()
@@ -109,11 +114,41 @@ def load(app):
       cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
-        return jsonify({"error": "Group not found"}), 404
+        return json_response({"error": "Group not found"}), 404
+
+      # Keyset pagination (?cursor=, empty for the first page) seeks on
+      # (sort column, id) instead of scanning past OFFSET rows
+      if 'cursor' in request.args:
+        try:
+          after = decode_cursor(request.args['cursor']) if request.args['cursor'] else None
+        except ValueError as e:
+          return json_response({"error": str(e)}), 400
+
+        sort_expr = WORD_SORT_EXPRESSIONS[sort_by]
+        condition, params = keyset_condition(sort_expr, 'w.id', order, after)
+
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english,
+                 COALESCE(wr.correct_count, 0) as correct_count,
+                 COALESCE(wr.wrong_count, 0) as wrong_count
+          FROM words w
+          JOIN word_groups wg ON w.id = wg.word_id
+          LEFT JOIN word_reviews wr ON w.id = wr.word_id
+          WHERE wg.group_id = ? AND {condition}
+          ORDER BY {sort_expr} {order}, w.id {order}
+          LIMIT ?
+        ''', (id, *params, words_per_page + 1))
+
+        words, next_cursor = split_page(cursor.fetchall(), words_per_page, sort_by)
+
+        return json_response({
+          'words': row_dicts(cursor, words),
+          'next_cursor': next_cursor
+        })
 
       # Query to fetch words with pagination and sorting
       cursor.execute(f'''
-        SELECT w.*, 
+        SELECT w.id, w.kanji, w.romaji, w.english,
                COALESCE(wr.correct_count, 0) as correct_count,
                COALESCE(wr.wrong_count, 0) as wrong_count
         FROM words w
@@ -124,7 +159,7 @@ def load(app):
         LIMIT ? OFFSET ?
       ''', (id, words_per_page, offset))
       
-      words = cursor.fetchall()
+      words = row_dicts(cursor)
 
       # Get total words count for pagination
       cursor.execute('''
@@ -135,27 +170,135 @@ def load(app):
       total_words = cursor.fetchone()[0]
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
-      # Format the response
-      words_data = []
-      for word in words:
-        words_data.append({
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"]
-        })
-
-      return jsonify({
-        'words': words_data,
+      return json_response({
+        'words': words,
         'total_pages': total_pages,
         'current_page': page
       })
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
+      return json_response({"error": str(e)}), 500
+
+  # Endpoint: GET /groups/:id/due?limit=N the next words to study. Words
+  # that are due come first, most overdue first, then never-reviewed words.
+  # Both reads walk the (group_id, due_at, word_id) index and stop after N rows.
+  @app.route('/groups/<int:id>/due', methods=['GET'])
+  @cross_origin()
+  def get_group_due_words(id):
+    try:
+      cursor = app.db.cursor()
+
+      limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+      include_new = request.args.get('include_new', 'true').lower() not in ('false', '0', 'no')
+      now = datetime.now(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+      cursor.execute('SELECT id FROM groups WHERE id = ?', (id,))
+      if not cursor.fetchone():
+        return json_response({"error": "Group not found"}), 404
+
+      cursor.execute('''
+        SELECT w.id, w.kanji, w.romaji, w.english, wg.due_at,
+               wr.correct_count, wr.wrong_count, wr.ease, wr.interval_days, wr.repetitions
+        FROM word_groups wg
+        JOIN words w ON w.id = wg.word_id
+        JOIN word_reviews wr ON wr.word_id = wg.word_id
+        WHERE wg.group_id = ? AND wg.due_at <= ?
+        ORDER BY wg.due_at, wg.word_id
+        LIMIT ?
+      ''', (id, now, limit))
+      words = row_dicts(cursor)
+
+      if include_new and len(words) < limit:
+        cursor.execute('''
+          SELECT w.id, w.kanji, w.romaji, w.english, wg.due_at,
+                 0 as correct_count, 0 as wrong_count, ? as ease, 0 as interval_days, 0 as repetitions
+          FROM word_groups wg
+          JOIN words w ON w.id = wg.word_id
+          WHERE wg.group_id = ? AND wg.due_at IS NULL
+          ORDER BY wg.word_id
+          LIMIT ?
+        ''', (DEFAULT_EASE, id, limit - len(words)))
+        words += row_dicts(cursor)
+
+      return json_response({
+        'group_id': id,
+        'words': words
+      })
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
+
+  # Build the bundle body: every word in the group with its parts. SQLite
+  # assembles the JSON from word_parts, so no word is decoded in Python.
+  def build_group_bundle(cursor, group):
+    cursor.execute('''
+      SELECT json_object(
+        'group_id', ?,
+        'group_name', ?,
+        'words', json_group_array(json(word))
+      ) AS body
+      FROM (
+        SELECT json_object(
+          'id', w.id,
+          'kanji', w.kanji,
+          'romaji', w.romaji,
+          'english', w.english,
+          'parts', json(pj.parts)
+        ) AS word
+        FROM word_groups wg
+        JOIN words w ON w.id = wg.word_id
+        JOIN word_parts_json pj ON pj.word_id = w.id
+        WHERE wg.group_id = ?
+        ORDER BY wg.word_id
+      )
+    ''', (group["id"], group["name"], group["id"]))
+    return cursor.fetchone()["body"].encode('utf-8')
+
+  # Endpoint: GET /groups/:id/words/raw all words of a group in one response.
+  # The body is built and compressed once per group version (bumped by
+  # triggers when the group's words change) and revalidated with ETags.
+  @app.route('/groups/<int:id>/words/raw', methods=['GET'])
+  @cross_origin()
+  def get_group_words_raw(id):
+    try:
+      cursor = app.db.cursor()
+
+      cursor.execute('''
+        SELECT g.id, g.name, COALESCE(v.version, 0) as version
+        FROM groups g
+        LEFT JOIN group_versions v ON v.group_id = g.id
+        WHERE g.id = ?
+      ''', (id,))
+      group = cursor.fetchone()
+      if not group:
+        return json_response({"error": "Group not found"}), 404
+
+      bundle = app.group_bundles.get(id, group["version"])
+      if bundle is None:
+        body = build_group_bundle(cursor, group)
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        bundle = {
+          'etag': f'{id}-{group["version"]}-{digest}',
+          'variants': compress_variants(body)
+        }
+        app.group_bundles.put(id, group["version"], bundle)
 
-  # todo GET /groups/:id/words/raw
+      # Every coding gets its own strong ETag; a client holding any of them
+      # still has the current bundle
+      encoding = negotiate_encoding(request.accept_encodings)
+      etag = bundle['etag'] if encoding == 'identity' else f"{bundle['etag']}-{encoding}"
+      current = [bundle['etag']] + [f"{bundle['etag']}-{coding}" for coding in bundle['variants'] if coding != 'identity']
+
+      if any(request.if_none_match.contains(tag) for tag in current):
+        response = Response(status=304)
+      else:
+        response = Response(bundle['variants'][encoding], mimetype='application/json')
+        if encoding != 'identity':
+          response.headers['Content-Encoding'] = encoding
+      response.set_etag(etag)
+      response.headers['Cache-Control'] = 'no-cache'
+      response.vary.add('Accept-Encoding')
+      return response
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/study_sessions', methods=['GET'])
   @cross_origin()
@@ -174,15 +317,18 @@ def load(app):
 
       # Map frontend sort keys to database columns
       sort_mapping = {
-        'startTime': 'created_at',
-        'endTime': 'last_activity_time',
+        'created_at': 's.created_at',
+        'startTime': 's.created_at',
+        'endTime': 'end_time',
         'activityName': 'a.name',
         'groupName': 'g.name',
-        'reviewItemsCount': 'review_count'
+        'reviewItemsCount': 'review_items_count'
       }
 
       # Use mapped sort column or default to created_at
-      sort_column = sort_mapping.get(sort_by, 'created_at')
+      sort_column = sort_mapping.get(sort_by, 's.created_at')
+      if order not in ['asc', 'desc']:
+        order = 'desc'
 
       # Get total count for pagination
       cursor.execute('''
@@ -193,57 +339,31 @@ def load(app):
       total_sessions = cursor.fetchone()[0]
       total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
 
-      # Get study sessions for this group with dynamic calculations
+      # Get study sessions for this group with their precomputed review aggregates.
+      # Sessions without reviews end 30 minutes after they started.
       cursor.execute(f'''
         SELECT 
           s.id,
           s.group_id,
           s.study_activity_id,
           s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
+          COALESCE(st.last_activity_at, datetime(s.created_at, '+30 minutes')) as end_time,
           a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
+          COALESCE(st.review_count, 0) as review_items_count
         FROM study_sessions s
         JOIN study_activities a ON s.study_activity_id = a.id
         JOIN groups g ON s.group_id = g.id
+        LEFT JOIN study_session_stats st ON st.study_session_id = s.id
         WHERE s.group_id = ?
         ORDER BY {sort_column} {order}
         LIMIT ? OFFSET ?
       ''', (id, sessions_per_page, offset))
       
-      sessions = cursor.fetchall()
-      sessions_data = []
-      
-      for session in sessions:
-        # If there's no last_activity_time, use start_time + 30 minutes
-        end_time = session["last_activity_time"]
-        if not end_time:
-            end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[0]
-        
-        sessions_data.append({
-          "id": session["id"],
-          "group_id": session["group_id"],
-          "group_name": session["group_name"],
-          "study_activity_id": session["study_activity_id"],
-          "activity_name": session["activity_name"],
-          "start_time": session["start_time"],
-          "end_time": end_time,
-          "review_items_count": session["review_count"]
-        })
-
-      return jsonify({
-        'study_sessions': sessions_data,
+      return json_response({
+        'study_sessions': row_dicts(cursor),
         'total_pages': total_pages,
         'current_page': page
       })
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
\ No newline at end of file
+      return json_response({"error": str(e)}), 500
\ No newline at end of file
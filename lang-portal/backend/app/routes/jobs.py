@@ -0,0 +1,16 @@
+from flask_cors import cross_origin
+
+from ..lib.responses import json_response
+
+def load(app):
+  # Endpoint: GET /api/jobs/:id status and progress of a background job
+  @app.route('/api/jobs/<int:id>', methods=['GET'])
+  @cross_origin()
+  def get_job(id):
+    try:
+      job = app.jobs.get(id)
+      if job is None:
+        return json_response({"error": "Job not found"}), 404
+      return json_response(job.to_dict())
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
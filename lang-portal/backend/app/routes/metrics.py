@@ -0,0 +1,98 @@
+from flask import Response
+
+from ..lib.responses import json_response
+
+def load(app):
+  # Values owned by other components, read at scrape time
+  def component_metrics():
+    pool = app.db.pool_stats()
+    extra = [
+      ('db_pool_connections', 'gauge', "Pooled database connections by state",
+        [({'state': 'idle'}, pool['idle']), ({'state': 'in_use'}, pool['in_use'])]),
+      ('db_pool_connections_created_total', 'counter', "Database connections opened", [({}, pool['created'])]),
+      ('db_pool_connections_reused_total', 'counter', "Connections handed out again from the pool", [({}, pool['reused'])]),
+    ]
+
+    if app.review_queue is not None:
+      queue = app.review_queue.stats()
+      extra += [
+        ('review_queue_depth', 'gauge', "Review events waiting to be written", [({}, queue['depth'])]),
+        ('review_queue_events_total', 'counter', "Review events by outcome", [
+          ({'outcome': 'submitted'}, queue['submitted']),
+          ({'outcome': 'flushed'}, queue['flushed_events']),
+          ({'outcome': 'failed'}, queue['failed_events']),
+        ]),
+        ('review_queue_rejected_total', 'counter', "Review batches rejected because the queue was full", [({}, queue['rejected'])]),
+        ('review_queue_flushes_total', 'counter', "Group commits written", [({}, queue['flushes'])]),
+      ]
+
+    bundles = app.group_bundles.stats()
+    extra.append(('group_bundle_cache_lookups_total', 'counter', "Group bundle cache lookups by result", [
+      ({'result': 'hit'}, bundles['hits']),
+      ({'result': 'miss'}, bundles['misses']),
+    ]))
+
+    versions = app.table_versions.stats()
+    extra.append(('table_version_checks_total', 'counter', "Table version lookups by result", [
+      ({'result': 'cached'}, versions['checks'] - versions['reloads']),
+      ({'result': 'reloaded'}, versions['reloads']),
+    ]))
+
+    if app.db.query_cache is not None:
+      cache = app.db.query_cache.stats()
+      extra += [
+        ('query_cache_lookups_total', 'counter', "Query cache lookups by result", [
+          ({'result': 'hit'}, cache['hits']),
+          ({'result': 'miss'}, cache['misses']),
+        ]),
+        ('query_cache_evictions_total', 'counter', "Query cache entries dropped for space", [({}, cache['evictions'])]),
+        ('query_cache_invalidations_total', 'counter', "Query cache entries dropped after a write to their tables",
+          [({}, cache['invalidations'])]),
+        ('query_cache_entries', 'gauge', "Entries in the query cache", [({}, cache['entries'])]),
+      ]
+
+    pubsub = app.pubsub.stats()
+    extra += [
+      ('pubsub_subscribers', 'gauge', "Open event subscriptions (dashboard streams)", [({}, pubsub['subscribers'])]),
+      ('pubsub_events_total', 'counter', "Events by outcome", [
+        ({'outcome': 'published'}, pubsub['published']),
+        ({'outcome': 'delivered'}, pubsub['delivered']),
+        ({'outcome': 'dropped'}, pubsub['dropped']),
+      ]),
+    ]
+
+    if app.db.snapshot is not None:
+      snapshot = app.db.snapshot.stats()
+      extra += [
+        ('read_snapshot_age_seconds', 'gauge', "Seconds since the read snapshot was taken",
+          [({}, snapshot['age_seconds'] if snapshot['age_seconds'] is not None else 'NaN')]),
+        ('read_snapshot_refreshes_total', 'counter', "Read snapshot refreshes by outcome", [
+          ({'outcome': 'ok'}, snapshot['refreshes']),
+          ({'outcome': 'failed'}, snapshot['failures']),
+        ]),
+        ('read_snapshot_refresh_seconds', 'gauge', "Duration of the last read snapshot refresh",
+          [({}, snapshot['last_refresh_ms'] / 1000)]),
+      ]
+
+    if app.slow_queries is not None:
+      extra.append(('sql_slow_queries_logged', 'gauge', "Slow queries held in the slow query log",
+        [({}, len(app.slow_queries.entries()))]))
+    return extra
+
+  # Endpoint: GET /metrics in the Prometheus text format
+  @app.route('/metrics', methods=['GET'])
+  def get_metrics():
+    try:
+      return Response(app.metrics.render(component_metrics()), mimetype='text/plain; version=0.0.4')
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
+
+  # Endpoint: GET /metrics/slow-queries recent slow statements with their query plans
+  @app.route('/metrics/slow-queries', methods=['GET'])
+  def get_slow_queries():
+    if app.slow_queries is None:
+      return json_response({"error": "Slow query log is disabled (set SLOW_QUERY_MS)"}), 404
+    return json_response({
+      "threshold_ms": app.slow_queries.threshold_ms,
+      "queries": app.slow_queries.entries()
+    })
@@ -1,8 +1,13 @@
-from flask import request, jsonify, g
+from flask import request, g
 from flask_cors import cross_origin
 from datetime import datetime
 import math
 
+from ..lib.jobs import reset_study_history
+from ..lib.responses import json_response, row_dict, row_dicts
+from ..lib.reviews import parse_reviews, missing_word_ids, record_reviews, word_counters
+from ..lib.review_queue import QueueFull
+
 def load(app):
   # todo /study_sessions POST
 
@@ -17,13 +22,8 @@ def load(app):
       per_page = request.args.get('per_page', 10, type=int)
       offset = (page - 1) * per_page
 
-      # Get total count
-      cursor.execute('''
-        SELECT COUNT(*) as count 
-        FROM study_sessions ss
-        JOIN groups g ON g.id = ss.group_id
-        JOIN study_activities sa ON sa.id = ss.study_activity_id
-      ''')
+      # Get total count from the trigger-maintained totals
+      cursor.execute('SELECT total_sessions as count FROM study_stats WHERE id = 1')
       total_count = cursor.fetchone()['count']
 
       # Get paginated sessions
@@ -34,36 +34,26 @@ def load(app):
           g.name as group_name,
           sa.id as activity_id,
           sa.name as activity_name,
-          ss.created_at,
-          COUNT(wri.id) as review_items_count
+          ss.created_at as start_time,
+          COALESCE(st.last_activity_at, ss.created_at) as end_time,
+          COALESCE(st.review_count, 0) as review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
-        GROUP BY ss.id
+        LEFT JOIN study_session_stats st ON st.study_session_id = ss.id
         ORDER BY ss.created_at DESC
         LIMIT ? OFFSET ?
       ''', (per_page, offset))
-      sessions = cursor.fetchall()
-
-      return jsonify({
-        'items': [{
-          'id': session['id'],
-          'group_id': session['group_id'],
-          'group_name': session['group_name'],
-          'activity_id': session['activity_id'],
-          'activity_name': session['activity_name'],
-          'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time since we don't track end time
-          'review_items_count': session['review_items_count']
-        } for session in sessions],
+
+      return json_response({
+        'items': row_dicts(cursor),
         'total': total_count,
         'page': page,
         'per_page': per_page,
         'total_pages': math.ceil(total_count / per_page)
       })
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
+      return json_response({"error": str(e)}), 500
 
   @app.route('/api/study-sessions/<id>', methods=['GET'])
   @cross_origin()
@@ -79,19 +69,19 @@ def load(app):
           g.name as group_name,
           sa.id as activity_id,
           sa.name as activity_name,
-          ss.created_at,
-          COUNT(wri.id) as review_items_count
+          ss.created_at as start_time,
+          COALESCE(st.last_activity_at, ss.created_at) as end_time,
+          COALESCE(st.review_count, 0) as review_items_count
         FROM study_sessions ss
         JOIN groups g ON g.id = ss.group_id
         JOIN study_activities sa ON sa.id = ss.study_activity_id
-        LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
+        LEFT JOIN study_session_stats st ON st.study_session_id = ss.id
         WHERE ss.id = ?
-        GROUP BY ss.id
       ''', (id,))
       
-      session = cursor.fetchone()
+      session = row_dict(cursor, cursor.fetchone())
       if not session:
-        return jsonify({"error": "Study session not found"}), 404
+        return json_response({"error": "Study session not found"}), 404
 
       # Get pagination parameters
       page = request.args.get('page', 1, type=int)
@@ -101,9 +91,12 @@ def load(app):
       # Get the words reviewed in this session with their review status
       cursor.execute('''
         SELECT 
-          w.*,
-          COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as session_correct_count,
-          COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as session_wrong_count
+          w.id,
+          w.kanji,
+          w.romaji,
+          w.english,
+          COALESCE(SUM(CASE WHEN wri.correct = 1 THEN 1 ELSE 0 END), 0) as correct_count,
+          COALESCE(SUM(CASE WHEN wri.correct = 0 THEN 1 ELSE 0 END), 0) as wrong_count
         FROM words w
         JOIN word_review_items wri ON wri.word_id = w.id
         WHERE wri.study_session_id = ?
@@ -112,7 +105,7 @@ def load(app):
         LIMIT ? OFFSET ?
       ''', (id, per_page, offset))
       
-      words = cursor.fetchall()
+      words = row_dicts(cursor)
 
       # Get total count of words
       cursor.execute('''
@@ -124,69 +117,115 @@ def load(app):
       
       total_count = cursor.fetchone()['count']
 
-      return jsonify({
-        'session': {
-          'id': session['id'],
-          'group_id': session['group_id'],
-          'group_name': session['group_name'],
-          'activity_id': session['activity_id'],
-          'activity_name': session['activity_name'],
-          'start_time': session['created_at'],
-          'end_time': session['created_at'],  # For now, just use the same time
-          'review_items_count': session['review_items_count']
-        },
-        'words': [{
-          'id': word['id'],
-          'kanji': word['kanji'],
-          'romaji': word['romaji'],
-          'english': word['english'],
-          'correct_count': word['session_correct_count'],
-          'wrong_count': word['session_wrong_count']
-        } for word in words],
+      return json_response({
+        'session': session,
+        'words': words,
         'total': total_count,
         'page': page,
         'per_page': per_page,
         'total_pages': math.ceil(total_count / per_page)
       })
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
+      return json_response({"error": str(e)}), 500
+
+  @app.route('/study_sessions/<int:id>/review', methods=['POST'])
+  @cross_origin()
+  def create_study_session_reviews(id):
+    try:
+      if not request.is_json:
+        return json_response({"error": "Request must be JSON"}), 400
+
+      # Accepts [{word_id, correct, timestamp}, ...] or {"reviews": [...]}
+      try:
+        reviews = parse_reviews(request.get_json(silent=True))
+      except ValueError as e:
+        return json_response({"error": str(e)}), 400
+
+      cursor = app.db.cursor()
+
+      cursor.execute('SELECT id FROM study_sessions WHERE id = ?', (id,))
+      if not cursor.fetchone():
+        return json_response({"error": "Study session not found"}), 404
+
+      unknown = missing_word_ids(cursor, [word_id for word_id, _, _ in reviews])
+      if unknown:
+        return json_response({"error": "Unknown word_ids", "word_ids": unknown}), 400
 
-  # todo POST /study_sessions/:id/review
+      # Without the write-behind queue, write the batch in this request's transaction
+      if app.review_queue is None:
+        word_ids = record_reviews(cursor, id, reviews)
+        app.db.commit()
+        app.live_stats.refresh(app.db.get())
+
+        return json_response({
+          "session_id": id,
+          "reviews_recorded": len(reviews),
+          "words": word_counters(cursor, word_ids)
+        }), 201
+
+      # Queue the batch; it is committed together with other pending batches.
+      # ?wait=false returns as soon as the batch is queued.
+      try:
+        ticket = app.review_queue.submit(id, reviews)
+      except QueueFull as e:
+        return json_response({"error": str(e)}), 503, {'Retry-After': '1'}
+
+      if request.args.get('wait', 'true').lower() in ('false', '0', 'no'):
+        return json_response({"session_id": id, "reviews_queued": len(reviews)}), 202
+
+      try:
+        words = ticket.wait(timeout=app.config.get('REVIEW_QUEUE_WAIT_TIMEOUT', 10))
+      except TimeoutError:
+        return json_response({"session_id": id, "reviews_queued": len(reviews)}), 202
+
+      return json_response({
+        "session_id": id,
+        "reviews_recorded": len(reviews),
+        "words": words
+      }), 201
+    except Exception as e:
+      app.db.rollback()
+      return json_response({"error": str(e)}), 500
 
   @app.route('/api/study-sessions/reset', methods=['POST'])
   @cross_origin()
   def reset_study_sessions():
     try:
-      cursor = app.db.cursor()
-      
-      # First delete all word review items since they have foreign key constraints
-      cursor.execute('DELETE FROM word_review_items')
-      
-      # Then delete all study sessions
-      cursor.execute('DELETE FROM study_sessions')
-      
-      app.db.commit()
-      
-      return jsonify({"message": "Study history cleared successfully"}), 200
+      # Deleting a long history holds the write lock for long, so it runs as
+      # a background job in small batches; poll the status url for progress
+      def reset(job):
+        result = reset_study_history(job, app.db,
+          batch_size=app.config.get('RESET_BATCH_SIZE', 5000),
+          on_batch=app.live_stats.refresh)
+        app.live_stats.refresh()
+        return result
+
+      job = app.jobs.submit('reset_study_history', reset)
+      status_url = f'/api/jobs/{job.id}'
+      return json_response({
+        "message": "Clearing study history",
+        "job_id": job.id,
+        "status_url": status_url
+      }), 202, {'Location': status_url}
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
+      return json_response({"error": str(e)}), 500
 
   @app.route('/study_sessions', methods=['POST'])
   @cross_origin()
   def create_study_session():
     try:
       if not request.is_json:
-        return jsonify({"error": "Request must be JSON"}), 400
+        return json_response({"error": "Request must be JSON"}), 400
 
       data = request.get_json()
       
       # Validate required fields
       required_fields = ['user_id', 'word_ids', 'session_type']
       if not all(field in data for field in required_fields):
-        return jsonify({"error": "Missing required fields"}), 400
+        return json_response({"error": "Missing required fields"}), 400
       
       if not isinstance(data['word_ids'], list):
-        return jsonify({"error": "word_ids must be an array"}), 400
+        return json_response({"error": "word_ids must be an array"}), 400
 
       cursor = app.db.cursor()
       
@@ -206,14 +245,13 @@ def load(app):
         ''', (session_id, word_id))
       
       app.db.commit()
+      app.live_stats.refresh(app.db.get())
       
-      return jsonify({
+      return json_response({
         "message": "Study session created successfully",
         "session_id": session_id
       }), 201
       
     except Exception as e:
       app.db.rollback()
-      return jsonify({"error": str(e)}), 500
-    finally:
-      app.db.close()
\ No newline at end of file
+      return json_response({"error": str(e)}), 500
\ No newline at end of file
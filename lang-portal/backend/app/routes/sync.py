@@ -0,0 +1,26 @@
+from flask import request
+from flask_cors import cross_origin
+
+from ..lib.changes import changes_since
+from ..lib.responses import json_response
+
+def load(app):
+  # Endpoint: GET /sync?since=<version>&limit=... rows changed since a version
+  @app.route('/sync', methods=['GET'])
+  @cross_origin()
+  def get_sync():
+    try:
+      since = request.args.get('since', 0, type=int)
+      if since < 0:
+        return json_response({"error": "since must be a version (0 for everything)"}), 400
+      limit = min(max(request.args.get('limit', 1000, type=int), 1), 5000)
+
+      cursor = app.db.cursor()
+      # One read transaction, so the rows match the version handed out
+      cursor.execute('BEGIN')
+      try:
+        return json_response(changes_since(cursor, since, limit))
+      finally:
+        app.db.rollback()
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
@@ -1,11 +1,25 @@
-from flask import request, jsonify, g
+from flask import request, g
 from flask_cors import cross_origin
 import json
 
+from ..lib.pagination import decode_cursor, keyset_condition, split_page
+from ..lib.responses import json_response, row_dict, row_dicts
+
+# Sort keys mapped to the expression used for ORDER BY and keyset comparisons.
+# The text columns are backed by (column, id) indexes.
+SORT_EXPRESSIONS = {
+  'kanji': 'w.kanji',
+  'romaji': 'w.romaji',
+  'english': 'w.english',
+  'correct_count': 'COALESCE(r.correct_count, 0)',
+  'wrong_count': 'COALESCE(r.wrong_count, 0)'
+}
+
 def load(app):
   # Endpoint: GET /words with pagination (50 words per page)
   @app.route('/words', methods=['GET'])
   @cross_origin()
+  @app.db.cached('words', 'word_reviews')
   def get_words():
     try:
       cursor = app.db.cursor()
@@ -28,6 +42,35 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
+      # Keyset pagination: ?cursor= (empty for the first page) switches from
+      # OFFSET paging to seeking on (sort column, id), so deep pages stay cheap
+      if 'cursor' in request.args:
+        try:
+          after = decode_cursor(request.args['cursor']) if request.args['cursor'] else None
+        except ValueError as e:
+          return json_response({"error": str(e)}), 400
+
+        sort_expr = SORT_EXPRESSIONS[sort_by]
+        condition, params = keyset_condition(sort_expr, 'w.id', order, after)
+
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english,
+              COALESCE(r.correct_count, 0) AS correct_count,
+              COALESCE(r.wrong_count, 0) AS wrong_count
+          FROM words w
+          LEFT JOIN word_reviews r ON w.id = r.word_id
+          WHERE {condition}
+          ORDER BY {sort_expr} {order}, w.id {order}
+          LIMIT ?
+        ''', (*params, words_per_page + 1))
+
+        words, next_cursor = split_page(cursor.fetchall(), words_per_page, sort_by)
+
+        return json_response({
+          "words": row_dicts(cursor, words),
+          "next_cursor": next_cursor
+        })
+
       # Query to fetch words with sorting
       cursor.execute(f'''
         SELECT w.id, w.kanji, w.romaji, w.english, 
@@ -39,36 +82,88 @@ def load(app):
         LIMIT ? OFFSET ?
       ''', (words_per_page, offset))
 
-      words = cursor.fetchall()
+      words = row_dicts(cursor)
 
       # Query the total number of words
       cursor.execute('SELECT COUNT(*) FROM words')
       total_words = cursor.fetchone()[0]
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
-      # Format the response
-      words_data = []
-      for word in words:
-        words_data.append({
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"]
-        })
-
-      return jsonify({
-        "words": words_data,
+      return json_response({
+        "words": words,
         "total_pages": total_pages,
         "current_page": page,
         "total_words": total_words
       })
 
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
-    finally:
-      app.db.close()
+      return json_response({"error": str(e)}), 500
+
+  # Endpoint: GET /words/search?q=...&group_id=...&limit=... full-text search
+  @app.route('/words/search', methods=['GET'])
+  @cross_origin()
+  def search_words():
+    try:
+      query = request.args.get('q', '').strip()
+      if not query:
+        return json_response({"error": "Missing search query"}), 400
+
+      group_id = request.args.get('group_id', type=int)
+      limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+
+      group_filter = ''
+      group_params = []
+      if group_id is not None:
+        group_filter = 'AND EXISTS (SELECT 1 FROM word_groups wg WHERE wg.word_id = w.id AND wg.group_id = ?)'
+        group_params = [group_id]
+
+      cursor = app.db.cursor()
+
+      if len(query) >= 3:
+        # Trigram index: the quoted query matches as a substring, ranked by bm25
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english,
+              COALESCE(r.correct_count, 0) AS correct_count,
+              COALESCE(r.wrong_count, 0) AS wrong_count
+          FROM words_fts
+          JOIN words w ON w.id = words_fts.rowid
+          LEFT JOIN word_reviews r ON w.id = r.word_id
+          WHERE words_fts MATCH ? {group_filter}
+          ORDER BY bm25(words_fts)
+          LIMIT ?
+        ''', ('"' + query.replace('"', '""') + '"', *group_params, limit))
+      else:
+        # Trigrams need 3+ characters; shorter queries are prefix range seeks
+        # on the (column, id) indexes, each capped at the page size
+        upper = query + '\U0010ffff'
+        cursor.execute(f'''
+          SELECT w.id, w.kanji, w.romaji, w.english,
+              COALESCE(r.correct_count, 0) AS correct_count,
+              COALESCE(r.wrong_count, 0) AS wrong_count
+          FROM words w
+          LEFT JOIN word_reviews r ON w.id = r.word_id
+          WHERE w.id IN (
+            SELECT id FROM (SELECT w.id FROM words w WHERE w.kanji >= ? AND w.kanji < ? {group_filter} ORDER BY w.kanji LIMIT ?)
+            UNION
+            SELECT id FROM (SELECT w.id FROM words w WHERE w.romaji >= ? AND w.romaji < ? {group_filter} ORDER BY w.romaji LIMIT ?)
+            UNION
+            SELECT id FROM (SELECT w.id FROM words w WHERE w.english >= ? AND w.english < ? {group_filter} ORDER BY w.english LIMIT ?)
+          )
+          ORDER BY length(w.kanji), w.kanji
+          LIMIT ?
+        ''', (
+          query, upper, *group_params, limit,
+          query, upper, *group_params, limit,
+          query, upper, *group_params, limit,
+          limit
+        ))
+
+      return json_response({
+        "query": query,
+        "words": row_dicts(cursor)
+      })
+    except Exception as e:
+      return json_response({"error": str(e)}), 500
 
   # Endpoint: GET /words/:id to get a single word with its details
   @app.route('/words/<int:word_id>', methods=['GET'])
@@ -91,10 +186,10 @@ def load(app):
         GROUP BY w.id
       ''', (word_id,))
       
-      word = cursor.fetchone()
+      word = row_dict(cursor, cursor.fetchone())
       
       if not word:
-        return jsonify({"error": "Word not found"}), 404
+        return json_response({"error": "Word not found"}), 404
       
       # Parse the groups string into a list of group objects
       groups = []
@@ -106,17 +201,8 @@ def load(app):
             "name": group_name
           })
       
-      return jsonify({
-        "word": {
-          "id": word["id"],
-          "kanji": word["kanji"],
-          "romaji": word["romaji"],
-          "english": word["english"],
-          "correct_count": word["correct_count"],
-          "wrong_count": word["wrong_count"],
-          "groups": groups
-        }
-      })
+      word["groups"] = groups
+      return json_response({"word": word})
       
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
\ No newline at end of file
+      return json_response({"error": str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,49 @@
+-- Databases seeded before migrations existed can hold the same word more
+-- than once (the seed has 暑い/atsui twice) and the same link twice, so the
+-- unique indexes 0002 creates on words (kanji, romaji) and word_groups
+-- (word_id, group_id) would fail on them. Version 0 runs before 0002 there;
+-- databases past 0002 have no duplicates, so it is a no-op on them.
+-- Each set of duplicate words is merged into the lowest id.
+CREATE TEMP TABLE word_merges AS
+  SELECT w.id AS duplicate_id, d.keep_id
+  FROM words w
+  JOIN (
+    SELECT kanji, romaji, MIN(id) AS keep_id FROM words GROUP BY kanji, romaji HAVING COUNT(*) > 1
+  ) d ON d.kanji = w.kanji AND d.romaji = w.romaji
+  WHERE w.id != d.keep_id;
+
+-- Links that already exist for the kept word are dropped rather than repeated
+UPDATE OR IGNORE word_groups
+  SET word_id = (SELECT keep_id FROM word_merges WHERE duplicate_id = word_groups.word_id)
+  WHERE word_id IN (SELECT duplicate_id FROM word_merges);
+DELETE FROM word_groups WHERE word_id IN (SELECT duplicate_id FROM word_merges);
+
+UPDATE word_review_items
+  SET word_id = (SELECT keep_id FROM word_merges WHERE duplicate_id = word_review_items.word_id)
+  WHERE word_id IN (SELECT duplicate_id FROM word_merges);
+
+-- Review counters of merged words are added up into the oldest row
+UPDATE word_reviews
+  SET word_id = (SELECT keep_id FROM word_merges WHERE duplicate_id = word_reviews.word_id)
+  WHERE word_id IN (SELECT duplicate_id FROM word_merges);
+UPDATE word_reviews AS wr SET
+  correct_count = d.correct_count,
+  wrong_count = d.wrong_count,
+  last_reviewed = d.last_reviewed
+FROM (
+  SELECT MIN(id) AS id, SUM(correct_count) AS correct_count, SUM(wrong_count) AS wrong_count, MAX(last_reviewed) AS last_reviewed
+  FROM word_reviews
+  WHERE word_id IN (SELECT keep_id FROM word_merges)
+  GROUP BY word_id
+  HAVING COUNT(*) > 1
+) AS d
+WHERE wr.id = d.id;
+DELETE FROM word_reviews
+  WHERE word_id IN (SELECT keep_id FROM word_merges)
+  AND id NOT IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id);
+
+DELETE FROM words WHERE id IN (SELECT duplicate_id FROM word_merges);
+DROP TABLE word_merges;
+
+-- Repeated links left by the seed or by the merge
+DELETE FROM word_groups WHERE rowid NOT IN (SELECT MIN(rowid) FROM word_groups GROUP BY word_id, group_id);
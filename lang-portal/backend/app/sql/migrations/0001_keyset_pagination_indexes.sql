@@ -0,0 +1,12 @@
+-- Indexes backing keyset (cursor) pagination on /words and /groups/:id/words.
+-- Each sortable column is paired with id so (column, id) is a unique, seekable key.
+CREATE INDEX IF NOT EXISTS idx_words_kanji_id ON words (kanji, id);
+CREATE INDEX IF NOT EXISTS idx_words_romaji_id ON words (romaji, id);
+CREATE INDEX IF NOT EXISTS idx_words_english_id ON words (english, id);
+
+-- word_reviews is LEFT JOINed onto every word row
+CREATE INDEX IF NOT EXISTS idx_word_reviews_word_id ON word_reviews (word_id);
+
+-- Membership checks in both directions (words of a group, groups of a word)
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_id_word_id ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word_id_group_id ON word_groups (word_id, group_id);
@@ -0,0 +1,6 @@
+-- Words are identified by (kanji, romaji) so bulk imports can upsert instead of duplicating
+CREATE UNIQUE INDEX IF NOT EXISTS idx_words_kanji_romaji ON words (kanji, romaji);
+
+-- A word belongs to a group at most once
+DROP INDEX IF EXISTS idx_word_groups_word_id_group_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_groups_word_id_group_id ON word_groups (word_id, group_id);
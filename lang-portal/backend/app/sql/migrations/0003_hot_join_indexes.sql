@@ -0,0 +1,20 @@
+-- Indexes for the joins and sorts the routes run on every request.
+
+-- Session detail: words reviewed in a session with per-session correct/wrong
+-- counts, and review item counts per session (covering, id is the rowid)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session_word_correct ON word_review_items (study_session_id, word_id, correct);
+
+-- Last activity per session (MAX(created_at) seeks the end of the range)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session_created_at ON word_review_items (study_session_id, created_at);
+
+-- Dashboard per-word aggregates (attempts, success rate, distinct words studied)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word_correct ON word_review_items (word_id, correct);
+
+-- Session listings: newest first, overall, per group and per activity
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at ON study_sessions (created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group_created_at ON study_sessions (group_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity_created_at ON study_sessions (study_activity_id, created_at);
+
+-- Group listing sorts
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name);
+CREATE INDEX IF NOT EXISTS idx_groups_words_count ON groups (words_count);
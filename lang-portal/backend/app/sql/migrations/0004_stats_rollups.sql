@@ -0,0 +1,136 @@
+-- Rollups behind /dashboard/stats, kept current by triggers so the endpoint
+-- reads a handful of rows instead of aggregating every review item.
+-- Backfill existing data with `invoke rebuild-rollups`.
+
+-- Per-word attempt/correct counters
+CREATE TABLE IF NOT EXISTS word_review_stats (
+  word_id INTEGER PRIMARY KEY,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0
+);
+
+-- Days with at least one study session (drives the streak)
+CREATE TABLE IF NOT EXISTS study_days (
+  study_date TEXT PRIMARY KEY,
+  session_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Sessions per group per day (drives active groups)
+CREATE TABLE IF NOT EXISTS group_study_days (
+  study_date TEXT NOT NULL,
+  group_id INTEGER NOT NULL,
+  session_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (study_date, group_id)
+) WITHOUT ROWID;
+
+-- Global totals, a single row
+CREATE TABLE IF NOT EXISTS study_stats (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  total_vocabulary INTEGER NOT NULL DEFAULT 0,
+  total_reviews INTEGER NOT NULL DEFAULT 0,
+  correct_reviews INTEGER NOT NULL DEFAULT 0,
+  words_studied INTEGER NOT NULL DEFAULT 0,  -- words with at least one review
+  mastered_words INTEGER NOT NULL DEFAULT 0,  -- >= 5 attempts and >= 80% correct
+  total_sessions INTEGER NOT NULL DEFAULT 0,
+  study_days INTEGER NOT NULL DEFAULT 0,
+  linked_days INTEGER NOT NULL DEFAULT 0  -- study days whose previous day is also a study day
+);
+
+INSERT OR IGNORE INTO study_stats (id) VALUES (1);
+
+-- Vocabulary -----------
+
+CREATE TRIGGER IF NOT EXISTS study_stats_words_insert AFTER INSERT ON words BEGIN
+  UPDATE study_stats SET total_vocabulary = total_vocabulary + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_stats_words_delete AFTER DELETE ON words BEGIN
+  UPDATE study_stats SET total_vocabulary = total_vocabulary - 1 WHERE id = 1;
+END;
+
+-- Sessions and study days -----------
+
+CREATE TRIGGER IF NOT EXISTS study_stats_sessions_insert AFTER INSERT ON study_sessions BEGIN
+  UPDATE study_stats SET total_sessions = total_sessions + 1 WHERE id = 1;
+  INSERT INTO study_days (study_date, session_count) VALUES (date(NEW.created_at), 1)
+    ON CONFLICT (study_date) DO UPDATE SET session_count = session_count + 1;
+  INSERT INTO group_study_days (study_date, group_id, session_count) VALUES (date(NEW.created_at), NEW.group_id, 1)
+    ON CONFLICT (study_date, group_id) DO UPDATE SET session_count = session_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_stats_sessions_delete AFTER DELETE ON study_sessions BEGIN
+  UPDATE study_stats SET total_sessions = total_sessions - 1 WHERE id = 1;
+  UPDATE study_days SET session_count = session_count - 1 WHERE study_date = date(OLD.created_at);
+  DELETE FROM study_days WHERE study_date = date(OLD.created_at) AND session_count <= 0;
+  UPDATE group_study_days SET session_count = session_count - 1
+    WHERE study_date = date(OLD.created_at) AND group_id = OLD.group_id;
+  DELETE FROM group_study_days
+    WHERE study_date = date(OLD.created_at) AND group_id = OLD.group_id AND session_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_stats_sessions_update AFTER UPDATE OF created_at, group_id ON study_sessions BEGIN
+  UPDATE study_days SET session_count = session_count - 1 WHERE study_date = date(OLD.created_at);
+  DELETE FROM study_days WHERE study_date = date(OLD.created_at) AND session_count <= 0;
+  UPDATE group_study_days SET session_count = session_count - 1
+    WHERE study_date = date(OLD.created_at) AND group_id = OLD.group_id;
+  DELETE FROM group_study_days
+    WHERE study_date = date(OLD.created_at) AND group_id = OLD.group_id AND session_count <= 0;
+  INSERT INTO study_days (study_date, session_count) VALUES (date(NEW.created_at), 1)
+    ON CONFLICT (study_date) DO UPDATE SET session_count = session_count + 1;
+  INSERT INTO group_study_days (study_date, group_id, session_count) VALUES (date(NEW.created_at), NEW.group_id, 1)
+    ON CONFLICT (study_date, group_id) DO UPDATE SET session_count = session_count + 1;
+END;
+
+-- A new study day links to the day before and the day after it
+CREATE TRIGGER IF NOT EXISTS study_stats_days_insert AFTER INSERT ON study_days BEGIN
+  UPDATE study_stats SET
+    study_days = study_days + 1,
+    linked_days = linked_days
+      + EXISTS (SELECT 1 FROM study_days WHERE study_date = date(NEW.study_date, '-1 day'))
+      + EXISTS (SELECT 1 FROM study_days WHERE study_date = date(NEW.study_date, '+1 day'))
+  WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_stats_days_delete AFTER DELETE ON study_days BEGIN
+  UPDATE study_stats SET
+    study_days = study_days - 1,
+    linked_days = linked_days
+      - EXISTS (SELECT 1 FROM study_days WHERE study_date = date(OLD.study_date, '-1 day'))
+      - EXISTS (SELECT 1 FROM study_days WHERE study_date = date(OLD.study_date, '+1 day'))
+  WHERE id = 1;
+END;
+
+-- Reviews -----------
+
+-- The mastered delta compares the word's counters after this review with
+-- the counters before it (x / 0 is NULL in SQLite, which reads as false)
+CREATE TRIGGER IF NOT EXISTS study_stats_reviews_insert AFTER INSERT ON word_review_items BEGIN
+  INSERT INTO word_review_stats (word_id, attempts, correct) VALUES (NEW.word_id, 1, NEW.correct = 1)
+    ON CONFLICT (word_id) DO UPDATE SET attempts = attempts + 1, correct = correct + excluded.correct;
+  UPDATE study_stats SET
+    total_reviews = total_reviews + 1,
+    correct_reviews = correct_reviews + (NEW.correct = 1),
+    words_studied = words_studied + (SELECT attempts = 1 FROM word_review_stats WHERE word_id = NEW.word_id),
+    mastered_words = mastered_words + (
+      SELECT (attempts >= 5 AND correct * 1.0 / attempts >= 0.8)
+           - (attempts - 1 >= 5 AND (correct - (NEW.correct = 1)) * 1.0 / (attempts - 1) >= 0.8)
+      FROM word_review_stats WHERE word_id = NEW.word_id
+    )
+  WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_stats_reviews_delete AFTER DELETE ON word_review_items BEGIN
+  UPDATE word_review_stats SET attempts = attempts - 1, correct = correct - (OLD.correct = 1)
+    WHERE word_id = OLD.word_id;
+  UPDATE study_stats SET
+    total_reviews = total_reviews - 1,
+    correct_reviews = correct_reviews - (OLD.correct = 1),
+    words_studied = words_studied - (SELECT attempts = 0 FROM word_review_stats WHERE word_id = OLD.word_id),
+    mastered_words = mastered_words + (
+      SELECT (attempts >= 5 AND correct * 1.0 / attempts >= 0.8)
+           - (attempts + 1 >= 5 AND (correct + (OLD.correct = 1)) * 1.0 / (attempts + 1) >= 0.8)
+      FROM word_review_stats WHERE word_id = OLD.word_id
+    )
+  WHERE id = 1;
+  DELETE FROM word_review_stats WHERE word_id = OLD.word_id AND attempts <= 0;
+END;
@@ -0,0 +1,45 @@
+-- Per-session review aggregates, maintained on review insert/delete so session
+-- listings read one row per session instead of aggregating word_review_items.
+-- Backfill existing data with `invoke rebuild-rollups`.
+CREATE TABLE IF NOT EXISTS study_session_stats (
+  study_session_id INTEGER PRIMARY KEY,
+  review_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0,
+  wrong_count INTEGER NOT NULL DEFAULT 0,
+  first_activity_at DATETIME,  -- Timestamp of the first review in the session
+  last_activity_at DATETIME  -- Timestamp of the latest review in the session
+);
+
+CREATE TRIGGER IF NOT EXISTS study_session_stats_sessions_insert AFTER INSERT ON study_sessions BEGIN
+  INSERT OR IGNORE INTO study_session_stats (study_session_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_session_stats_sessions_delete AFTER DELETE ON study_sessions BEGIN
+  DELETE FROM study_session_stats WHERE study_session_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_session_stats_reviews_insert AFTER INSERT ON word_review_items BEGIN
+  INSERT INTO study_session_stats (study_session_id, review_count, correct_count, wrong_count, first_activity_at, last_activity_at)
+    VALUES (NEW.study_session_id, 1, NEW.correct = 1, NEW.correct = 0, NEW.created_at, NEW.created_at)
+    ON CONFLICT (study_session_id) DO UPDATE SET
+      review_count = review_count + 1,
+      correct_count = correct_count + excluded.correct_count,
+      wrong_count = wrong_count + excluded.wrong_count,
+      first_activity_at = CASE
+        WHEN first_activity_at IS NULL OR excluded.first_activity_at < first_activity_at THEN excluded.first_activity_at
+        ELSE first_activity_at END,
+      last_activity_at = CASE
+        WHEN last_activity_at IS NULL OR excluded.last_activity_at > last_activity_at THEN excluded.last_activity_at
+        ELSE last_activity_at END;
+END;
+
+-- First/last activity are re-read from the (study_session_id, created_at) index
+CREATE TRIGGER IF NOT EXISTS study_session_stats_reviews_delete AFTER DELETE ON word_review_items BEGIN
+  UPDATE study_session_stats SET
+    review_count = review_count - 1,
+    correct_count = correct_count - (OLD.correct = 1),
+    wrong_count = wrong_count - (OLD.correct = 0),
+    first_activity_at = (SELECT MIN(created_at) FROM word_review_items WHERE study_session_id = OLD.study_session_id),
+    last_activity_at = (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = OLD.study_session_id)
+  WHERE study_session_id = OLD.study_session_id;
+END;
@@ -0,0 +1,18 @@
+-- One counter row per word so reviews can upsert correct/wrong counts.
+-- Fold any duplicate rows into the oldest one first.
+UPDATE word_reviews AS wr SET
+  correct_count = d.correct_count,
+  wrong_count = d.wrong_count,
+  last_reviewed = d.last_reviewed
+FROM (
+  SELECT MIN(id) AS id, SUM(correct_count) AS correct_count, SUM(wrong_count) AS wrong_count, MAX(last_reviewed) AS last_reviewed
+  FROM word_reviews
+  GROUP BY word_id
+  HAVING COUNT(*) > 1
+) AS d
+WHERE wr.id = d.id;
+
+DELETE FROM word_reviews WHERE id NOT IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id);
+
+DROP INDEX IF EXISTS idx_word_reviews_word_id;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word_id ON word_reviews (word_id);
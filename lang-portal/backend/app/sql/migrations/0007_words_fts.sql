@@ -0,0 +1,27 @@
+-- Full-text index over words for /words/search. The trigram tokenizer matches
+-- any substring of 3+ characters, which also covers prefixes and kana/kanji
+-- text that has no word boundaries.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+  kanji,
+  romaji,
+  english,
+  content='words',
+  content_rowid='id',
+  tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS words_fts_insert AFTER INSERT ON words BEGIN
+  INSERT INTO words_fts (rowid, kanji, romaji, english) VALUES (NEW.id, NEW.kanji, NEW.romaji, NEW.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_delete AFTER DELETE ON words BEGIN
+  INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english) VALUES ('delete', OLD.id, OLD.kanji, OLD.romaji, OLD.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_update AFTER UPDATE OF kanji, romaji, english ON words BEGIN
+  INSERT INTO words_fts (words_fts, rowid, kanji, romaji, english) VALUES ('delete', OLD.id, OLD.kanji, OLD.romaji, OLD.english);
+  INSERT INTO words_fts (rowid, kanji, romaji, english) VALUES (NEW.id, NEW.kanji, NEW.romaji, NEW.english);
+END;
+
+-- Index the words that already exist
+INSERT INTO words_fts (words_fts) VALUES ('rebuild');
@@ -0,0 +1,3 @@
+-- Incremental review history exports seek on created_at (id is the rowid,
+-- so the index also gives the (created_at, id) order)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_created_at ON word_review_items (created_at);
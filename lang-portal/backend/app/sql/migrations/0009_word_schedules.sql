@@ -0,0 +1,38 @@
+-- SM-2 schedule per word (see lib/scheduler.py), written by the review path
+ALTER TABLE word_reviews ADD COLUMN ease REAL NOT NULL DEFAULT 2.5;
+ALTER TABLE word_reviews ADD COLUMN interval_days REAL NOT NULL DEFAULT 0;
+ALTER TABLE word_reviews ADD COLUMN repetitions INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE word_reviews ADD COLUMN due_at TIMESTAMP;
+
+-- Words reviewed before the scheduler existed start over a day after their last review
+UPDATE word_reviews SET
+  interval_days = 1,
+  due_at = datetime(COALESCE(last_reviewed, CURRENT_TIMESTAMP), '+1 day');
+
+-- Due dates are copied onto each group membership so /groups/:id/due can walk
+-- (group_id, due_at) in index order. NULL means the word was never reviewed.
+ALTER TABLE word_groups ADD COLUMN due_at TIMESTAMP;
+
+UPDATE word_groups SET due_at = (
+  SELECT wr.due_at FROM word_reviews wr WHERE wr.word_id = word_groups.word_id
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_groups_group_due ON word_groups (group_id, due_at, word_id);
+
+CREATE TRIGGER IF NOT EXISTS word_groups_due_on_review_insert AFTER INSERT ON word_reviews BEGIN
+  UPDATE word_groups SET due_at = NEW.due_at WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_due_on_review_update AFTER UPDATE OF due_at ON word_reviews BEGIN
+  UPDATE word_groups SET due_at = NEW.due_at WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_due_on_review_delete AFTER DELETE ON word_reviews BEGIN
+  UPDATE word_groups SET due_at = NULL WHERE word_id = OLD.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_due_on_link AFTER INSERT ON word_groups BEGIN
+  UPDATE word_groups SET due_at = (
+    SELECT wr.due_at FROM word_reviews wr WHERE wr.word_id = NEW.word_id
+  ) WHERE rowid = NEW.rowid;
+END;
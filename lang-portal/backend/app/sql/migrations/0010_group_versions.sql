@@ -0,0 +1,33 @@
+-- A version counter per group, bumped whenever the words in the group change,
+-- so cached /groups/:id/words/raw bundles know when they are stale.
+-- Groups without a row are at version 0.
+CREATE TABLE IF NOT EXISTS group_versions (
+  group_id INTEGER PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS group_versions_link_insert AFTER INSERT ON word_groups BEGIN
+  INSERT INTO group_versions (group_id, version) VALUES (NEW.group_id, 1)
+    ON CONFLICT (group_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS group_versions_link_delete AFTER DELETE ON word_groups BEGIN
+  INSERT INTO group_versions (group_id, version) VALUES (OLD.group_id, 1)
+    ON CONFLICT (group_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS group_versions_words_update AFTER UPDATE OF kanji, romaji, english, parts ON words BEGIN
+  INSERT INTO group_versions (group_id, version)
+    SELECT group_id, 1 FROM word_groups WHERE word_id = NEW.id
+    ON CONFLICT (group_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS group_versions_words_delete AFTER DELETE ON words BEGIN
+  INSERT INTO group_versions (group_id, version)
+    SELECT group_id, 1 FROM word_groups WHERE word_id = OLD.id
+    ON CONFLICT (group_id) DO UPDATE SET version = version + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS group_versions_groups_delete AFTER DELETE ON groups BEGIN
+  DELETE FROM group_versions WHERE group_id = OLD.id;
+END;
@@ -0,0 +1,23 @@
+-- Counter caches kept current by triggers: groups.words_count (links in
+-- word_groups) and words.review_count (rows in word_review_items).
+-- `invoke check-counters` compares them with the base tables.
+ALTER TABLE words ADD COLUMN review_count INTEGER NOT NULL DEFAULT 0;
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups wg WHERE wg.group_id = groups.id);
+UPDATE words SET review_count = (SELECT COUNT(*) FROM word_review_items wri WHERE wri.word_id = words.id);
+
+CREATE TRIGGER IF NOT EXISTS groups_words_count_insert AFTER INSERT ON word_groups BEGIN
+  UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_words_count_delete AFTER DELETE ON word_groups BEGIN
+  UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_review_count_insert AFTER INSERT ON word_review_items BEGIN
+  UPDATE words SET review_count = review_count + 1 WHERE id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_review_count_delete AFTER DELETE ON word_review_items BEGIN
+  UPDATE words SET review_count = review_count - 1 WHERE id = OLD.word_id;
+END;
@@ -0,0 +1,72 @@
+-- words.parts normalized into one row per part, so readers no longer parse
+-- the JSON per word. words.parts stays the write format (imports, seeds);
+-- the triggers below keep word_parts in step with it. romaji is the part's
+-- list of syllables as a JSON array.
+CREATE TABLE IF NOT EXISTS word_parts (
+  word_id INTEGER NOT NULL,
+  position INTEGER NOT NULL,
+  kanji TEXT NOT NULL,
+  romaji TEXT NOT NULL DEFAULT '[]',
+  PRIMARY KEY (word_id, position),
+  FOREIGN KEY (word_id) REFERENCES words(id)
+) WITHOUT ROWID;
+
+-- Words containing a given kanji
+CREATE INDEX IF NOT EXISTS idx_word_parts_kanji ON word_parts(kanji, word_id);
+
+INSERT INTO word_parts (word_id, position, kanji, romaji)
+  SELECT
+    w.id,
+    p.key,
+    COALESCE(p.value ->> '$.kanji', ''),
+    CASE json_type(p.value, '$.romaji')
+      WHEN 'array' THEN p.value -> '$.romaji'
+      WHEN 'text' THEN json_array(p.value ->> '$.romaji')
+      ELSE '[]'
+    END
+  FROM words w, json_each(CASE WHEN json_valid(w.parts) AND json_type(w.parts) = 'array' THEN w.parts ELSE '[]' END) p;
+
+CREATE TRIGGER IF NOT EXISTS word_parts_insert AFTER INSERT ON words BEGIN
+  INSERT INTO word_parts (word_id, position, kanji, romaji)
+    SELECT
+      NEW.id,
+      p.key,
+      COALESCE(p.value ->> '$.kanji', ''),
+      CASE json_type(p.value, '$.romaji')
+        WHEN 'array' THEN p.value -> '$.romaji'
+        WHEN 'text' THEN json_array(p.value ->> '$.romaji')
+        ELSE '[]'
+      END
+    FROM json_each(CASE WHEN json_valid(NEW.parts) AND json_type(NEW.parts) = 'array' THEN NEW.parts ELSE '[]' END) p;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_parts_update AFTER UPDATE OF parts ON words
+WHEN NEW.parts IS NOT OLD.parts BEGIN
+  DELETE FROM word_parts WHERE word_id = OLD.id;
+  INSERT INTO word_parts (word_id, position, kanji, romaji)
+    SELECT
+      NEW.id,
+      p.key,
+      COALESCE(p.value ->> '$.kanji', ''),
+      CASE json_type(p.value, '$.romaji')
+        WHEN 'array' THEN p.value -> '$.romaji'
+        WHEN 'text' THEN json_array(p.value ->> '$.romaji')
+        ELSE '[]'
+      END
+    FROM json_each(CASE WHEN json_valid(NEW.parts) AND json_type(NEW.parts) = 'array' THEN NEW.parts ELSE '[]' END) p;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_parts_delete AFTER DELETE ON words BEGIN
+  DELETE FROM word_parts WHERE word_id = OLD.id;
+END;
+
+-- Compatibility view: the parts JSON of every word, rebuilt from word_parts
+-- in the original [{"kanji": ..., "romaji": [...]}, ...] shape
+CREATE VIEW IF NOT EXISTS word_parts_json AS
+  SELECT
+    w.id AS word_id,
+    (
+      SELECT json_group_array(json_object('kanji', p.kanji, 'romaji', json(p.romaji)))
+      FROM (SELECT kanji, romaji FROM word_parts WHERE word_id = w.id ORDER BY position) p
+    ) AS parts
+  FROM words w;
@@ -0,0 +1,103 @@
+-- A change counter per base table, bumped by every insert, update and delete,
+-- so conditional GETs (lib/conditional.py) can tell whether the data behind
+-- a response changed without running its queries. The _database row holds a
+-- random id, so a replaced database file never reuses old ETags.
+CREATE TABLE IF NOT EXISTS table_versions (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0,
+  changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_versions (name, version) VALUES
+  ('_database', abs(random())),
+  ('words', 0),
+  ('word_reviews', 0),
+  ('word_review_items', 0),
+  ('groups', 0),
+  ('word_groups', 0),
+  ('study_sessions', 0),
+  ('study_activities', 0);
+
+CREATE TRIGGER IF NOT EXISTS table_versions_words_insert AFTER INSERT ON words BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_words_update AFTER UPDATE ON words BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_words_delete AFTER DELETE ON words BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_reviews_insert AFTER INSERT ON word_reviews BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_reviews_update AFTER UPDATE ON word_reviews BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_reviews_delete AFTER DELETE ON word_reviews BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_review_items_insert AFTER INSERT ON word_review_items BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_review_items_update AFTER UPDATE ON word_review_items BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_review_items_delete AFTER DELETE ON word_review_items BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_groups_insert AFTER INSERT ON groups BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_groups_update AFTER UPDATE ON groups BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_groups_delete AFTER DELETE ON groups BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_groups_insert AFTER INSERT ON word_groups BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_groups_update AFTER UPDATE ON word_groups BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_groups_delete AFTER DELETE ON word_groups BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_sessions_insert AFTER INSERT ON study_sessions BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_sessions_update AFTER UPDATE ON study_sessions BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_sessions_delete AFTER DELETE ON study_sessions BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_activities_insert AFTER INSERT ON study_activities BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_activities_update AFTER UPDATE ON study_activities BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_activities_delete AFTER DELETE ON study_activities BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'study_activities';
+END;
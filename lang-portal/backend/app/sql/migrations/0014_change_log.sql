@@ -0,0 +1,101 @@
+-- Row-level change log for GET /sync (lib/changes.py). Triggers append one
+-- entry per inserted, updated or deleted row of the synced tables; version
+-- is the sync cursor. Updates only count when a column clients keep changes
+-- (words.review_count, word_groups.due_at and the scheduling state of
+-- word_reviews are left out). Existing rows are logged once as upserts so
+-- since=0 is a full sync.
+CREATE TABLE IF NOT EXISTS change_log (
+  version INTEGER PRIMARY KEY AUTOINCREMENT,
+  table_name TEXT NOT NULL,
+  row_key TEXT NOT NULL,  -- JSON object with the row's key columns
+  op TEXT NOT NULL CHECK (op IN ('upsert', 'delete')),
+  changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Latest entry per row, for compaction
+CREATE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_key, version);
+
+INSERT INTO change_log (table_name, row_key, op)
+SELECT 'words', json_object('id', id), 'upsert' FROM words ORDER BY rowid;
+
+CREATE TRIGGER IF NOT EXISTS change_log_words_insert AFTER INSERT ON words BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('words', json_object('id', NEW.id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_words_update AFTER UPDATE OF kanji, romaji, english, parts ON words BEGIN
+  INSERT INTO change_log (table_name, row_key, op)
+  SELECT 'words', json_object('id', OLD.id), 'delete' WHERE json_object('id', OLD.id) != json_object('id', NEW.id);
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('words', json_object('id', NEW.id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_words_delete AFTER DELETE ON words BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('words', json_object('id', OLD.id), 'delete');
+END;
+
+INSERT INTO change_log (table_name, row_key, op)
+SELECT 'groups', json_object('id', id), 'upsert' FROM groups ORDER BY rowid;
+
+CREATE TRIGGER IF NOT EXISTS change_log_groups_insert AFTER INSERT ON groups BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('groups', json_object('id', NEW.id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_groups_update AFTER UPDATE OF name, words_count ON groups BEGIN
+  INSERT INTO change_log (table_name, row_key, op)
+  SELECT 'groups', json_object('id', OLD.id), 'delete' WHERE json_object('id', OLD.id) != json_object('id', NEW.id);
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('groups', json_object('id', NEW.id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_groups_delete AFTER DELETE ON groups BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('groups', json_object('id', OLD.id), 'delete');
+END;
+
+INSERT INTO change_log (table_name, row_key, op)
+SELECT 'word_groups', json_object('word_id', word_id, 'group_id', group_id), 'upsert' FROM word_groups ORDER BY rowid;
+
+CREATE TRIGGER IF NOT EXISTS change_log_word_groups_insert AFTER INSERT ON word_groups BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_groups', json_object('word_id', NEW.word_id, 'group_id', NEW.group_id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_word_groups_update AFTER UPDATE OF word_id, group_id ON word_groups BEGIN
+  INSERT INTO change_log (table_name, row_key, op)
+  SELECT 'word_groups', json_object('word_id', OLD.word_id, 'group_id', OLD.group_id), 'delete' WHERE json_object('word_id', OLD.word_id, 'group_id', OLD.group_id) != json_object('word_id', NEW.word_id, 'group_id', NEW.group_id);
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_groups', json_object('word_id', NEW.word_id, 'group_id', NEW.group_id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_word_groups_delete AFTER DELETE ON word_groups BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_groups', json_object('word_id', OLD.word_id, 'group_id', OLD.group_id), 'delete');
+END;
+
+INSERT INTO change_log (table_name, row_key, op)
+SELECT 'study_sessions', json_object('id', id), 'upsert' FROM study_sessions ORDER BY rowid;
+
+CREATE TRIGGER IF NOT EXISTS change_log_study_sessions_insert AFTER INSERT ON study_sessions BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('study_sessions', json_object('id', NEW.id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_study_sessions_update AFTER UPDATE OF group_id, study_activity_id, created_at ON study_sessions BEGIN
+  INSERT INTO change_log (table_name, row_key, op)
+  SELECT 'study_sessions', json_object('id', OLD.id), 'delete' WHERE json_object('id', OLD.id) != json_object('id', NEW.id);
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('study_sessions', json_object('id', NEW.id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_study_sessions_delete AFTER DELETE ON study_sessions BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('study_sessions', json_object('id', OLD.id), 'delete');
+END;
+
+INSERT INTO change_log (table_name, row_key, op)
+SELECT 'word_reviews', json_object('word_id', word_id), 'upsert' FROM word_reviews ORDER BY rowid;
+
+CREATE TRIGGER IF NOT EXISTS change_log_word_reviews_insert AFTER INSERT ON word_reviews BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_reviews', json_object('word_id', NEW.word_id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_word_reviews_update AFTER UPDATE OF correct_count, wrong_count, last_reviewed, due_at ON word_reviews BEGIN
+  INSERT INTO change_log (table_name, row_key, op)
+  SELECT 'word_reviews', json_object('word_id', OLD.word_id), 'delete' WHERE json_object('word_id', OLD.word_id) != json_object('word_id', NEW.word_id);
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_reviews', json_object('word_id', NEW.word_id), 'upsert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS change_log_word_reviews_delete AFTER DELETE ON word_reviews BEGIN
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_reviews', json_object('word_id', OLD.word_id), 'delete');
+END;
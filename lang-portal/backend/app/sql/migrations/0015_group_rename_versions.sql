@@ -0,0 +1,6 @@
+-- The /groups/:id/words/raw bundle includes the group's name, so renaming a
+-- group bumps its version too (see 0010_group_versions.sql)
+CREATE TRIGGER IF NOT EXISTS group_versions_groups_rename AFTER UPDATE OF name ON groups BEGIN
+  INSERT INTO group_versions (group_id, version) VALUES (NEW.id, 1)
+    ON CONFLICT (group_id) DO UPDATE SET version = version + 1;
+END;
@@ -0,0 +1,8 @@
+-- Bump the words counter only when a column responses read changes: the
+-- review_count cache moves with every review and would invalidate every
+-- words response for nothing (replaces the trigger from 0013_table_versions.sql)
+DROP TRIGGER IF EXISTS table_versions_words_update;
+
+CREATE TRIGGER table_versions_words_update AFTER UPDATE OF kanji, romaji, english, parts ON words BEGIN
+  UPDATE table_versions SET version = version + 1, changed_at = CURRENT_TIMESTAMP WHERE name = 'words';
+END;
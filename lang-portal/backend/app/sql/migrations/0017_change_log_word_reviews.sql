@@ -0,0 +1,12 @@
+-- Which word_reviews columns GET /sync replicates: the counters, last_reviewed
+-- and due_at (clients schedule from it). ease, interval_days and repetitions
+-- stay server-side, so updates to them alone are not logged. 0014's header
+-- counted due_at among the columns left out; the trigger is recreated here
+-- with the columns listed explicitly, matching the /sync query.
+DROP TRIGGER IF EXISTS change_log_word_reviews_update;
+
+CREATE TRIGGER change_log_word_reviews_update AFTER UPDATE OF correct_count, wrong_count, last_reviewed, due_at ON word_reviews BEGIN
+  INSERT INTO change_log (table_name, row_key, op)
+  SELECT 'word_reviews', json_object('word_id', OLD.word_id), 'delete' WHERE json_object('word_id', OLD.word_id) != json_object('word_id', NEW.word_id);
+  INSERT INTO change_log (table_name, row_key, op) VALUES ('word_reviews', json_object('word_id', NEW.word_id), 'upsert');
+END;
@@ -0,0 +1,29 @@
+-- Recompute the /dashboard/stats rollups from the base tables
+
+DELETE FROM word_review_stats;
+INSERT INTO word_review_stats (word_id, attempts, correct)
+  SELECT word_id, COUNT(*), SUM(correct = 1) FROM word_review_items GROUP BY word_id;
+
+DELETE FROM study_days;
+INSERT INTO study_days (study_date, session_count)
+  SELECT date(created_at), COUNT(*) FROM study_sessions GROUP BY date(created_at);
+
+DELETE FROM group_study_days;
+INSERT INTO group_study_days (study_date, group_id, session_count)
+  SELECT date(created_at), group_id, COUNT(*) FROM study_sessions GROUP BY date(created_at), group_id;
+
+-- The study_days triggers touched the totals above; overwrite all of them
+INSERT OR IGNORE INTO study_stats (id) VALUES (1);
+UPDATE study_stats SET
+  total_vocabulary = (SELECT COUNT(*) FROM words),
+  total_reviews = (SELECT COALESCE(SUM(attempts), 0) FROM word_review_stats),
+  correct_reviews = (SELECT COALESCE(SUM(correct), 0) FROM word_review_stats),
+  words_studied = (SELECT COUNT(*) FROM word_review_stats),
+  mastered_words = (SELECT COUNT(*) FROM word_review_stats WHERE attempts >= 5 AND correct * 1.0 / attempts >= 0.8),
+  total_sessions = (SELECT COUNT(*) FROM study_sessions),
+  study_days = (SELECT COUNT(*) FROM study_days),
+  linked_days = (
+    SELECT COUNT(*) FROM study_days d
+    WHERE EXISTS (SELECT 1 FROM study_days p WHERE p.study_date = date(d.study_date, '-1 day'))
+  )
+WHERE id = 1;
@@ -0,0 +1,14 @@
+-- Recompute the per-session review aggregates from the base tables
+
+DELETE FROM study_session_stats;
+INSERT INTO study_session_stats (study_session_id, review_count, correct_count, wrong_count, first_activity_at, last_activity_at)
+  SELECT
+    ss.id,
+    COUNT(wri.id),
+    COUNT(CASE WHEN wri.correct = 1 THEN 1 END),
+    COUNT(CASE WHEN wri.correct = 0 THEN 1 END),
+    MIN(wri.created_at),
+    MAX(wri.created_at)
+  FROM study_sessions ss
+  LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
+  GROUP BY ss.id;
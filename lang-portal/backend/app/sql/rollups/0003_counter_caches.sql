@@ -0,0 +1,4 @@
+-- Recompute the counter caches on groups and words from the base tables
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups wg WHERE wg.group_id = groups.id);
+UPDATE words SET review_count = (SELECT COUNT(*) FROM word_review_items wri WHERE wri.word_id = words.id);
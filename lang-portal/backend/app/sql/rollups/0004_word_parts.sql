@@ -0,0 +1,14 @@
+-- Rebuild word_parts from words.parts (see sql/migrations/0012_word_parts.sql)
+
+DELETE FROM word_parts;
+INSERT INTO word_parts (word_id, position, kanji, romaji)
+  SELECT
+    w.id,
+    p.key,
+    COALESCE(p.value ->> '$.kanji', ''),
+    CASE json_type(p.value, '$.romaji')
+      WHEN 'array' THEN p.value -> '$.romaji'
+      WHEN 'text' THEN json_array(p.value ->> '$.romaji')
+      ELSE '[]'
+    END
+  FROM words w, json_each(CASE WHEN json_valid(w.parts) AND json_type(w.parts) = 'array' THEN w.parts ELSE '[]' END) p;
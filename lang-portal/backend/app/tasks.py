@@ -1,9 +1,161 @@
+import os
+import sys
 from invoke import task
-from lib.db import db
+
+# Tasks run from inside the app directory; put its parent first on the path
+# so `app` resolves to the package (routes included) rather than app.py, and
+# import everything through it so no module is loaded twice under two names
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.lib.db import db, Db
+from app.lib.importer import import_words as bulk_import_words, iter_words
 
 @task
 def init_db(c):
   from flask import Flask
   app = Flask(__name__)
   db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  print("Database initialized successfully.")
+
+@task(help={
+  'path': "Word file to load (.json array, .ndjson/.jsonl or .csv)",
+  'group': "Name of the group the words are added to (created if missing)",
+  'database': "SQLite database file (default: words.db)",
+  'batch_size': "Rows per executemany batch",
+  'bulk': "Suspend the per-row triggers and rebuild what they maintain once at the end (--no-bulk for row-by-row upserts)",
+})
+def import_words(c, path, group, database='words.db', batch_size=5000, bulk=True):
+  def progress(rows, seconds):
+    rate = rows / seconds if seconds else rows
+    sys.stdout.write(f"\r  {rows:,} rows ({rate:,.0f} rows/sec)")
+    sys.stdout.flush()
+
+  with Db(database=database).checkout() as connection:
+    result = bulk_import_words(connection, iter_words(path), group, batch_size=int(batch_size), progress=progress, bulk=bulk)
+
+  print(f"\nImported {result['rows']:,} rows into '{group}' "
+        f"({result['linked']:,} newly linked) in {result['seconds']:.2f}s "
+        f"({result['rows_per_sec']:,.0f} rows/sec).")
+
+def _create_app(database):
+  from app import create_app
+  return create_app({'DATABASE': database})
+
+@task(help={'database': "SQLite database file (default: words.db)"})
+def check_query_plans(c, database='words.db'):
+  from invoke import Exit
+  from app.lib.query_plan import check_query_plans as run_check
+
+  problems = run_check(_create_app(database))
+  for problem in problems:
+    print(f"FULL SCAN of {problem['table']} in {problem['endpoint']} ({problem['url']}):\n  {problem['sql']}")
+  if problems:
+    raise Exit(f"{len(problems)} queries fall back to a full table scan.", code=1)
+  print("All route queries use indexes.")
+
+@task(help={'database': "SQLite database file (default: words.db)"})
+def rebuild_rollups(c, database='words.db'):
+  from app.lib.rollups import rebuild_rollups as rebuild
+
+  with Db(database=database).checkout() as connection:
+    rebuild(connection)
+  print("Rollups rebuilt successfully.")
+
+@task(help={
+  'database': "SQLite database file to create (default: bench.db)",
+  'words': "Number of words", 'groups': "Number of groups",
+  'sessions': "Number of study sessions", 'review_items': "Number of review items",
+  'seed': "Random seed",
+})
+def bench_generate(c, database='bench.db', words=10000, groups=20, sessions=2000, review_items=100000, seed=0):
+  from app.bench.generate import generate
+
+  if os.path.exists(database):
+    raise SystemExit(f"{database} already exists; remove it first.")
+  generate(_create_app(database), words=int(words), groups=int(groups), sessions=int(sessions),
+    review_items=int(review_items), seed=int(seed))
+
+@task(help={
+  'database': "Database made by bench-generate (default: bench.db)",
+  'iterations': "Timed requests per endpoint", 'warmup': "Untimed requests per endpoint first",
+  'baseline': "Baseline file to compare against", 'save': "Store this run as the new baseline",
+  'tolerance': "Allowed p95 slowdown before a run fails (0.2 = 20%)",
+  'base_url': "Benchmark a running server instead of the Flask test client",
+})
+def bench(c, database='bench.db', iterations=50, warmup=5, baseline='bench/baseline.json', save=False, tolerance=0.2, base_url=None):
+  from invoke import Exit
+  from app.bench.driver import bench_requests, run
+  from app.bench.report import summarize, regressions, format_report, save_baseline, load_baseline
+
+  app = _create_app(database)
+  results, seconds = run(app, bench_requests(app), iterations=int(iterations), warmup=int(warmup), base_url=base_url)
+  summary = summarize(results)
+  previous = load_baseline(baseline)
+
+  total = sum(stats['count'] for stats in summary.values())
+  print(format_report(summary, previous))
+  print(f"{total:,} requests in {seconds:.1f}s ({total / seconds:,.0f} req/s)")
+
+  if save:
+    save_baseline(baseline, summary, meta={'database': database, 'iterations': int(iterations)})
+    print(f"Baseline saved to {baseline}.")
+  elif previous:
+    slower = regressions(summary, previous, tolerance=float(tolerance))
+    for regression in slower:
+      print(f"REGRESSION {regression['endpoint']}: p95 {regression['before']:.2f}ms -> {regression['after']:.2f}ms")
+    if slower:
+      raise Exit(f"{len(slower)} endpoints are slower than the baseline.", code=1)
+
+@task(help={'rows': "Rows on the page", 'iterations': "Timed runs per serializer"})
+def bench_serialization(c, rows=1000, iterations=200):
+  from app.bench.serialization import run
+
+  run(rows=int(rows), iterations=int(iterations))
+
+@task(help={'rows': "Words to import", 'batch_size': "Rows per executemany batch"})
+def bench_import(c, rows=100000, batch_size=5000):
+  from app.bench.importer import run
+
+  run(rows=int(rows), batch_size=int(batch_size))
+
+@task(help={
+  'database': "SQLite database file (default: words.db)",
+  'repair': "Fix the counters that are off",
+})
+def check_counters(c, database='words.db', repair=False):
+  from invoke import Exit
+  from app.lib.counters import check_counter_caches, repair_counter_caches
+
+  with Db(database=database).checkout() as connection:
+    mismatches = repair_counter_caches(connection) if repair else check_counter_caches(connection)
+  for mismatch in mismatches:
+    print(f"{mismatch['table']}.{mismatch['column']} id={mismatch['id']}: stored {mismatch['stored']}, actual {mismatch['actual']}")
+  if mismatches and not repair:
+    raise Exit(f"{len(mismatches)} counter caches are off; run with --repair.", code=1)
+  print(f"Repaired {len(mismatches)} counter caches." if repair else "All counter caches match.")
+
+@task(help={
+  'output': "Directory for the month=YYYY-MM partitions (default: exports/review_history)",
+  'database': "SQLite database file (default: words.db)",
+  'format': "arrow (IPC files, can be memory-mapped) or parquet",
+  'batch_size': "Rows fetched and written per record batch",
+})
+def export_reviews(c, output='exports/review_history', database='words.db', format='arrow', batch_size=50000):
+  from app.lib.columnar import ExportError, export_review_history
+
+  with Db(database=database).checkout() as connection:
+    try:
+      result = export_review_history(connection, output, format=format, batch_size=int(batch_size))
+    except ExportError as e:
+      raise SystemExit(str(e))
+  for path in result['files']:
+    print(f"  wrote {path}")
+  print(f"Exported {result['rows']:,} review items (up to id {result['last_id']}) to {output}.")
+
+@task(help={'database': "SQLite database file (default: words.db)"})
+def compact_changes(c, database='words.db'):
+  from app.lib.changes import compact_change_log
+
+  with Db(database=database).checkout() as connection:
+    removed = compact_change_log(connection)
+  print(f"Removed {removed:,} superseded change log entries.")
@@ -0,0 +1,39 @@
+import json
+import pytest
+from app import create_app
+
+@pytest.fixture
+def app(tmp_path):
+    # A fresh database with the real schema and all migrations applied
+    app = create_app({'DATABASE': str(tmp_path / 'test.db')})
+    app.config['TESTING'] = True
+    with app.app_context():
+        cursor = app.db.cursor()
+        app.db.setup_tables(cursor)
+        app.db.migrate()
+    return app
+
+@pytest.fixture
+def add_words(app):
+    # Insert words (kanji, romaji, english) into a group, returning their ids
+    def add(words, group_name='Test Group'):
+        with app.app_context():
+            cursor = app.db.cursor()
+            cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
+            group = cursor.fetchone()
+            if group:
+                group_id = group['id']
+            else:
+                cursor.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+                group_id = cursor.lastrowid
+            ids = []
+            for kanji, romaji, english in words:
+                cursor.execute(
+                    'INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)',
+                    (kanji, romaji, english, json.dumps([{"kanji": kanji, "romaji": [romaji]}]))
+                )
+                ids.append(cursor.lastrowid)
+                cursor.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (ids[-1], group_id))
+            app.db.commit()
+            return group_id, ids
+    return add
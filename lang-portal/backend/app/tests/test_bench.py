@@ -0,0 +1,31 @@
+from app import create_app
+from app.bench.driver import bench_requests, run
+from app.bench.generate import generate
+from app.bench.report import percentile, regressions, summarize
+
+def test_generate_and_run_every_route(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'bench.db'), 'REVIEW_QUEUE_ENABLED': False})
+    scale = generate(app, words=300, groups=3, sessions=20, review_items=500, log=lambda line: None)
+    assert scale['words'] == 300
+
+    with app.db.checkout() as connection:
+        stats = connection.execute('SELECT total_vocabulary, total_reviews, total_sessions FROM study_stats').fetchone()
+        assert tuple(stats) == (300, 500, 20)
+        assert connection.execute('SELECT SUM(words_count) FROM groups').fetchone()[0] == 300
+
+    requests = bench_requests(app)
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if 'GET' in rule.methods} - {'static'}
+    assert len(requests) > len(endpoints)
+    assert requests[-1][1] == 'POST'
+
+    results, _ = run(app, requests, iterations=2, warmup=0, log=lambda line: None)
+    assert all(len(latencies) == 2 for latencies in results.values())
+
+def test_percentiles_and_regressions():
+    assert percentile(list(range(1, 101)), 95) == 95
+    summary = summarize({'GET /words': [1.0] * 90 + [10.0] * 10})
+    assert (summary['GET /words']['p50'], summary['GET /words']['p99']) == (1.0, 10.0)
+
+    baseline = {'endpoints': {'GET /words': dict(summary['GET /words'], p95=4.0)}}
+    assert regressions(summary, baseline) == [{'endpoint': 'GET /words', 'before': 4.0, 'after': 10.0}]
+    assert regressions(summary, {'endpoints': {'GET /words': dict(summary['GET /words'])}}) == []
@@ -0,0 +1,91 @@
+import os
+import pytest
+from app.lib import columnar
+from app.lib.columnar import ExportError, export_review_history, iter_review_batches, load_export_state
+
+@pytest.fixture
+def reviews(app, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, '2025-01-31 23:00:00')", (group_id,))
+        connection.executemany(
+            'INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, 1, ?, ?)',
+            [
+                (word_ids[0], True, '2025-01-31 23:10:00'),
+                (word_ids[1], False, '2025-02-01 00:10:00'),
+                (word_ids[0], True, '2025-01-31 23:20:00'),
+            ]
+        )
+        connection.commit()
+    return group_id, word_ids
+
+def add_review(app, word_id, created_at):
+    with app.db.checkout() as connection:
+        connection.execute(
+            'INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, 1, 0, ?)',
+            (word_id, created_at)
+        )
+        connection.commit()
+
+def test_review_batches_are_split_by_month(app, reviews):
+    group_id, word_ids = reviews
+    with app.db.checkout() as connection:
+        batches = list(iter_review_batches(connection, 0, 3, batch_size=2))
+
+    assert [sorted(batch) for batch in batches] == [['2025-01', '2025-02'], ['2025-01']]
+    january = dict(zip(columnar.COLUMNS, batches[0]['2025-01']))
+    assert january['id'] == [1]
+    assert january['group_id'] == [group_id]
+    assert january['kanji'] == ['犬']
+    assert january['created_at'] == [1738365000]  # 2025-01-31 23:10:00 UTC
+
+def test_export_needs_pyarrow(app, reviews, tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'pyarrow', None)
+    with app.db.checkout() as connection:
+        with pytest.raises(ExportError, match='pyarrow'):
+            export_review_history(connection, str(tmp_path / 'out'))
+
+@pytest.mark.parametrize('format', ['arrow', 'parquet'])
+def test_exports_only_new_rows(app, reviews, tmp_path, format):
+    pyarrow = pytest.importorskip('pyarrow')
+    import pyarrow.dataset
+    output = str(tmp_path / 'out')
+    _, word_ids = reviews
+
+    with app.db.checkout() as connection:
+        first = export_review_history(connection, output, format=format, log=lambda message: None)
+        add_review(app, word_ids[1], '2025-02-03 08:00:00')
+        second = export_review_history(connection, output, format=format, log=lambda message: None)
+        third = export_review_history(connection, output, format=format, log=lambda message: None)
+
+    assert first['files'] == [
+        f'month=2025-01/part-000000000001-000000000003.{format}',
+        f'month=2025-02/part-000000000001-000000000003.{format}',
+    ]
+    assert (second['rows'], second['files']) == (1, [f'month=2025-02/part-000000000004-000000000004.{format}'])
+    assert third['rows'] == 0
+    assert load_export_state(output)['last_id'] == 4
+
+    table = pyarrow.dataset.dataset(output, format='ipc' if format == 'arrow' else 'parquet', partitioning='hive',
+        exclude_invalid_files=True).to_table().sort_by('id')
+    assert table.column('id').to_pylist() == [1, 2, 3, 4]
+    assert table.column('correct').to_pylist() == [True, False, True, False]
+    assert table.column('month').to_pylist() == ['2025-01', '2025-02', '2025-01', '2025-02']
+
+    if format == 'arrow':
+        path = os.path.join(output, first['files'][0])
+        with pyarrow.memory_map(path) as source:
+            assert pyarrow.ipc.open_file(source).read_all().column('english').to_pylist() == ['dog', 'dog']
+
+def test_interrupted_export_is_redone(app, reviews, tmp_path):
+    pytest.importorskip('pyarrow')
+    output = str(tmp_path / 'out')
+    # A part written by a run that never saved its state
+    os.makedirs(os.path.join(output, 'month=2025-01'))
+    stale = os.path.join(output, 'month=2025-01', 'part-000000000001-000000000002.arrow')
+    open(stale, 'w').close()
+
+    with app.db.checkout() as connection:
+        result = export_review_history(connection, output, log=lambda message: None)
+    assert result['rows'] == 3
+    assert not os.path.exists(stale)
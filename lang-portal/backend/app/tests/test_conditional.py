@@ -0,0 +1,79 @@
+import gzip
+from app.lib.conditional import ENDPOINT_TABLES
+
+def age_changes(app):
+    # Move every recorded change a minute into the past
+    with app.app_context():
+        app.db.cursor().execute("UPDATE table_versions SET changed_at = datetime(changed_at, '-60 seconds')")
+        app.db.commit()
+
+def test_unchanged_tables_answer_304_without_queries(app, client, add_words):
+    add_words([('犬', 'inu', 'dog')])
+    first = client.get('/words')
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'no-cache'
+
+    seen = []
+    app.db.observe_statements(lambda connection, sql, parameters, seconds, rows: seen.append(sql))
+    again = client.get('/words', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+    assert again.headers['ETag'] == etag
+    assert seen == []
+
+    # Writes to a table the endpoint reads from change its ETag
+    add_words([('猫', 'neko', 'cat')])
+    changed = client.get('/words', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert len(changed.json['words']) == 2
+
+def test_unrelated_writes_keep_the_etag(client, add_words):
+    add_words([('犬', 'inu', 'dog')])
+    etag = client.get('/api/study-activities').headers['ETag']
+    add_words([('猫', 'neko', 'cat')])
+    assert client.get('/api/study-activities', headers={'If-None-Match': etag}).status_code == 304
+
+def test_review_count_updates_keep_the_words_etag(app, client, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog')])
+    etag = client.get(f'/groups/{group_id}/words').headers['ETag']
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute('UPDATE words SET review_count = review_count + 1 WHERE id = ?', (word_ids[0],))
+        app.db.commit()
+    assert client.get(f'/groups/{group_id}/words', headers={'If-None-Match': etag}).status_code == 304
+
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute("UPDATE words SET english = 'hound' WHERE id = ?", (word_ids[0],))
+        app.db.commit()
+    assert client.get(f'/groups/{group_id}/words', headers={'If-None-Match': etag}).status_code == 200
+
+def test_if_modified_since(app, client, add_words):
+    add_words([('犬', 'inu', 'dog')])
+    # Changes from the current second get no Last-Modified, only the ETag
+    assert 'Last-Modified' not in client.get('/words').headers
+
+    age_changes(app)
+    last_modified = client.get('/words').headers['Last-Modified']
+    assert client.get('/words', headers={'If-Modified-Since': last_modified}).status_code == 304
+
+    add_words([('猫', 'neko', 'cat')])
+    assert client.get('/words', headers={'If-Modified-Since': last_modified}).status_code == 200
+
+def test_compressed_responses_match_weakly(client, add_words):
+    add_words([(f'漢字{i}', f'kanji{i}', f'meaning {i}') for i in range(60)])
+    response = client.get('/words', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'].startswith('W/')
+    assert len(gzip.decompress(response.data)) > 0
+
+    again = client.get('/words', headers={'Accept-Encoding': 'gzip', 'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
+
+def test_unlisted_endpoints_and_writes_are_untouched(client, add_words):
+    group_id, _ = add_words([('犬', 'inu', 'dog')])
+    assert 'get_group_due_words' not in ENDPOINT_TABLES
+    assert 'ETag' not in client.get('/words/999').headers
+    assert 'ETag' not in client.post('/api/study-sessions/reset').headers
+    assert 'Cache-Control' not in client.get('/export/words.ndjson').headers
@@ -0,0 +1,35 @@
+from app.lib.counters import check_counter_caches, repair_counter_caches
+
+def test_triggers_maintain_counter_caches(app, add_words):
+    group_id, (dog, cat) = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    other_group, _ = add_words([('鳥', 'tori', 'bird')], group_name='Other')
+
+    with app.db.checkout() as connection:
+        connection.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (dog, other_group))
+        connection.execute('DELETE FROM word_groups WHERE word_id = ? AND group_id = ?', (cat, group_id))
+        connection.executemany(
+            'INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, ?)',
+            [(dog, True), (dog, False), (cat, True)]
+        )
+        connection.execute('DELETE FROM word_review_items WHERE word_id = ? AND correct = 0', (dog,))
+        connection.commit()
+
+        counts = dict(connection.execute('SELECT id, words_count FROM groups').fetchall())
+        assert counts == {group_id: 1, other_group: 2}
+        reviews = dict(connection.execute('SELECT id, review_count FROM words WHERE id IN (?, ?)', (dog, cat)).fetchall())
+        assert reviews == {dog: 1, cat: 1}
+        assert check_counter_caches(connection) == []
+
+def test_repair_fixes_drifted_counters(app, add_words):
+    group_id, (dog,) = add_words([('犬', 'inu', 'dog')])
+    with app.db.checkout() as connection:
+        connection.execute('UPDATE groups SET words_count = 7 WHERE id = ?', (group_id,))
+        connection.execute('UPDATE words SET review_count = 3 WHERE id = ?', (dog,))
+        connection.commit()
+
+        assert check_counter_caches(connection) == [
+            {'table': 'groups', 'column': 'words_count', 'id': group_id, 'stored': 7, 'actual': 1},
+            {'table': 'words', 'column': 'review_count', 'id': dog, 'stored': 3, 'actual': 0},
+        ]
+        assert len(repair_counter_caches(connection)) == 2
+        assert check_counter_caches(connection) == []
@@ -0,0 +1,76 @@
+import random
+
+# The original full-aggregation queries, used as the reference result
+def aggregate_stats(connection):
+    one = lambda sql: connection.execute(sql).fetchone()[0]
+    return {
+        "total_vocabulary": one('SELECT COUNT(*) FROM words'),
+        "total_words_studied": one('SELECT COUNT(DISTINCT word_id) FROM word_review_items'),
+        "mastered_words": one('''
+            WITH word_stats AS (
+                SELECT word_id, COUNT(*) as total_attempts,
+                    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
+                FROM word_review_items GROUP BY word_id HAVING total_attempts >= 5
+            )
+            SELECT COUNT(*) FROM word_stats WHERE success_rate >= 0.8
+        '''),
+        "success_rate": one('SELECT SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) FROM word_review_items') or 0,
+        "total_sessions": one('SELECT COUNT(*) FROM study_sessions'),
+        "active_groups": one("SELECT COUNT(DISTINCT group_id) FROM study_sessions WHERE created_at >= date('now', '-30 days')"),
+        "current_streak": one('''
+            WITH daily_sessions AS (SELECT date(created_at) as study_date FROM study_sessions GROUP BY date(created_at)),
+            streak_calc AS (
+                SELECT julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
+                FROM daily_sessions
+            )
+            SELECT COUNT(*) FROM streak_calc WHERE days_diff = 1 OR days_diff IS NULL
+        '''),
+    }
+
+def populate(connection, word_ids, group_id):
+    rng = random.Random(7)
+    for day in (0, 1, 2, 4, 5, 9, 40):
+        for _ in range(rng.randint(1, 3)):
+            connection.execute(
+                "INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, datetime('now', ?))",
+                (group_id + rng.randint(0, 1), f'-{day} days')
+            )
+            session_id = connection.execute('SELECT last_insert_rowid()').fetchone()[0]
+            connection.executemany(
+                'INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, ?, ?)',
+                [(rng.choice(word_ids), session_id, rng.random() < 0.85) for _ in range(30)]
+            )
+    connection.commit()
+
+def test_stats_match_full_aggregation(client, app, add_words):
+    group_id, word_ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(12)])
+    with app.db.checkout() as connection:
+        populate(connection, word_ids, group_id)
+        # Deletes have to unwind the rollups too
+        connection.execute('DELETE FROM word_review_items WHERE id % 7 = 0')
+        connection.execute('DELETE FROM study_sessions WHERE id = 2')
+        connection.execute('DELETE FROM words WHERE id = ?', (word_ids[-1],))
+        connection.commit()
+        expected = aggregate_stats(connection)
+
+    response = client.get('/dashboard/stats')
+
+    assert response.status_code == 200
+    assert response.json == expected
+    assert response.json['mastered_words'] > 0
+    assert response.json['current_streak'] > 1
+
+def test_rebuild_matches_incremental(app, add_words):
+    group_id, word_ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(12)])
+    with app.db.checkout() as connection:
+        populate(connection, word_ids, group_id)
+        incremental = [tuple(row) for row in connection.execute('SELECT * FROM study_stats')]
+        connection.execute('UPDATE study_stats SET mastered_words = 0, linked_days = 0')
+        connection.execute('DELETE FROM word_review_stats')
+        connection.commit()
+
+    with app.app_context():
+        app.db.rebuild_rollups()
+
+    with app.db.checkout() as connection:
+        assert [tuple(row) for row in connection.execute('SELECT * FROM study_stats')] == incremental
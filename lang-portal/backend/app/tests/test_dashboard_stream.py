@@ -0,0 +1,86 @@
+import json
+from app.lib.pubsub import PubSub
+
+def next_events(stream, count):
+    # Parse the next count events off a streamed response, skipping keepalives
+    events = []
+    while len(events) < count:
+        text = next(stream)
+        text = text.decode('utf-8') if isinstance(text, bytes) else text
+        if text.startswith(':'):
+            continue
+        fields = dict(line.split(': ', 1) for line in text.strip().split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+def create_session(app, group_id):
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute("INSERT INTO study_activities (name, url, preview_url) VALUES ('Flashcards', 'http://localhost', '')")
+        cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, ?)', (group_id, cursor.lastrowid))
+        app.db.commit()
+        return cursor.lastrowid
+
+def test_stream_pushes_changed_stats_after_a_review_flush(app, client, add_words):
+    app.config['DASHBOARD_STREAM_HEARTBEAT'] = 0.05
+    group_id, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    session_id = create_session(app, group_id)
+
+    response = client.get('/dashboard/stream')
+    assert response.mimetype == 'text/event-stream'
+    assert 'Content-Encoding' not in response.headers
+    stream = iter(response.response)
+    (_, stats), (_, session) = next_events(stream, 2)
+    assert stats['total_vocabulary'] == 2 and stats['success_rate'] == 0
+    assert session['id'] == session_id
+
+    # Goes through the review queue; its flush publishes before the request returns
+    reviews = [{'word_id': word_ids[0], 'correct': True}, {'word_id': word_ids[1], 'correct': False}]
+    assert client.post(f'/study_sessions/{session_id}/review', json=reviews).status_code == 201
+
+    (event, changed), (_, session) = next_events(stream, 2)
+    assert event == 'stats'
+    # Only the fields that moved (the session already counted as a study day)
+    assert changed == {'total_words_studied': 2, 'success_rate': 0.5}
+    assert (session['correct_count'], session['wrong_count']) == (1, 1)
+    response.close()
+    assert app.pubsub.stats()['subscribers'] == 0
+
+def test_state_is_read_once_per_write_not_per_listener(app, client, add_words):
+    app.config['DASHBOARD_STREAM_HEARTBEAT'] = 0.05
+    app.review_queue = None
+    group_id, word_ids = add_words([('犬', 'inu', 'dog')])
+    session_id = create_session(app, group_id)
+
+    streams = [client.get('/dashboard/stream') for _ in range(3)]
+    for response in streams:
+        next_events(iter(response.response), 2)
+
+    seen = []
+    app.db.observe_statements(lambda connection, sql, parameters, seconds, rows: seen.append(sql))
+    client.post(f'/study_sessions/{session_id}/review', json=[{'word_id': word_ids[0], 'correct': True}])
+    for response in streams:
+        event, changed = next_events(iter(response.response), 1)[0]
+        assert changed['success_rate'] == 1.0
+        response.close()
+    # One stats read, one active groups count, one recent session
+    assert sum('FROM study_stats' in sql for sql in seen) == 1
+    assert sum('FROM group_study_days' in sql for sql in seen) == 1
+
+    # Nobody listening: nothing is read
+    seen.clear()
+    client.post(f'/study_sessions/{session_id}/review', json=[{'word_id': word_ids[0], 'correct': True}])
+    assert not any('study_stats' in sql for sql in seen)
+    assert app.live_stats.stats()['skipped'] >= 1
+
+def test_slow_subscribers_are_marked_lagged():
+    pubsub = PubSub(max_queued=2)
+    subscription = pubsub.subscribe('dashboard')
+    for i in range(5):
+        pubsub.publish('dashboard', 'stats', {'total_sessions': i})
+    assert subscription.take_lagged()
+    # The backlog was dropped; the listener starts over from the current state
+    assert subscription.get(timeout=0) == [('stats', {'total_sessions': 4})]
+    assert not subscription.take_lagged()
+    subscription.close()
+    assert pubsub.publish('dashboard', 'stats', {}) == 0
@@ -0,0 +1,64 @@
+import threading
+from app import create_app
+
+def make_app(tmp_path, **config):
+    return create_app({'DATABASE': str(tmp_path / 'pool.db'), **config})
+
+def test_connection_is_reused_across_requests(tmp_path):
+    app = make_app(tmp_path)
+
+    with app.app_context():
+        first = app.db.get()
+    with app.app_context():
+        second = app.db.get()
+
+    assert first is second
+    stats = app.db.pool_stats()
+    assert stats['created'] == 1
+    assert stats['reused'] >= 1
+    assert stats['in_use'] == 0
+    assert stats['idle'] == 1
+
+def test_pragmas_are_applied(tmp_path):
+    app = make_app(tmp_path, DATABASE_PRAGMAS={'busy_timeout': 1234})
+
+    with app.app_context():
+        cursor = app.db.cursor()
+        assert cursor.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert cursor.execute('PRAGMA busy_timeout').fetchone()[0] == 1234
+        assert cursor.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+
+def test_uncommitted_work_is_rolled_back_on_release(tmp_path):
+    app = make_app(tmp_path)
+
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+        app.db.commit()
+        cursor.execute('INSERT INTO t (id) VALUES (1)')
+
+    with app.app_context():
+        count = app.db.cursor().execute('SELECT COUNT(*) FROM t').fetchone()[0]
+    assert count == 0
+
+def test_concurrent_threads_get_their_own_connection(tmp_path):
+    app = make_app(tmp_path, DATABASE_POOL_SIZE=2)
+    barrier = threading.Barrier(4)
+    seen = []
+
+    def worker():
+        with app.app_context():
+            seen.append(id(app.db.get()))
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = app.db.pool_stats()
+    assert len(set(seen)) == 4
+    assert stats['peak_in_use'] == 4
+    assert stats['idle'] == 2
+    assert stats['discarded'] == 2
@@ -0,0 +1,66 @@
+import json
+import pytest
+from app.routes import exports
+
+def ndjson(response):
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+@pytest.fixture
+def history(app, add_words):
+    group_id, word_ids = add_words([('払う', 'harau', 'to pay'), ('行く', 'iku', 'to go')])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, '2025-01-01 10:00:00')", (group_id,))
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, '2025-01-02 10:00:00')", (group_id,))
+        connection.executemany(
+            'INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)',
+            [
+                (word_ids[0], 1, True, '2025-01-01 10:01:00'),
+                (word_ids[1], 2, False, '2025-01-02 10:01:00'),
+            ]
+        )
+        connection.commit()
+    return group_id, word_ids
+
+def test_export_words(client, history):
+    group_id, word_ids = history
+    words = ndjson(client.get('/export/words.ndjson'))
+    assert [word['romaji'] for word in words] == ['harau', 'iku']
+    assert words[0]['parts'] == [{'kanji': '払う', 'romaji': ['harau']}]
+    assert words[0]['groups'] == [{'id': group_id, 'name': 'Test Group'}]
+
+    assert [word['id'] for word in ndjson(client.get(f'/export/words.ndjson?since={word_ids[0]}'))] == word_ids[1:]
+
+def test_export_history_since(client, history):
+    sessions = ndjson(client.get('/export/study_sessions.ndjson'))
+    assert [(s['id'], s['review_count'], s['activity_name']) for s in sessions] == [(1, 1, 'Typing Tutor'), (2, 1, 'Typing Tutor')]
+
+    reviews = ndjson(client.get('/export/word_review_items.ndjson?since=2025-01-02T00:00:00Z'))
+    assert [(r['study_session_id'], r['correct']) for r in reviews] == [(2, False)]
+    assert [s['id'] for s in ndjson(client.get('/export/study_sessions.ndjson?since=2025-01-02'))] == [2]
+
+def test_export_resumes_after_the_last_line(app, client, history):
+    group_id, word_ids = history
+    with app.db.checkout() as connection:
+        # Another review with the same timestamp as the first one
+        connection.execute("INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, 1, 1, '2025-01-01 10:01:00')", (word_ids[1],))
+        connection.commit()
+
+    first = ndjson(client.get('/export/word_review_items.ndjson'))[0]
+    rest = ndjson(client.get(f"/export/word_review_items.ndjson?since={first['created_at']}&after_id={first['id']}"))
+    assert [r['id'] for r in rest] == [3, 2]
+
+    sessions = ndjson(client.get('/export/study_sessions.ndjson?since=2025-01-01 10:00:00&after_id=1'))
+    assert [s['id'] for s in sessions] == [2]
+
+def test_export_query_errors_are_500s(app, client, monkeypatch):
+    monkeypatch.setattr(exports, 'EXPORT_REVIEW_ITEMS', 'SELECT missing FROM word_review_items WHERE (?, ?)')
+    response = client.get('/export/word_review_items.ndjson')
+    assert response.status_code == 500
+    assert 'missing' in response.json['error']
+    assert app.db.pool.stats()['in_use'] == 0
+
+def test_export_invalid_since(client):
+    assert client.get('/export/word_review_items.ndjson?since=yesterday').status_code == 400
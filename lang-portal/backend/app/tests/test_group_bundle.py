@@ -0,0 +1,60 @@
+import gzip
+import json
+
+def test_bundle_contains_every_word_with_parts(client, add_words):
+    group_id, ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(25)])
+    response = client.get(f'/groups/{group_id}/words/raw')
+    assert response.status_code == 200
+    bundle = response.json
+    assert bundle['group_name'] == 'Test Group'
+    assert [word['id'] for word in bundle['words']] == ids
+    assert bundle['words'][0]['parts'] == [{'kanji': 'k0', 'romaji': ['r0']}]
+
+def test_gzip_and_conditional_requests(client, app, add_words):
+    group_id, _ = add_words([('犬', 'inu', 'dog')])
+    url = f'/groups/{group_id}/words/raw'
+
+    response = client.get(url, headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    etag = response.headers['ETag']
+    assert not etag.startswith('W/')
+    assert json.loads(gzip.decompress(response.data))['words'][0]['english'] == 'dog'
+
+    assert client.get(url, headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag}).status_code == 304
+    # The identity tag of the same bundle also validates
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert app.group_bundles.stats()['misses'] == 1
+
+def test_bundle_is_rebuilt_when_words_change(client, app, add_words):
+    group_id, ids = add_words([('犬', 'inu', 'dog')])
+    url = f'/groups/{group_id}/words/raw'
+    etag = client.get(url).headers['ETag']
+
+    with app.db.checkout() as connection:
+        connection.execute("UPDATE words SET english = 'hound' WHERE id = ?", (ids[0],))
+        connection.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['words'][0]['english'] == 'hound'
+
+    etag = response.headers['ETag']
+    add_words([('猫', 'neko', 'cat')])
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert [word['english'] for word in response.json['words']] == ['hound', 'cat']
+
+def test_missing_group(client):
+    assert client.get('/groups/99/words/raw').status_code == 404
+
+def test_bundle_is_rebuilt_when_the_group_is_renamed(client, app, add_words):
+    group_id, _ = add_words([('犬', 'inu', 'dog')])
+    url = f'/groups/{group_id}/words/raw'
+    etag = client.get(url).headers['ETag']
+
+    with app.db.checkout() as connection:
+        connection.execute("UPDATE groups SET name = 'Animals' WHERE id = ?", (group_id,))
+        connection.commit()
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert response.json['group_name'] == 'Animals'
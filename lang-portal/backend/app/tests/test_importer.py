@@ -0,0 +1,115 @@
+import io
+import json
+import pytest
+from app import create_app
+from app.bench.importer import run
+from app.lib.importer import BulkImportError, iter_json_array, iter_words, import_words
+
+WORDS = [
+    {"kanji": "払う", "romaji": "harau", "english": "to pay", "parts": [{"kanji": "払", "romaji": ["ha", "ra"]}, {"kanji": "う", "romaji": ["u"]}]},
+    {"kanji": "行く", "romaji": "iku", "english": "to go", "parts": [{"kanji": "行", "romaji": ["i"]}, {"kanji": "く", "romaji": ["ku"]}]},
+]
+
+def test_json_array_is_streamed_across_chunk_boundaries():
+    data = json.dumps(WORDS * 10, ensure_ascii=False, indent=2)
+    assert list(iter_json_array(io.StringIO(data), chunk_size=7)) == WORDS * 10
+
+def test_reads_ndjson_and_csv(tmp_path):
+    ndjson = tmp_path / 'words.ndjson'
+    ndjson.write_text('\n'.join(json.dumps(word) for word in WORDS) + '\n', encoding='utf-8')
+    csv_file = tmp_path / 'words.csv'
+    csv_file.write_text('kanji,romaji,english,parts\n行く,iku,to go,"[{""kanji"": ""行"", ""romaji"": [""i""]}]"\n', encoding='utf-8')
+
+    assert list(iter_words(str(ndjson))) == WORDS
+    assert list(iter_words(str(csv_file))) == [
+        {"kanji": "行く", "romaji": "iku", "english": "to go", "parts": [{"kanji": "行", "romaji": ["i"]}]}
+    ]
+
+def test_import_deduplicates_and_counts(app):
+    with app.db.checkout() as connection:
+        first = import_words(connection, WORDS, 'Core Verbs', batch_size=1)
+        updated = [dict(WORDS[0], english="to pay (money)")]
+        second = import_words(connection, updated, 'Core Verbs')
+
+        assert first['rows'] == 2 and first['linked'] == 2
+        assert second['linked'] == 0
+        assert connection.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 2
+        assert connection.execute("SELECT english FROM words WHERE romaji = 'harau'").fetchone()[0] == "to pay (money)"
+        assert connection.execute("SELECT words_count FROM groups WHERE name = 'Core Verbs'").fetchone()[0] == 2
+
+# What the triggers on words and word_groups maintain, for comparing the
+# per-row and the bulk import
+DERIVED = [
+    "SELECT name FROM sqlite_master WHERE type = 'trigger' ORDER BY name",
+    "SELECT total_vocabulary FROM study_stats",
+    "SELECT name, words_count FROM groups ORDER BY name",
+    "SELECT word_id, position, kanji, romaji FROM word_parts ORDER BY word_id, position",
+    "SELECT rowid, english FROM words_fts WHERE words_fts MATCH 'pay' ORDER BY rowid",
+    "SELECT word_id, group_id, due_at FROM word_groups ORDER BY word_id, group_id",
+    "SELECT DISTINCT table_name, row_key, op FROM change_log ORDER BY table_name, row_key",
+    "SELECT name FROM table_versions WHERE version > 0 ORDER BY name",
+]
+
+def derived_state(connection):
+    return [connection.execute(sql).fetchall() for sql in DERIVED]
+
+@pytest.fixture
+def bulk_app(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'bulk.db')})
+    with app.app_context():
+        app.db.setup_tables(app.db.cursor())
+        app.db.migrate()
+    return app
+
+def test_bulk_import_matches_the_per_row_import(app, bulk_app):
+    updated = [dict(WORDS[0], english="to pay (money)", parts=[{"kanji": "払う", "romaji": ["harau"]}]), WORDS[1]]
+    states = []
+    for target, bulk in ((app, False), (bulk_app, True)):
+        with target.db.checkout() as connection:
+            import_words(connection, WORDS, 'Core Verbs', bulk=bulk)
+            connection.execute("INSERT INTO word_reviews (word_id, correct_count, wrong_count, due_at) VALUES (2, 1, 0, '2030-01-01 00:00:00')")
+            connection.commit()
+            versions = dict(connection.execute('SELECT group_id, version FROM group_versions').fetchall())
+            import_words(connection, updated + [{"kanji": "払う", "romaji": "harau", "english": "to pay back"}], 'Core Verbs', bulk=bulk)
+            # The last row for a word wins, in both paths
+            assert connection.execute("SELECT english FROM words WHERE id = 1").fetchone()[0] == "to pay back"
+            import_words(connection, WORDS, 'Other Verbs', bulk=bulk)
+            assert connection.execute('SELECT version FROM group_versions WHERE group_id = 1').fetchone()[0] > versions[1]
+            states.append(derived_state(connection))
+
+    assert states[0] == states[1]
+    assert [tuple(row) for row in states[1][2]] == [('Core Verbs', 2), ('Other Verbs', 2)]
+    assert [tuple(row) for row in states[1][4]] == [(1, 'to pay')]
+
+def test_bulk_import_only_touches_the_imported_rows(bulk_app):
+    with bulk_app.db.checkout() as connection:
+        import_words(connection, WORDS, 'Core Verbs', bulk=True)
+        # Cached values a full rebuild would overwrite
+        connection.execute('UPDATE words SET review_count = 7 WHERE id = 1')
+        connection.execute('UPDATE study_stats SET total_vocabulary = 10')
+        connection.commit()
+
+        import_words(connection, [{"kanji": "食べる", "romaji": "taberu", "english": "to eat"}], 'Core Verbs', bulk=True)
+        assert connection.execute('SELECT review_count FROM words WHERE id = 1').fetchone()[0] == 7
+        assert connection.execute('SELECT total_vocabulary FROM study_stats').fetchone()[0] == 11
+        assert connection.execute("SELECT words_count FROM groups WHERE name = 'Core Verbs'").fetchone()[0] == 3
+        assert [row[0] for row in connection.execute("SELECT rowid FROM words_fts WHERE words_fts MATCH 'eat'")] == [3]
+
+def test_bulk_import_refuses_triggers_it_cannot_redo(bulk_app):
+    with bulk_app.db.checkout() as connection:
+        connection.execute('CREATE TABLE word_audit (word_id INTEGER)')
+        connection.execute('CREATE TRIGGER word_audit_insert AFTER INSERT ON words BEGIN INSERT INTO word_audit VALUES (NEW.id); END')
+        connection.commit()
+
+        with pytest.raises(BulkImportError, match='word_audit_insert'):
+            import_words(connection, WORDS, 'Core Verbs', bulk=True)
+        assert connection.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 0
+        assert connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'words_fts_insert'").fetchone()[0] == 1
+
+        import_words(connection, WORDS, 'Core Verbs')
+        assert connection.execute('SELECT COUNT(*) FROM word_audit').fetchone()[0] == 2
+
+def test_import_benchmark_runs():
+    results = run(rows=200, batch_size=50, log=lambda message: None)
+    assert [label for label, _, _ in results] == ['per-row upserts + triggers', 'bulk (triggers suspended)']
+    assert all(rate > 0 for _, rate, _ in results)
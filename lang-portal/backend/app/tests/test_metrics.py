@@ -0,0 +1,64 @@
+from app import create_app
+
+def metric(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + ' '):
+            return float(line.rsplit(' ', 1)[1])
+    return None
+
+def test_requests_and_statements_are_counted(client, add_words):
+    add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    assert client.get('/words').status_code == 200
+    assert client.get('/words/999').status_code == 404
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric(text, 'http_requests_total{endpoint="get_words",method="GET",status="200"}') == 1
+    assert metric(text, 'http_requests_total{endpoint="get_word",method="GET",status="404"}') == 1
+    assert metric(text, 'http_request_duration_seconds_count{endpoint="get_words",method="GET"}') == 1
+    # /words runs the page query and a COUNT(*)
+    assert metric(text, 'sql_statements_per_request_sum{endpoint="get_words"}') == 2
+    assert metric(text, 'sql_rows_returned_total{statement="select"}') >= 3
+    assert metric(text, 'db_pool_connections_created_total') >= 1
+
+def test_cursor_times_statements_until_the_last_row(app, add_words):
+    add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(5)])
+    seen = []
+    app.db.observe_statements(lambda connection, sql, parameters, seconds, rows: seen.append((sql, rows)))
+
+    with app.db.checkout() as connection:
+        rows = [row for row in connection.execute('SELECT id FROM words')]
+        cursor = connection.cursor()
+        cursor.execute('SELECT id FROM words WHERE id = ?', (1,))
+        cursor.fetchone()
+        cursor.close()
+
+    assert len(rows) == 5
+    assert seen == [('SELECT id FROM words', 5), ('SELECT id FROM words WHERE id = ?', 1)]
+
+def test_slow_query_log_captures_query_plans(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'test.db'), 'SLOW_QUERY_MS': 0, 'REVIEW_QUEUE_ENABLED': False})
+    with app.app_context():
+        app.db.setup_tables(app.db.cursor())
+        app.db.migrate()
+
+    client = app.test_client()
+    assert client.get('/groups').status_code == 200
+
+    queries = client.get('/metrics/slow-queries').json['queries']
+    groups_query = next(query for query in queries if query['sql'].startswith('SELECT id, name AS group_name'))
+    assert any('idx_groups_name' in step for step in groups_query['plan'])
+
+def test_review_flushes_are_recorded_in_histograms(app, client, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog')])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+        connection.commit()
+    review = {"word_id": word_ids[0], "correct": True}
+    assert client.post('/study_sessions/1/review', json=[review, review]).status_code == 201
+
+    text = client.get('/metrics').get_data(as_text=True)
+    assert metric(text, 'review_queue_flush_duration_seconds_count') == 1
+    assert metric(text, 'review_queue_flush_duration_seconds_bucket{le="+Inf"}') == 1
+    assert metric(text, 'review_queue_flush_events_sum') == 2
+    assert 'review_queue_flush_seconds_max' not in text
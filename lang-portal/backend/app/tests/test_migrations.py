@@ -0,0 +1,188 @@
+import json
+import os
+import shutil
+import sqlite3
+import pytest
+
+from app.lib.migrations import MIGRATIONS_DIR, MigrationError, apply_migrations, migration_status, split_statements
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = sqlite3.connect(str(tmp_path / 'test.db'))
+    yield connection
+    connection.close()
+
+def write(directory, filename, text):
+    directory.mkdir(exist_ok=True)
+    (directory / filename).write_text(text)
+
+def test_split_statements_keeps_trigger_bodies_together():
+    statements = split_statements('''
+        -- a comment; with a semicolon
+        CREATE TABLE a (id INTEGER PRIMARY KEY, note TEXT DEFAULT 'x;y');
+        CREATE TRIGGER t AFTER INSERT ON a BEGIN
+          UPDATE a SET note = 'z' WHERE id = NEW.id;
+        END; INSERT INTO a (id) VALUES (1);
+    ''')
+    assert len(statements) == 3
+    assert statements[1].endswith('END;')
+
+def test_migrations_are_recorded_and_run_once(connection, tmp_path):
+    migrations = tmp_path / 'migrations'
+    write(migrations, '0001_create.sql', 'CREATE TABLE a (id INTEGER PRIMARY KEY);')
+    write(migrations, '0002_insert.sql', 'INSERT INTO a (id) VALUES (1);')
+
+    log = []
+    assert apply_migrations(connection, str(migrations), dry_run=True, log=log.append) == ['0001_create.sql', '0002_insert.sql']
+    assert connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'a'").fetchone()[0] == 0
+
+    assert apply_migrations(connection, str(migrations), log=log.append) == ['0001_create.sql', '0002_insert.sql']
+    assert apply_migrations(connection, str(migrations), log=log.append) == []
+    assert connection.execute('SELECT COUNT(*) FROM a').fetchone()[0] == 1
+    assert connection.execute('PRAGMA user_version').fetchone()[0] == 2
+
+    write(migrations, '0002_insert.sql', 'INSERT INTO a (id) VALUES (2);')
+    assert [entry['state'] for entry in migration_status(connection, str(migrations))] == ['applied', 'changed']
+    with pytest.raises(MigrationError, match='0002_insert.sql'):
+        apply_migrations(connection, str(migrations), log=log.append)
+
+def test_failed_migration_rolls_back_completely(connection, tmp_path):
+    migrations = tmp_path / 'migrations'
+    write(migrations, '0001_broken.sql', 'CREATE TABLE a (id INTEGER PRIMARY KEY);\nINSERT INTO missing VALUES (1);')
+
+    with pytest.raises(MigrationError, match='nothing was applied'):
+        apply_migrations(connection, str(migrations), log=lambda message: None)
+    assert connection.execute("SELECT COUNT(*) FROM sqlite_master WHERE name = 'a'").fetchone()[0] == 0
+    assert migration_status(connection, str(migrations))[0]['state'] == 'pending'
+
+def test_existing_databases_are_baselined_from_user_version(connection, tmp_path):
+    migrations = tmp_path / 'migrations'
+    write(migrations, '0001_create.sql', 'CREATE TABLE a (id INTEGER PRIMARY KEY);')
+    write(migrations, '0002_create.sql', 'CREATE TABLE b (id INTEGER PRIMARY KEY);')
+    connection.execute('CREATE TABLE a (id INTEGER PRIMARY KEY)')
+    connection.execute('PRAGMA user_version = 1')
+
+    assert apply_migrations(connection, str(migrations), log=lambda message: None) == ['0002_create.sql']
+
+def test_dry_run_and_status_do_not_write(connection, tmp_path):
+    migrations = tmp_path / 'migrations'
+    write(migrations, '0001_create.sql', 'CREATE TABLE a (id INTEGER PRIMARY KEY);')
+    write(migrations, '0002_create.sql', 'CREATE TABLE b (id INTEGER PRIMARY KEY);')
+    connection.execute('CREATE TABLE a (id INTEGER PRIMARY KEY)')
+    connection.execute('PRAGMA user_version = 1')
+    connection.commit()
+    changes = connection.total_changes
+
+    assert apply_migrations(connection, str(migrations), dry_run=True, log=lambda message: None) == ['0002_create.sql']
+    assert [entry['state'] for entry in migration_status(connection, str(migrations))] == ['applied', 'pending']
+    assert connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall() == [('a',)]
+    assert connection.total_changes == changes
+
+def test_version_0_runs_on_baselined_and_migrated_databases(connection, tmp_path):
+    migrations = tmp_path / 'migrations'
+    write(migrations, '0001_create.sql', 'CREATE TABLE a (id INTEGER PRIMARY KEY);')
+    write(migrations, '0002_create.sql', 'CREATE TABLE b (id INTEGER PRIMARY KEY);')
+    connection.execute('CREATE TABLE a (id INTEGER PRIMARY KEY)')
+    connection.execute('PRAGMA user_version = 1')
+    write(migrations, '0000_repair.sql', 'CREATE TABLE repaired (id INTEGER PRIMARY KEY);')
+
+    assert apply_migrations(connection, str(migrations), log=lambda message: None) == ['0000_repair.sql', '0002_create.sql']
+    assert connection.execute('PRAGMA user_version').fetchone()[0] == 2
+
+    # Added after the others were applied: it runs last and leaves user_version alone
+    write(migrations, '0000_repair.sql', 'CREATE TABLE repaired_again (id INTEGER PRIMARY KEY);')
+    connection.execute('DELETE FROM schema_migrations WHERE version = 0')
+    connection.commit()
+    assert apply_migrations(connection, str(migrations), log=lambda message: None) == ['0000_repair.sql']
+    assert connection.execute('PRAGMA user_version').fetchone()[0] == 2
+
+ONLINE_MIGRATION = '''
+def migrate(migration):
+    migration.execute('ALTER TABLE items ADD COLUMN doubled INTEGER')
+    migration.backfill('items', "doubled = {expression}", batch_size=10)
+'''
+
+def test_online_migration_runs_in_batches_and_resumes(connection, tmp_path):
+    connection.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, value INTEGER)')
+    connection.executemany('INSERT INTO items (value) VALUES (?)', [(i,) for i in range(1, 46)])
+    connection.commit()
+
+    # abs() of the smallest integer overflows, failing the batch that holds row 25
+    migrations = tmp_path / 'migrations'
+    write(migrations, '0001_doubled.py', ONLINE_MIGRATION.format(
+        expression='CASE WHEN rowid = 25 THEN abs(-9223372036854775808) ELSE value * 2 END'))
+
+    log = []
+    with pytest.raises(MigrationError, match='rerun to resume'):
+        apply_migrations(connection, str(migrations), log=log.append)
+    assert connection.execute('SELECT COUNT(*) FROM items WHERE doubled IS NOT NULL').fetchone()[0] == 20
+    assert connection.execute('SELECT step, last_id FROM schema_migration_progress').fetchone() == (1, 20)
+
+    # The fixed migration skips the ALTER and the first two batches
+    write(migrations, '0001_doubled.py', ONLINE_MIGRATION.format(expression='value * 2'))
+    log.clear()
+    assert apply_migrations(connection, str(migrations), log=log.append) == ['0001_doubled.py']
+    assert connection.execute('SELECT COUNT(*) FROM items WHERE doubled = value * 2').fetchone()[0] == 45
+    assert connection.execute('SELECT COUNT(*) FROM schema_migration_progress').fetchone()[0] == 0
+    assert [line.split(' (')[0] for line in log[1:]] == ['  items: 30/45 rows', '  items: 40/45 rows', '  items: 45/45 rows']
+
+SEED_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'seed')
+SETUP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'setup')
+
+# Tables and seed words the way Db.init wrote them before migrations
+# existed: one plain INSERT per seed entry, duplicates included
+def seed_like_baseline(connection):
+    for table in ('words', 'word_reviews', 'word_review_items', 'groups', 'word_groups', 'study_activities', 'study_sessions'):
+        with open(os.path.join(SETUP_DIR, f'create_table_{table}.sql')) as f:
+            connection.execute(f.read())
+    for group_name, filename in (('Core Verbs', 'data_verbs.json'), ('Core Adjectives', 'data_adjectives.json')):
+        group_id = connection.execute('INSERT INTO groups (name) VALUES (?)', (group_name,)).lastrowid
+        with open(os.path.join(SEED_DIR, filename)) as f:
+            for word in json.load(f):
+                word_id = connection.execute('INSERT INTO words (kanji, romaji, english, parts) VALUES (?, ?, ?, ?)',
+                    (word['kanji'], word['romaji'], word['english'], json.dumps(word['parts']))).lastrowid
+                connection.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (word_id, group_id))
+        connection.execute('UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = ?) WHERE id = ?',
+            (group_id, group_id))
+    connection.commit()
+
+def test_baseline_seeded_database_migrates(connection):
+    seed_like_baseline(connection)
+    keep_id, duplicate_id = [row[0] for row in connection.execute(
+        "SELECT id FROM words WHERE kanji = '暑い' AND romaji = 'atsui' ORDER BY id")]
+    # History on both copies of the duplicated word
+    connection.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (2, 1)")
+    for word_id, correct in ((keep_id, 1), (duplicate_id, 0)):
+        connection.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, ?)', (word_id, correct))
+        connection.execute('INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (?, ?, ?)', (word_id, correct, 1 - correct))
+    connection.commit()
+
+    ran = apply_migrations(connection, log=lambda message: None)
+    assert ran[0] == '0000_merge_duplicate_words.sql' and ran[1] == '0001_keyset_pagination_indexes.sql'
+
+    assert [row[0] for row in connection.execute("SELECT id FROM words WHERE kanji = '暑い'")] == [keep_id]
+    assert connection.execute('SELECT COUNT(*) FROM word_groups WHERE word_id = ?', (duplicate_id,)).fetchone()[0] == 0
+    assert connection.execute('SELECT COUNT(*) FROM word_groups WHERE word_id = ?', (keep_id,)).fetchone()[0] == 1
+    assert connection.execute('SELECT words_count FROM groups WHERE id = 2').fetchone()[0] == 63
+    assert connection.execute('SELECT COUNT(*) FROM word_review_items WHERE word_id = ?', (keep_id,)).fetchone()[0] == 2
+    assert connection.execute('SELECT correct_count, wrong_count FROM word_reviews').fetchall() == [(1, 1)]
+    assert connection.execute('SELECT review_count FROM words WHERE id = ?', (keep_id,)).fetchone()[0] == 2
+
+def test_databases_migrated_before_the_merge_pick_it_up(connection, tmp_path):
+    shipped = tmp_path / 'migrations'
+    shipped.mkdir()
+    for filename in os.listdir(MIGRATIONS_DIR):
+        if not filename.startswith('0000_'):
+            shutil.copy(os.path.join(MIGRATIONS_DIR, filename), shipped / filename)
+    seed_like_baseline(connection)
+    # A database seeded without the duplicate, migrated with the original series
+    duplicate_id = connection.execute("SELECT MAX(id) FROM words WHERE kanji = '暑い'").fetchone()[0]
+    connection.execute('DELETE FROM word_groups WHERE word_id = ?', (duplicate_id,))
+    connection.execute('DELETE FROM words WHERE id = ?', (duplicate_id,))
+    connection.commit()
+    apply_migrations(connection, str(shipped), log=lambda message: None)
+    version = connection.execute('PRAGMA user_version').fetchone()[0]
+
+    assert apply_migrations(connection, log=lambda message: None) == ['0000_merge_duplicate_words.sql']
+    assert connection.execute('PRAGMA user_version').fetchone()[0] == version
+    assert connection.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 123
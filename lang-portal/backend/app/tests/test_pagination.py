@@ -0,0 +1,43 @@
+def walk(client, url):
+    # Follow next_cursor until the last page, collecting the returned ids
+    ids = []
+    separator = '&' if '?' in url else '?'
+    response = client.get(f'{url}{separator}cursor=')
+    while True:
+        assert response.status_code == 200
+        ids.extend(word['id'] for word in response.json['words'])
+        if response.json['next_cursor'] is None:
+            return ids
+        response = client.get(f"{url}{separator}cursor={response.json['next_cursor']}")
+
+def test_words_cursor_walks_every_word_once(client, add_words):
+    # Duplicate kanji make sure ties are broken by id
+    _, ids = add_words([(f'k{i % 7}', f'r{i}', f'e{i}') for i in range(120)])
+
+    walked = walk(client, '/words?sort_by=kanji&order=asc')
+
+    assert sorted(walked) == sorted(ids)
+    assert len(walked) == len(set(walked))
+
+def test_words_cursor_matches_offset_order(client, add_words):
+    add_words([(f'k{i:03}', f'r{i}', f'e{i}') for i in range(75)])
+
+    offset_ids = []
+    for page in (1, 2):
+        response = client.get(f'/words?page={page}&sort_by=kanji&order=desc')
+        offset_ids.extend(word['id'] for word in response.json['words'])
+
+    assert walk(client, '/words?sort_by=kanji&order=desc') == offset_ids
+
+def test_words_invalid_cursor(client):
+    response = client.get('/words?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.json['error'] == "Invalid cursor"
+
+def test_group_words_cursor(client, add_words):
+    group_id, ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(25)])
+    add_words([('other', 'other', 'other')], group_name='Other Group')
+
+    walked = walk(client, f'/groups/{group_id}/words?sort_by=romaji')
+
+    assert sorted(walked) == sorted(ids)
@@ -0,0 +1,64 @@
+from app import create_app
+from app.lib.query_cache import QueryCache
+
+def test_repeated_list_requests_skip_the_database(app, client, add_words):
+    add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    seen = []
+    app.db.observe_statements(lambda connection, sql, parameters, seconds, rows: seen.append(sql))
+
+    first = client.get('/words?sort_by=romaji&order=desc')
+    assert len(seen) == 2
+    again = client.get('/words?sort_by=romaji&order=desc')
+    assert len(seen) == 2
+    assert again.json == first.json
+    assert again.headers['ETag'] == first.headers['ETag']
+
+    # Other arguments are other entries
+    client.get('/words?sort_by=romaji')
+    assert len(seen) == 4
+    assert app.db.query_cache.stats()['hits'] == 1
+
+def test_writes_invalidate_the_tables_they_touch(app, client, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog')])
+    assert client.get('/groups').json['groups'][0]['word_count'] == 1
+    client.get('/words')
+    client.get(f'/groups/{group_id}/words')
+
+    # Reviews touch word_reviews: /words and the group's words, not /groups
+    session = create_session(app, group_id)
+    response = client.post(f'/study_sessions/{session}/review', json=[{'word_id': word_ids[0], 'correct': True}])
+    assert response.status_code == 201
+    assert client.get('/words').json['words'][0]['correct_count'] == 1
+    assert client.get(f'/groups/{group_id}/words').json['words'][0]['correct_count'] == 1
+    client.get('/groups')
+
+    stats = app.db.query_cache.stats()
+    assert stats['invalidations'] == 2
+    assert stats['hits'] == 1
+
+    add_words([('猫', 'neko', 'cat')])
+    assert client.get('/groups').json['groups'][0]['word_count'] == 2
+
+def create_session(app, group_id):
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+        app.db.commit()
+        return cursor.lastrowid
+
+def test_lru_evicts_the_oldest_entry():
+    class Versions:
+        def current(self):
+            return {'_database': (1, None), 'words': (1, None)}
+
+    cache = QueryCache(Versions(), max_entries=2)
+    for key in ('a', 'b', 'c'):
+        _, stamp = cache.get(key, ('words',))
+        cache.put(key, ('words',), stamp, key)
+    assert cache.get('a', ('words',))[0] is None
+    assert cache.get('c', ('words',))[0] == 'c'
+    assert cache.stats()['evictions'] == 1
+
+def test_cache_can_be_disabled(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'test.db'), 'QUERY_CACHE_SIZE': 0})
+    assert app.db.query_cache is None
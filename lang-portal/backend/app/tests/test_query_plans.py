@@ -0,0 +1,19 @@
+from app.lib.query_plan import check_query_plans, full_scans
+
+def test_route_queries_do_not_scan_tables(app, add_words):
+    group_id, word_ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(30)])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+        connection.executemany(
+            'INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 1, ?)',
+            [(word_id, word_id % 2) for word_id in word_ids]
+        )
+        connection.commit()
+
+    assert check_query_plans(app) == []
+
+def test_full_scans_are_detected(app):
+    with app.db.checkout() as connection:
+        assert full_scans(connection, 'SELECT * FROM words w WHERE w.english = 1 + 1') == []
+        assert full_scans(connection, "SELECT * FROM words w WHERE w.parts = '[]'") == ['words']
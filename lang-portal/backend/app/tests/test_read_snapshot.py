@@ -0,0 +1,79 @@
+import time
+import pytest
+from app import create_app
+from app.lib.snapshot import ReadSnapshot
+
+@pytest.fixture
+def snapshot_app(tmp_path):
+    app = create_app({
+        'DATABASE': str(tmp_path / 'test.db'),
+        'READ_SNAPSHOT_INTERVAL': 3600,
+        'REVIEW_QUEUE_ENABLED': False,
+    })
+    app.config['TESTING'] = True
+    # Let the background thread finish its first refresh, the next one is an hour away
+    deadline = time.monotonic() + 5
+    while app.db.snapshot.stats()['refreshes'] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with app.app_context():
+        app.db.setup_tables(app.db.cursor())
+        app.db.migrate()
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO groups (name) VALUES ('Verbs')")
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+        connection.commit()
+    app.db.snapshot.refresh()
+    yield app
+    app.db.snapshot.stop()
+
+def add_session(app):
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id) VALUES (1, 1)")
+        connection.commit()
+
+def test_analytics_routes_read_the_snapshot(snapshot_app):
+    client = snapshot_app.test_client()
+    add_session(snapshot_app)
+
+    response = client.get('/dashboard/stats')
+    assert response.json['total_sessions'] == 1
+    assert 0 <= float(response.headers['X-Snapshot-Age']) < 60
+    assert len(client.get('/api/study-sessions').json['items']) == 1
+
+    # Other routes read the database itself
+    response = client.get('/groups/1/due')
+    assert response.status_code == 200
+    assert 'X-Snapshot-Age' not in response.headers
+
+    snapshot_app.db.snapshot.refresh()
+    assert client.get('/dashboard/stats').json['total_sessions'] == 2
+
+def test_snapshot_readers_do_not_block_writers(snapshot_app):
+    with snapshot_app.test_request_context('/dashboard/stats'):
+        snapshot_app.db.read_from_snapshot()
+        cursor = snapshot_app.db.cursor()
+        cursor.execute('BEGIN')
+        cursor.execute('SELECT COUNT(*) FROM study_sessions')
+
+        # A write (and a refresh) while the snapshot read transaction is open
+        add_session(snapshot_app)
+        snapshot_app.db.snapshot.refresh()
+        assert cursor.fetchone()[0] == 1
+        snapshot_app.db.close()
+
+    assert snapshot_app.db.snapshot.stats()['in_use'] == 0
+    with snapshot_app.test_request_context('/dashboard/stats'):
+        snapshot_app.db.read_from_snapshot()
+        assert snapshot_app.db.cursor().execute('SELECT COUNT(*) FROM study_sessions').fetchone()[0] == 2
+        snapshot_app.db.close()
+
+def test_requests_use_the_database_until_the_first_snapshot(tmp_path):
+    app = create_app({'DATABASE': str(tmp_path / 'test.db'), 'REVIEW_QUEUE_ENABLED': False})
+    # Not started, so it has no copy yet
+    app.db.snapshot = ReadSnapshot(app.db.database)
+    with app.test_request_context('/dashboard/stats'):
+        app.db.read_from_snapshot()
+        app.db.cursor().execute('SELECT 1')
+        assert app.db.snapshot_age() is None
+        app.db.close()
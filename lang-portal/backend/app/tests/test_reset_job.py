@@ -0,0 +1,93 @@
+import time
+from app.lib.jobs import Job, reset_study_history
+
+def wait_for(client, status_url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(status_url).json
+        if job['status'] in ('done', 'failed'):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job still {job['status']}")
+
+def add_history(app, group_id, word_ids, sessions=7, reviews=3):
+    with app.app_context():
+        cursor = app.db.cursor()
+        for _ in range(sessions):
+            cursor.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+            session_id = cursor.lastrowid
+            for i in range(reviews):
+                cursor.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, ?, ?)',
+                    (word_ids[i % len(word_ids)], session_id, i % 2))
+        app.db.commit()
+
+def test_reset_runs_in_batches_and_rebuilds_rollups(app, client, add_words):
+    app.config['RESET_BATCH_SIZE'] = 4
+    group_id, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    add_history(app, group_id, word_ids)
+
+    statements = []
+    app.db.observe_statements(lambda connection, sql, parameters, seconds, rows: statements.append(sql))
+    response = client.post('/api/study-sessions/reset')
+    assert response.status_code == 202
+    assert response.headers['Location'] == response.json['status_url']
+
+    job = wait_for(client, response.json['status_url'])
+    assert job['status'] == 'done', job['error']
+    assert job['result'] == {'word_review_items_deleted': 21, 'study_sessions_deleted': 7}
+    assert job['progress']['word_review_items_total'] == 21
+    assert job['progress']['rollups'] == 'rebuilt'
+    # 21 review items and 7 sessions, at most 4 ids per transaction
+    assert sum(sql.startswith('DELETE FROM word_review_items WHERE id') for sql in statements) == 6
+    assert sum(sql.startswith('DELETE FROM study_sessions WHERE id') for sql in statements) == 2
+
+    stats = client.get('/dashboard/stats').json
+    assert (stats['total_sessions'], stats['total_words_studied'], stats['success_rate']) == (0, 0, 0)
+    assert client.get('/api/study-sessions').json['total'] == 0
+    with app.app_context():
+        assert app.db.cursor().execute('SELECT SUM(review_count) FROM words').fetchone()[0] == 0
+
+def test_one_reset_at_a_time(app, client, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog')])
+    add_history(app, group_id, word_ids, sessions=20)
+    app.config['RESET_BATCH_SIZE'] = 5
+
+    first = client.post('/api/study-sessions/reset').json
+    second = client.post('/api/study-sessions/reset').json
+    assert second['job_id'] == first['job_id']
+    assert wait_for(client, first['status_url'])['status'] == 'done'
+    assert client.post('/api/study-sessions/reset').json['job_id'] != first['job_id']
+
+def test_unknown_job(client):
+    assert client.get('/api/jobs/999').status_code == 404
+
+def test_reviews_added_during_a_reset_are_cleared_in_batches(app, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog')])
+    add_history(app, group_id, word_ids, sessions=2, reviews=1)
+
+    # A review batch lands on a deleted session right after the sessions pass
+    added = []
+    def on_batch(connection):
+        if job.progress.get('study_sessions_deleted') and not added:
+            added.append(True)
+            connection.executemany('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, 2, 1)',
+                [(word_ids[0],)] * 7)
+            connection.commit()
+
+    statements = []
+    app.db.observe_statements(lambda connection, sql, parameters, seconds, rows: statements.append(sql))
+    job = Job(1, 'reset_study_history')
+    result = reset_study_history(job, app.db, batch_size=3, pause=0, on_batch=on_batch)
+
+    assert result == {'word_review_items_deleted': 9, 'study_sessions_deleted': 2}
+    # 7 leftovers, 3 per batch, and one more to find nothing is left
+    assert sum('study_session_id <= ?' in sql for sql in statements) == 4
+    with app.db.checkout() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 0
+
+def test_job_status_is_reported_consistently():
+    job = Job(1, 'test')
+    job.set_status('done', result={'rows': 3})
+    status = job.to_dict()
+    assert (status['status'], status['result'], status['error']) == ('done', {'rows': 3}, None)
+    assert status['finished_at'] is not None and job.finished
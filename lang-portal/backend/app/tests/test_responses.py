@@ -0,0 +1,40 @@
+import gzip
+import json
+from app.lib import responses
+from app.bench.serialization import run
+
+def test_large_responses_are_gzipped(client, add_words):
+    add_words([(f'漢字{i}', f'kanji{i}', f'meaning {i}') for i in range(60)])
+
+    response = client.get('/words', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    words = json.loads(gzip.decompress(response.data))['words']
+    assert words[0] == {'id': 1, 'kanji': '漢字0', 'romaji': 'kanji0', 'english': 'meaning 0', 'correct_count': 0, 'wrong_count': 0}
+
+    # Without Accept-Encoding, or below the size threshold, bodies go out as is
+    assert 'Content-Encoding' not in client.get('/words').headers
+    assert 'Content-Encoding' not in client.get('/words/1', headers={'Accept-Encoding': 'gzip'}).headers
+
+def test_encoder_falls_back_to_json(client, add_words, monkeypatch):
+    add_words([('犬', 'inu', 'dog')])
+    fast = client.get('/words/1').data
+    monkeypatch.setattr(responses, 'orjson', None)
+    assert json.loads(client.get('/words/1').data) == json.loads(fast)
+    assert client.get('/words/1').json['word']['groups'] == [{'id': 1, 'name': 'Test Group'}]
+
+def test_streamed_and_precompressed_responses_are_left_alone(client, add_words):
+    group_id, _ = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(200)])
+
+    export = client.get('/export/words.ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in export.headers
+    assert len(export.get_data(as_text=True).splitlines()) == 200
+
+    bundle = client.get(f'/groups/{group_id}/words/raw', headers={'Accept-Encoding': 'gzip'})
+    assert bundle.headers['Content-Encoding'] == 'gzip'
+    assert len(json.loads(gzip.decompress(bundle.data))['words']) == 200
+
+def test_serialization_benchmark_runs():
+    results = run(rows=50, iterations=2, log=lambda message: None)
+    assert results[0][0] == 'format_word + jsonify (before)'
+    assert all(ms > 0 for _, ms, _ in results)
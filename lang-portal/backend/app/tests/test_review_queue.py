@@ -0,0 +1,65 @@
+import threading
+import pytest
+from app.lib.review_queue import ReviewQueue, QueueFull
+
+@pytest.fixture
+def words(app, add_words):
+    group_id, word_ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(10)])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+        connection.commit()
+    return word_ids
+
+def review(word_id, correct=True):
+    return (word_id, correct, '2025-01-01 10:00:00')
+
+def test_concurrent_submissions_share_commits(app, words):
+    queue = ReviewQueue(app.db, max_batch=1000, max_latency=0.2)
+    tickets = []
+    lock = threading.Lock()
+
+    def submit(word_id):
+        ticket = queue.submit(1, [review(word_id), review(word_id, False)])
+        with lock:
+            tickets.append(ticket)
+
+    threads = [threading.Thread(target=submit, args=(word_id,)) for word_id in words]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results = [ticket.wait(timeout=5) for ticket in tickets]
+    queue.close()
+
+    assert all(result[0]['correct_count'] == 1 and result[0]['wrong_count'] == 1 for result in results)
+    stats = queue.stats()
+    assert stats['flushed_events'] == 20
+    assert stats['flushes'] < len(words)
+    assert stats['depth'] == 0
+    with app.db.checkout() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 20
+
+def test_full_queue_applies_backpressure(app, words):
+    queue = ReviewQueue(app.db, max_batch=1000, max_latency=60, max_depth=3, submit_timeout=0.05)
+    queue.submit(1, [review(words[0]), review(words[1])])
+
+    with pytest.raises(QueueFull):
+        queue.submit(1, [review(words[2]), review(words[3])])
+    assert queue.stats()['rejected'] == 1
+
+    # Shutting down flushes what is still queued
+    queue.close()
+    with app.db.checkout() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 2
+
+def test_review_endpoint_goes_through_queue(client, app, words):
+    response = client.post('/study_sessions/1/review', json=[{"word_id": words[0], "correct": True}])
+    assert response.status_code == 201
+    assert response.json['words'][0]['correct_count'] == 1
+
+    response = client.post('/study_sessions/1/review?wait=false', json=[{"word_id": words[0], "correct": False}])
+    assert response.status_code == 202
+    app.review_queue.close()
+
+    assert app.review_queue.stats()['flushed_events'] == 2
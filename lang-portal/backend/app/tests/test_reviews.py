@@ -0,0 +1,55 @@
+import pytest
+
+@pytest.fixture
+def session(app, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+        connection.commit()
+    return word_ids
+
+def test_batch_of_reviews_is_recorded(client, app, session):
+    dog, cat = session
+    reviews = [
+        {"word_id": dog, "correct": True, "timestamp": "2025-02-01T09:00:00Z"},
+        {"word_id": dog, "correct": False, "timestamp": "2025-02-01T09:01:00Z"},
+        {"word_id": cat, "correct": True},
+    ]
+
+    response = client.post('/study_sessions/1/review', json=reviews)
+    assert response.status_code == 201
+    assert response.json['reviews_recorded'] == 3
+
+    response = client.post('/study_sessions/1/review', json={"reviews": [{"word_id": dog, "correct": True, "timestamp": 1738400520}]})
+    words = {word['word_id']: word for word in response.json['words']}
+    assert (words[dog]['correct_count'], words[dog]['wrong_count']) == (2, 1)
+    assert words[dog]['last_reviewed'] == '2025-02-01 09:02:00'
+
+    with app.db.checkout() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 4
+        assert connection.execute('SELECT COUNT(*) FROM word_reviews').fetchone()[0] == 2
+        assert connection.execute('SELECT review_count FROM study_session_stats WHERE study_session_id = 1').fetchone()[0] == 4
+
+@pytest.mark.parametrize('payload, error', [
+    ([], "reviews must be a non-empty array"),
+    ([{"word_id": "1", "correct": True}], "reviews[0].word_id must be an integer"),
+    ([{"word_id": 1, "correct": 1}], "reviews[0].correct must be a boolean"),
+    ([{"word_id": 1, "correct": True, "timestamp": "yesterday"}], "reviews[0].timestamp must be an ISO 8601 string or a unix timestamp"),
+    ([{"word_id": 1, "correct": True, "timestamp": 1e20}], "reviews[0].timestamp must be between 1970-01-01 and now"),
+    ([{"word_id": 1, "correct": True, "timestamp": "0001-01-01"}], "reviews[0].timestamp must be between 1970-01-01 and now"),
+    ([{"word_id": 1, "correct": True, "timestamp": "9999-12-31T23:59:59"}], "reviews[0].timestamp must be between 1970-01-01 and now"),
+])
+def test_invalid_reviews_are_rejected(client, session, payload, error):
+    response = client.post('/study_sessions/1/review', json=payload)
+    assert response.status_code == 400
+    assert response.json['error'] == error
+
+def test_unknown_session_and_words(client, app, session):
+    assert client.post('/study_sessions/99/review', json=[{"word_id": session[0], "correct": True}]).status_code == 404
+
+    response = client.post('/study_sessions/1/review', json=[{"word_id": 999, "correct": True}])
+    assert response.status_code == 400
+    assert response.json['word_ids'] == [999]
+    with app.db.checkout() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 0
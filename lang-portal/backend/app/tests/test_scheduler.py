@@ -0,0 +1,59 @@
+import pytest
+
+from app.lib.scheduler import NEW_STATE, schedule
+
+def test_sm2_intervals():
+    state = NEW_STATE
+    intervals = []
+    for _ in range(4):
+        state = schedule(state, True)
+        intervals.append(state[1])
+    assert intervals == [1.0, 6.0, 15.0, 37.5]
+
+    ease, interval_days, repetitions = schedule(state, False)
+    assert (interval_days, repetitions) == (1.0, 0)
+    assert ease == pytest.approx(2.18)
+
+def test_interval_is_capped():
+    state = NEW_STATE
+    for _ in range(50):
+        state = schedule(state, True)
+    assert state[1] == 36500.0
+
+def test_ease_has_a_floor():
+    state = NEW_STATE
+    for _ in range(10):
+        state = schedule(state, False)
+    assert state[0] == 1.3
+
+@pytest.fixture
+def group(app, add_words):
+    group_id, word_ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(4)])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute('INSERT INTO study_sessions (group_id, study_activity_id) VALUES (?, 1)', (group_id,))
+        connection.commit()
+    return group_id, word_ids
+
+def test_reviews_schedule_words(client, group):
+    group_id, (first, second, third, fourth) = group
+    response = client.post('/study_sessions/1/review', json=[
+        {"word_id": first, "correct": False, "timestamp": "2025-01-01T09:00:00Z"},
+        {"word_id": second, "correct": True, "timestamp": "2025-01-02T09:00:00Z"},
+        {"word_id": second, "correct": True, "timestamp": "2025-01-03T09:00:00Z"},
+        {"word_id": third, "correct": True},
+    ])
+    words = {word['word_id']: word for word in response.json['words']}
+    assert words[first]['due_at'] == '2025-01-02 09:00:00'
+    assert words[second]['due_at'] == '2025-01-09 09:00:00'
+
+    # Overdue words first, most overdue first, then words never reviewed
+    due = client.get(f'/groups/{group_id}/due?limit=3').json['words']
+    assert [word['id'] for word in due] == [first, second, fourth]
+    assert due[2]['due_at'] is None
+
+    due = client.get(f'/groups/{group_id}/due?include_new=false').json['words']
+    assert [word['id'] for word in due] == [first, second]
+
+def test_due_words_of_missing_group(client):
+    assert client.get('/groups/99/due').status_code == 404
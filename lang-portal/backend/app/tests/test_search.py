@@ -0,0 +1,42 @@
+import pytest
+
+@pytest.fixture
+def words(add_words):
+    group_id, _ = add_words([
+        ('払う', 'harau', 'to pay'),
+        ('行く', 'iku', 'to go'),
+        ('食べる', 'taberu', 'to eat'),
+        ('食べ物', 'tabemono', 'food'),
+    ])
+    add_words([('高い', 'takai', 'expensive, high')], group_name='Adjectives')
+    return group_id
+
+def search(client, url):
+    response = client.get(url)
+    assert response.status_code == 200
+    return [word['english'] for word in response.json['words']]
+
+def test_substring_search_over_all_columns(client, words):
+    assert search(client, '/words/search?q=bem') == ['food']
+    assert search(client, '/words/search?q=食べる') == ['to eat']
+    assert search(client, '/words/search?q=PAY') == ['to pay']
+
+def test_short_queries_match_prefixes(client, words):
+    assert sorted(search(client, '/words/search?q=ta')) == ['expensive, high', 'food', 'to eat']
+    assert sorted(search(client, '/words/search?q=食')) == ['food', 'to eat']
+
+def test_group_filter(client, words):
+    assert sorted(search(client, f'/words/search?q=ta&group_id={words}')) == ['food', 'to eat']
+    assert search(client, f'/words/search?q=high&group_id={words}') == []
+
+def test_index_follows_updates_and_deletes(client, app, words):
+    with app.db.checkout() as connection:
+        connection.execute("UPDATE words SET english = 'to walk' WHERE romaji = 'iku'")
+        connection.execute("DELETE FROM words WHERE romaji = 'harau'")
+        connection.commit()
+
+    assert search(client, '/words/search?q=walk') == ['to walk']
+    assert search(client, '/words/search?q=pay') == []
+
+def test_missing_query(client):
+    assert client.get('/words/search').status_code == 400
@@ -0,0 +1,54 @@
+import pytest
+
+@pytest.fixture
+def sessions(app, add_words):
+    group_id, word_ids = add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(5)])
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO study_activities (name, url) VALUES ('Typing Tutor', 'http://localhost:8080')")
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, '2025-01-01 10:00:00')", (group_id,))
+        connection.execute("INSERT INTO study_sessions (group_id, study_activity_id, created_at) VALUES (?, 1, '2025-01-02 10:00:00')", (group_id,))
+        connection.executemany(
+            'INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, 1, ?, ?)',
+            [
+                (word_ids[0], True, '2025-01-01 10:01:00'),
+                (word_ids[1], False, '2025-01-01 10:05:00'),
+                (word_ids[2], True, '2025-01-01 10:03:00'),
+            ]
+        )
+        connection.commit()
+    return group_id
+
+def test_session_listings_use_review_aggregates(client, sessions):
+    group_sessions = client.get(f'/groups/{sessions}/study_sessions').json['study_sessions']
+    assert [(s['id'], s['review_items_count'], s['end_time']) for s in group_sessions] == [
+        (2, 0, '2025-01-02 10:30:00'),  # no reviews: start + 30 minutes
+        (1, 3, '2025-01-01 10:05:00'),
+    ]
+
+    items = client.get('/api/study-sessions').json['items']
+    assert [(s['id'], s['review_items_count'], s['end_time']) for s in items] == [
+        (2, 0, '2025-01-02 10:00:00'),
+        (1, 3, '2025-01-01 10:05:00'),
+    ]
+    assert client.get('/api/study-activities/1/sessions').json['items'] == items
+
+    detail = client.get('/api/study-sessions/1').json
+    assert detail['session']['review_items_count'] == 3
+    assert detail['total'] == 3
+
+def test_recent_session_counts(client, sessions, app):
+    with app.db.checkout() as connection:
+        connection.execute("INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 2, 1)")
+        connection.commit()
+
+    recent = client.get('/dashboard/recent-session').json
+    assert (recent['id'], recent['correct_count'], recent['wrong_count']) == (2, 1, 0)
+
+def test_deleting_reviews_updates_aggregates(client, sessions, app):
+    with app.db.checkout() as connection:
+        connection.execute("DELETE FROM word_review_items WHERE created_at = '2025-01-01 10:05:00'")
+        connection.commit()
+        stats = connection.execute('SELECT * FROM study_session_stats WHERE study_session_id = 1').fetchone()
+
+    assert (stats['review_count'], stats['correct_count'], stats['wrong_count']) == (2, 2, 0)
+    assert (stats['first_activity_at'], stats['last_activity_at']) == ('2025-01-01 10:01:00', '2025-01-01 10:03:00')
@@ -0,0 +1,90 @@
+from app.lib.changes import compact_change_log
+
+def test_first_sync_returns_every_row(client, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+
+    response = client.get('/sync')
+    assert response.status_code == 200
+    body = response.json
+    assert body['has_more'] is False
+    words = body['changes']['words']['upserted']
+    assert [word['id'] for word in words] == word_ids
+    assert words[0]['parts'] == [{'kanji': '犬', 'romaji': ['inu']}]
+    assert body['changes']['groups']['upserted'][0] == {'id': group_id, 'name': 'Test Group', 'word_count': 2}
+    assert len(body['changes']['word_groups']['upserted']) == 2
+
+    # Nothing changed since
+    again = client.get(f"/sync?since={body['version']}").json
+    assert again['version'] == body['version']
+    assert all(not table['upserted'] and not table['deleted'] for table in again['changes'].values())
+
+def test_changes_are_compacted_per_row(app, client, add_words):
+    group_id, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    since = client.get('/sync').json['version']
+
+    with app.app_context():
+        cursor = app.db.cursor()
+        for english in ('hound', 'doggo', 'puppy'):
+            cursor.execute('UPDATE words SET english = ? WHERE id = ?', (english, word_ids[0]))
+        cursor.execute('DELETE FROM word_groups WHERE word_id = ?', (word_ids[1],))
+        # Counter cache and scheduling columns are not synced
+        cursor.execute('UPDATE words SET review_count = 5 WHERE id = ?', (word_ids[1],))
+        app.db.commit()
+
+    changes = client.get(f'/sync?since={since}').json['changes']
+    assert [word['english'] for word in changes['words']['upserted']] == ['puppy']
+    assert changes['word_groups']['deleted'] == [{'word_id': word_ids[1], 'group_id': group_id}]
+    assert changes['groups']['upserted'][0]['word_count'] == 1
+
+def test_words_with_invalid_parts_still_sync(app, client, add_words):
+    _, word_ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute("UPDATE words SET parts = 'inu' WHERE id = ?", (word_ids[0],))
+        cursor.execute("UPDATE words SET parts = '' WHERE id = ?", (word_ids[1],))
+        app.db.commit()
+
+    response = client.get('/sync')
+    assert response.status_code == 200
+    assert [word['parts'] for word in response.json['changes']['words']['upserted']] == ['inu', []]
+
+def test_word_review_due_dates_sync_but_not_the_other_scheduling_columns(app, client, add_words):
+    _, word_ids = add_words([('犬', 'inu', 'dog')])
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute('INSERT INTO word_reviews (word_id, correct_count, wrong_count) VALUES (?, 1, 0)', (word_ids[0],))
+        app.db.commit()
+        since = client.get('/sync').json['version']
+
+        cursor.execute('UPDATE word_reviews SET ease = 2.6, interval_days = 1, repetitions = 1 WHERE word_id = ?', (word_ids[0],))
+        app.db.commit()
+        assert client.get(f'/sync?since={since}').json['version'] == since
+
+        cursor.execute("UPDATE word_reviews SET due_at = '2030-01-01 00:00:00' WHERE word_id = ?", (word_ids[0],))
+        app.db.commit()
+    reviews = client.get(f'/sync?since={since}').json['changes']['word_reviews']['upserted']
+    assert [review['due_at'] for review in reviews] == ['2030-01-01 00:00:00']
+
+def test_pages_follow_the_version(client, add_words):
+    add_words([(f'k{i}', f'r{i}', f'e{i}') for i in range(5)])
+    seen = []
+    since, has_more = 0, True
+    while has_more:
+        body = client.get(f'/sync?since={since}&limit=3').json
+        seen += [word['id'] for word in body['changes']['words']['upserted']]
+        since, has_more = body['version'], body['has_more']
+    assert sorted(seen) == [1, 2, 3, 4, 5]
+
+def test_compaction_keeps_the_latest_entry(app, client, add_words):
+    _, word_ids = add_words([('犬', 'inu', 'dog')])
+    with app.app_context():
+        cursor = app.db.cursor()
+        cursor.execute("UPDATE words SET english = 'hound' WHERE id = ?", (word_ids[0],))
+        app.db.commit()
+        before = client.get('/sync').json
+        # The word's insert, and the group's insert before its word_count moved
+        assert compact_change_log(app.db.get()) == 2
+    assert client.get('/sync').json == before
+
+def test_rejects_negative_versions(client):
+    assert client.get('/sync?since=-1').status_code == 400
@@ -0,0 +1,46 @@
+import json
+from app.lib.rollups import rebuild_rollups
+
+PARTS = [{"kanji": "払", "romaji": ["ha", "ra"]}, {"kanji": "う", "romaji": ["u"]}]
+
+def word_parts(connection, word_id):
+    rows = connection.execute('SELECT position, kanji, romaji FROM word_parts WHERE word_id = ? ORDER BY position', (word_id,))
+    return [(row[0], row[1], json.loads(row[2])) for row in rows]
+
+def test_triggers_keep_word_parts_in_step(app):
+    with app.db.checkout() as connection:
+        word_id = connection.execute(
+            "INSERT INTO words (kanji, romaji, english, parts) VALUES ('払う', 'harau', 'to pay', ?)", (json.dumps(PARTS),)
+        ).lastrowid
+        assert word_parts(connection, word_id) == [(0, '払', ['ha', 'ra']), (1, 'う', ['u'])]
+
+        connection.execute('UPDATE words SET parts = ? WHERE id = ?', (json.dumps([{"kanji": "払う", "romaji": "harau"}]), word_id))
+        assert word_parts(connection, word_id) == [(0, '払う', ['harau'])]
+
+        # Malformed parts leave the word without parts instead of failing the write
+        connection.execute("UPDATE words SET parts = 'not json' WHERE id = ?", (word_id,))
+        assert word_parts(connection, word_id) == []
+
+        connection.execute('DELETE FROM words WHERE id = ?', (word_id,))
+        assert word_parts(connection, word_id) == []
+
+def test_compatibility_view_returns_the_parts_json(app, add_words):
+    _, ids = add_words([('犬', 'inu', 'dog')])
+    with app.db.checkout() as connection:
+        connection.execute('UPDATE words SET parts = ? WHERE id = ?', (json.dumps(PARTS), ids[0]))
+        parts = connection.execute('SELECT parts FROM word_parts_json WHERE word_id = ?', (ids[0],)).fetchone()[0]
+        assert json.loads(parts) == PARTS
+
+        connection.execute('DELETE FROM word_parts')
+        connection.commit()
+        rebuild_rollups(connection, log=lambda message: None)
+        assert word_parts(connection, ids[0]) == [(0, '払', ['ha', 'ra']), (1, 'う', ['u'])]
+
+def test_bundle_parts_come_from_word_parts(client, app, add_words):
+    group_id, ids = add_words([('犬', 'inu', 'dog'), ('猫', 'neko', 'cat')])
+    with app.db.checkout() as connection:
+        connection.execute('UPDATE words SET parts = ? WHERE id = ?', (json.dumps(PARTS), ids[1]))
+        connection.commit()
+
+    words = client.get(f'/groups/{group_id}/words/raw').json['words']
+    assert [word['parts'] for word in words] == [[{'kanji': '犬', 'romaji': ['inu']}], PARTS]